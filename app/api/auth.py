@@ -8,17 +8,17 @@ from uuid import uuid4
 from fastapi import APIRouter, Depends, HTTPException, Request
 from langcodes import standardize_tag
 from loguru import logger
-from passlib.hash import argon2
 from pydantic import EmailStr
 from sentry_sdk import capture_exception
 from sqlalchemy import select
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 from unidecode import unidecode
 from user_agents import parse
 
 from app.config import get_settings
-from app.crud import crud_auth, crud_qr, crud_users
-from app.db import engine, get_db, get_public_db
+from app.crud import crud_auth, crud_auth_async, crud_qr, crud_users, load_profiles
+from app.db import get_async_public_db, get_db, get_public_db, get_session_tenant, get_tenant_engine, invalidate_tenant
 from app.models.models import User
 from app.models.shared_models import PublicUser
 from app.schemas.requests import CompanyInfoRegisterIn, ResetPassword, UserFirstRunIn, UserLoginIn, UserRegisterIn
@@ -32,9 +32,11 @@ from app.schemas.responses import (
     UserVerifyToken,
 )
 from app.service import auth
+from app.service.bearer_auth import Principal, has_token, invalidate_user_tokens
 from app.service.company_details import CompanyDetails
 from app.service.notification_email import EmailNotification
-from app.service.password import Password
+from app.service.outbox import enqueue_email
+from app.service.password import Password, hash_password, verify_password
 from app.service.scheduler import scheduler
 from app.service.tenants import alembic_upgrade_head, tenant_create
 
@@ -42,12 +44,14 @@ settings = get_settings()
 auth_router = APIRouter()
 
 UserDB = Annotated[Session, Depends(get_db)]
+CurrentUser = Annotated[Principal, Depends(has_token)]
 PublicDB = Annotated[Session, Depends(get_public_db)]
+AsyncPublicDB = Annotated[AsyncSession, Depends(get_async_public_db)]
 
 
 @auth_router.get("/account_limit", response_model=PublicCompanyCounterResponse)
-def auth_account_limit(*, public_db: PublicDB):
-    db_companies_no = crud_auth.get_public_company_count(public_db)
+async def auth_account_limit(*, public_db: AsyncPublicDB):
+    db_companies_no = await crud_auth_async.get_public_company_count(public_db)
     limit = 120
 
     return {"accounts": db_companies_no, "limit": limit}
@@ -114,6 +118,7 @@ def auth_register(*, public_db: PublicDB, user: UserRegisterIn):
         }
 
         db_company = crud_auth.create_public_company(public_db, company_data)
+        invalidate_tenant(tenant_id)
 
     else:
         tenant_id = db_company.tenant_id
@@ -128,7 +133,7 @@ def auth_register(*, public_db: PublicDB, user: UserRegisterIn):
         "email": user.email.strip(),
         "first_name": user.first_name,
         "last_name": user.last_name,
-        "password": argon2.hash(user.password),
+        "password": hash_password(user.password),
         "service_token": service_token,
         "service_token_valid_to": datetime.now(timezone.utc) + timedelta(days=1),
         "is_active": False,
@@ -156,7 +161,9 @@ def auth_register(*, public_db: PublicDB, user: UserRegisterIn):
 
     # Notification
     email = EmailNotification()
-    email.send_admin_registration(new_db_user, f"/activate/{service_token}")
+    registration = email.get_template_admin_registration(new_db_user, f"/activate/{service_token}")
+    enqueue_email(public_db, registration, f"admin_registration:{service_token}")
+    public_db.commit()
 
     return {"ok": True}
 
@@ -169,7 +176,11 @@ def auth_first_run(*, public_db: PublicDB, user: UserFirstRunIn):
     if not db_public_user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    connectable = engine.execution_options(schema_translate_map={"tenant": db_public_user.tenant_id})
+    # public user is updated through the tenant session, end the read so the public connection goes back to the pool
+    public_db.expunge(db_public_user)
+    public_db.rollback()
+
+    connectable = get_tenant_engine(db_public_user.tenant_id)
     with Session(autocommit=False, autoflush=False, bind=connectable, future=True) as db:
         db_user_cnt = crud_users.get_user_count(db)
         user_role_id = 2  # ADMIN_MASTER[1] / ADMIN[2]
@@ -220,25 +231,25 @@ def auth_first_run(*, public_db: PublicDB, user: UserFirstRunIn):
         crud_auth.create_tenant_user(db, anonymous_user_data)
         db_tenant_user = crud_auth.create_tenant_user(db, user_data)
 
-    empty_data = {
-        "service_token": None,
-        "service_token_valid_to": None,
-        "password": None,
-        "is_active": True,
-        "is_verified": True,
-    }
-    crud_auth.update_public_user(public_db, db_public_user, empty_data)
-
-    return {
-        "ok": True,
-        "first_name": db_tenant_user.first_name,
-        "last_name": db_tenant_user.last_name,
-        "lang": db_tenant_user.lang,
-        "tz": db_tenant_user.tz,
-        "uuid": db_tenant_user.uuid,
-        "tenant_id": db_tenant_user.tenant_id,
-        "token": db_tenant_user.auth_token,
-    }
+        empty_data = {
+            "service_token": None,
+            "service_token_valid_to": None,
+            "password": None,
+            "is_active": True,
+            "is_verified": True,
+        }
+        crud_auth.update_public_user(db, db_public_user, empty_data)
+
+        return {
+            "ok": True,
+            "first_name": db_tenant_user.first_name,
+            "last_name": db_tenant_user.last_name,
+            "lang": db_tenant_user.lang,
+            "tz": db_tenant_user.tz,
+            "uuid": db_tenant_user.uuid,
+            "tenant_id": db_tenant_user.tenant_id,
+            "token": db_tenant_user.auth_token,
+        }
 
 
 @auth_router.post("/login", response_model=UserLoginOut)
@@ -249,8 +260,11 @@ def auth_login(*, public_db: PublicDB, user: UserLoginIn, req: Request):
     if db_public_user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    schema_translate_map = {"tenant": db_public_user.tenant_id}
-    connectable = engine.execution_options(schema_translate_map=schema_translate_map)
+    tenant_id = db_public_user.tenant_id
+    # end the read so the public connection goes back to the pool, session is closed by `get_public_db`
+    public_db.rollback()
+
+    connectable = get_tenant_engine(tenant_id)
     with Session(autocommit=False, autoflush=False, bind=connectable) as db:
         db_user = crud_users.get_user_by_email(db, user.email)
 
@@ -263,33 +277,53 @@ def auth_login(*, public_db: PublicDB, user: UserLoginIn, req: Request):
         if db_user.is_verified is False:
             raise HTTPException(status_code=403, detail="User not verified yet")
 
-        if argon2.verify(user.password, db_user.password) is False:
+        is_password_ok, new_password_hash = verify_password(user.password, db_user.password)
+        if is_password_ok is False:
             raise HTTPException(status_code=401, detail="Incorrect username or password")
 
         token_valid_to = datetime.now(timezone.utc) + timedelta(days=1)
         if user.permanent is True:
             token_valid_to = datetime.now(timezone.utc) + timedelta(days=30)
 
+        # previous token is overwritten, drop it from cache
+        invalidate_user_tokens(tenant_id, db_user.uuid)
+
         update_package = {
             "auth_token": secrets.token_hex(64),  # token,
             "auth_token_valid_to": token_valid_to,
             "updated_at": datetime.now(timezone.utc),
         }
+        if new_password_hash is not None:
+            # argon2 parameters changed since the password was set
+            update_package["password"] = new_password_hash
 
         crud_users.update_user(db, db_user, update_package)
 
         # Load with relations
-        query = select(User).where(User.email == user.email).options(selectinload("*"))
+        query = select(User).where(User.email == user.email).options(*load_profiles.USER_LOGIN)
         db_user = db.execute(query).scalar_one_or_none()
-        db_user.tenant_id = db_public_user.tenant_id
+        db_user.tenant_id = tenant_id
 
         return db_user
 
 
+@auth_router.post("/logout", response_model=StandardResponse)
+def auth_logout(*, db: UserDB, auth_user: CurrentUser):
+    db_user = crud_users.get_user_by_id(db, auth_user.id)
+    if db_user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    crud_users.update_user(
+        db, db_user, {"auth_token": None, "auth_token_valid_to": None, "updated_at": datetime.now(timezone.utc)}
+    )
+    invalidate_user_tokens(get_session_tenant(db), db_user.uuid)
+
+    return {"ok": True}
+
+
 @auth_router.get("/company_summary", response_model=CompanyInfoBasic)
-def get_company_summary(*, public_db: PublicDB, request: Request):
-    print(request.headers.get("tenant"))
-    db_public_company = crud_auth.get_public_company_by_tenant_id(public_db, request.headers.get("tenant"))
+async def get_company_summary(*, public_db: AsyncPublicDB, request: Request):
+    db_public_company = await crud_auth_async.get_public_company_by_tenant_id(public_db, request.headers.get("tenant"))
 
     if db_public_company is None:
         raise HTTPException(status_code=404, detail="Company not found")
@@ -314,7 +348,7 @@ def auth_verify(*, db: UserDB, token: str):
         raise HTTPException(status_code=401, detail="Invalid token")
 
     db_user = db.execute(
-        select(User).where(User.email == user_db.email).options(selectinload("*"))
+        select(User).where(User.email == user_db.email).options(*load_profiles.USER_LOGIN)
     ).scalar_one_or_none()
 
     if db_user is None:
@@ -344,10 +378,14 @@ def auth_remind_password(*, public_db: PublicDB, email: EmailStr, req: Request):
         "updated_at": datetime.now(timezone.utc),
     }
 
-    crud_auth.update_public_user(public_db, db_public_user, update_user)
-
+    # queued first, the update below commits the token and the email together
     email_notification = EmailNotification()
-    email_notification.send_password_reset_request(db_public_user, service_token, ua_browser, ua_os)
+    reset_request = email_notification.get_template_reset_password_request(
+        db_public_user, service_token, ua_browser, ua_os
+    )
+    enqueue_email(public_db, reset_request, f"password_reset:{service_token}")
+
+    crud_auth.update_public_user(public_db, db_public_user, update_user)
 
     return {"ok": True}
 
@@ -364,13 +402,18 @@ def auth_reset_password(*, public_db: PublicDB, token: str, reset_data: ResetPas
     if db_public_user is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    connectable = engine.execution_options(schema_translate_map={"tenant": db_public_user.tenant_id})
+    connectable = get_tenant_engine(db_public_user.tenant_id)
     with Session(autocommit=False, autoflush=False, bind=connectable, future=True) as db:
         db_user = crud_users.get_user_by_uuid(db, db_public_user.uuid)
         if db_user is None:
             raise HTTPException(status_code=404, detail="User not found!")
-        update_package = {"password": argon2.hash(reset_data.password)}
+        update_package = {
+            "password": hash_password(reset_data.password),
+            "auth_token": None,
+            "auth_token_valid_to": None,
+        }
         crud_users.update_user(db, db_user, update_package)
+        invalidate_user_tokens(db_public_user.tenant_id, db_user.uuid)
 
     crud_auth.update_public_user(public_db, db_public_user, {"service_token": None, "service_token_valid_to": None})
 
@@ -379,7 +422,7 @@ def auth_reset_password(*, public_db: PublicDB, token: str, reset_data: ResetPas
 
 @auth_router.post("/qr/{qr_code}", response_model=UserQrToken)
 def auth_verify_qr(*, public_db: PublicDB, qr_code: str):
-    pattern = re.compile(r"^[a-z2-9]{2,6}\+[a-z2-9]{2,3}$")
+    pattern = re.compile(r"^[a-z2-9]{2,16}\+[a-z2-9]{2,8}$")
     if not pattern.match(qr_code):
         raise HTTPException(status_code=404, detail="Incorrect QR code")
 
@@ -394,7 +437,7 @@ def auth_verify_qr(*, public_db: PublicDB, qr_code: str):
 
     base64_token = crud_auth.generate_base64_token(f"{db_company.tenant_id}.{token_valid_to}")
 
-    connectable = engine.execution_options(schema_translate_map={"tenant": db_company.tenant_id})
+    connectable = get_tenant_engine(db_company.tenant_id)
     with Session(autocommit=False, autoflush=False, bind=connectable, future=True) as db:
         db_qr = crud_qr.get_entity_by_qr_code(db, qr_id)
         if not db_qr:
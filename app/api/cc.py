@@ -6,10 +6,21 @@ from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.config import get_settings
-from app.crud import cc_crud, crud_files
-from app.db import engine, get_public_db
+from app.crud import cc_crud, crud_files, crud_statistics
+from app.db import (
+    async_engine,
+    engine,
+    get_public_db,
+    get_tenant_engine,
+    invalidate_tenant,
+    tenant_cache,
+    tenant_engines,
+    with_db,
+)
 from app.schemas.responses import StandardResponse
-from app.service.bearer_auth import is_app_owner
+from app.service.bearer_auth import invalid_token_cache, is_app_owner, token_cache
+from app.service.db_metrics import pool_metrics, query_cache_metrics
+from app.service.issue_symbol import discard_reserved_numbers
 from app.service.scheduler import scheduler
 from app.service.tenants import alembic_upgrade_head
 
@@ -42,7 +53,7 @@ def cc_mark_orphan_files(*, public_db: PublicDB, auth=Depends(is_app_owner)):
 
     processed = []
     for company in db_companies:
-        connectable = engine.execution_options(schema_translate_map={"tenant": company.tenant_id})
+        connectable = get_tenant_engine(company.tenant_id)
         with Session(autocommit=False, autoflush=False, bind=connectable, future=True) as db:
             orphaned_files_uuid = crud_files.get_orphaned_files(db)
             processed.append({company.tenant_id: orphaned_files_uuid})
@@ -53,6 +64,34 @@ def cc_mark_orphan_files(*, public_db: PublicDB, auth=Depends(is_app_owner)):
     return processed
 
 
+@cc_router.post("/rebuild_issues_stats", name="statistics:Rebuild")
+def cc_rebuild_issues_stats(*, public_db: PublicDB, tenant_id: str | None = None, auth=Depends(is_app_owner)):
+    """Recount issues statistics rollup from `issues`, for one tenant or all of them"""
+    if tenant_id is not None:
+        tenants = [tenant_id]
+    else:
+        tenants = [company.tenant_id for company in cc_crud.get_public_companies(public_db)]
+
+    processed = []
+    for tenant in tenants:
+        with with_db(tenant) as db:
+            processed.append({tenant: crud_statistics.rebuild_issues_rollup(db)})
+
+    return processed
+
+
+@cc_router.get("/metrics", name="metrics:Pool")
+def cc_metrics(*, auth=Depends(is_app_owner)):
+    return {
+        "db_pool": pool_metrics.snapshot(engine.pool, async_engine.sync_engine.pool),
+        "query_cache": query_cache_metrics.snapshot(engine, async_engine.sync_engine),
+        "tenant_engines": tenant_engines.stats(),
+        "tenant_cache": tenant_cache.stats(),
+        "token_cache": token_cache.stats(),
+        "invalid_token_cache": invalid_token_cache.stats(),
+    }
+
+
 @cc_router.get("/", name="companies:List")
 def cc_get_all(*, public_db: PublicDB, auth=Depends(is_app_owner)):
     db_companies = cc_crud.get_public_companies(public_db)
@@ -94,6 +133,8 @@ def cc_delete_one(*, public_db: PublicDB, tenant_id: str, auth=Depends(is_app_ow
     except Exception:
         traceback.print_exc()
         trans.rollback()
+    invalidate_tenant(tenant_id)
+    discard_reserved_numbers(tenant_id)
     print("Bye! 🫡")
 
     return {"ok": True}
@@ -1,29 +1,40 @@
-import io
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Annotated
 from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, Form, HTTPException, Request, UploadFile
+from botocore.exceptions import ClientError
+from fastapi import APIRouter, Depends, Form, Header, HTTPException, Request, Response, UploadFile
 from sentry_sdk import capture_exception
 from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
 from starlette.responses import StreamingResponse
 
 from app.config import get_settings
 from app.crud import crud_files
 from app.db import get_db
-from app.models.models import User
-from app.schemas.responses import FileResponse, StandardResponse
-from app.service.bearer_auth import has_token
+from app.schemas.requests import FileUploadCompleteIn, FileUploadIn
+from app.schemas.responses import FileResponse, FileUploadResponse, StandardResponse
+from app.service.bearer_auth import Principal, has_token
 
 # from app.models.models import FileResponse, Files, FileUrlResponse, StandardResponse
-from app.storage.aws_s3 import generate_presigned_url, s3_resource
+from app.storage.aws_s3 import (
+    abort_upload,
+    complete_upload,
+    create_upload,
+    delete_object,
+    generate_presigned_url,
+    get_object,
+    head_object,
+    invalidate_presigned_url,
+    s3_resource,
+)
 
 settings = get_settings()
 
 file_router = APIRouter()
 
-CurrentUser = Annotated[User, Depends(has_token)]
+CurrentUser = Annotated[Principal, Depends(has_token)]
 UserDB = Annotated[Session, Depends(get_db)]
 # UserDB = Annotated[Session, Depends(get_db)]
 
@@ -69,7 +80,7 @@ def file_add(
         raise HTTPException(status_code=400, detail="No file sent")
 
     quota = crud_files.get_files_size_in_db(db)
-    if quota > 50000000:  # ~5MB
+    if quota > settings.FILES_QUOTA:  # ~50MB
         raise HTTPException(status_code=413, detail="Quota exceeded")
 
     if not uuid:
@@ -106,6 +117,77 @@ def file_add(
     return new_file
 
 
+@file_router.post("/uploads", response_model=FileUploadResponse)
+def file_upload_start(*, db: UserDB, request: Request, upload: FileUploadIn, auth_user: CurrentUser):
+    if crud_files.get_files_size_in_db(db) + upload.size > settings.FILES_QUOTA:
+        raise HTTPException(status_code=413, detail="Quota exceeded")
+
+    file_uuid = uuid4()
+    try:
+        s3_upload = create_upload(
+            str(request.headers.get("tenant", "None")), f"{file_uuid}_{upload.file_name}", upload.size, upload.mimetype
+        )
+    except ClientError as e:
+        capture_exception(e)
+        raise HTTPException(status_code=502, detail="Upload not available") from e
+
+    return {"uuid": file_uuid, **s3_upload}
+
+
+@file_router.post("/uploads/{file_uuid}/complete", response_model=FileResponse)
+def file_upload_complete(
+    *, db: UserDB, request: Request, file_uuid: UUID, upload: FileUploadCompleteIn, auth_user: CurrentUser
+):
+    if crud_files.get_file_by_uuid(db, file_uuid):
+        raise HTTPException(status_code=400, detail="File already exists")
+
+    tenant = str(request.headers.get("tenant", "None"))
+    file = f"{file_uuid}_{upload.file_name}"
+
+    try:
+        if upload.upload_id is not None:
+            complete_upload(tenant, file, upload.upload_id, [part.model_dump() for part in upload.parts or []])
+        s3_object = head_object(tenant, file)
+    except ClientError as e:
+        raise HTTPException(status_code=400, detail="Upload not completed") from e
+
+    size = s3_object["ContentLength"]
+    etag = s3_object["ETag"].strip('"')
+    if size != upload.size or (upload.upload_id is not None and not etag.endswith(f"-{len(upload.parts or [])}")):
+        delete_object(tenant, file)
+        raise HTTPException(status_code=400, detail="Uploaded file does not match")
+
+    if crud_files.get_files_size_in_db(db) + size > settings.FILES_QUOTA:
+        delete_object(tenant, file)
+        raise HTTPException(status_code=413, detail="Quota exceeded")
+
+    file_data = {
+        "uuid": file_uuid,
+        "owner_id": auth_user.id,
+        "file_name": upload.file_name,
+        "file_description": None,
+        "extension": Path(upload.file_name).suffix,
+        "mimetype": upload.mimetype,
+        "size": size,
+        "created_at": datetime.now(timezone.utc),
+    }
+
+    new_file = crud_files.create_file(db, file_data)
+    new_file.url = generate_presigned_url(tenant, file)
+
+    return new_file
+
+
+@file_router.delete("/uploads/{file_uuid}", response_model=StandardResponse)
+def file_upload_abort(*, request: Request, file_uuid: UUID, file_name: str, upload_id: str, auth_user: CurrentUser):
+    try:
+        abort_upload(str(request.headers.get("tenant", "None")), f"{file_uuid}_{file_name}", upload_id)
+    except ClientError as e:
+        raise HTTPException(status_code=404, detail="Upload not found") from e
+
+    return {"ok": True}
+
+
 @file_router.delete("/{file_uuid}", response_model=StandardResponse)
 def remove_bucket(*, db: UserDB, request: Request, file_uuid: UUID, auth_user: CurrentUser):
     db_file = crud_files.get_file_by_uuid(db, file_uuid)
@@ -121,6 +203,8 @@ def remove_bucket(*, db: UserDB, request: Request, file_uuid: UUID, auth_user: C
         capture_exception(e)
         print(e)
 
+    invalidate_presigned_url(str(request.headers.get("tenant", "None")), f"{file_uuid}_{db_file.file_name}")
+
     db.delete(db_file)
     db.commit()
 
@@ -128,26 +212,53 @@ def remove_bucket(*, db: UserDB, request: Request, file_uuid: UUID, auth_user: C
 
 
 @file_router.get("/download/{file_uuid}", name="file:Download")
-def file_download(*, db: UserDB, request: Request, file_uuid: UUID):
+def file_download(
+    *,
+    db: UserDB,
+    request: Request,
+    file_uuid: UUID,
+    range: Annotated[str | None, Header()] = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+):
     db_file = crud_files.get_file_by_uuid(db, file_uuid)
 
     if not db_file:
         raise HTTPException(status_code=404, detail="File not found")
 
     try:
-        s3_folder_path = "".join([str(request.headers.get("tenant")), "/", str(file_uuid), "_", db_file.file_name])
-        print(s3_folder_path)
-
-        f = io.BytesIO()
-        s3_resource.Bucket(settings.s3_bucket_name).download_fileobj(s3_folder_path, f)
-
-        f.seek(0)
-        header = {"Content-Disposition": f'inline; filename="{db_file.file_name}"'}
-    except Exception as e:
-        print(e)
-        raise HTTPException(status_code=404, detail="File not found")
+        s3_object = get_object(
+            str(request.headers.get("tenant")), f"{file_uuid}_{db_file.file_name}", range, if_none_match
+        )
+    except ClientError as e:
+        metadata = e.response.get("ResponseMetadata", {})
+        match metadata.get("HTTPStatusCode"):
+            case 304:
+                etag = metadata.get("HTTPHeaders", {}).get("etag", if_none_match)
+                return Response(status_code=304, headers={"ETag": etag})
+            case 416:
+                raise HTTPException(status_code=416, detail="Requested range not satisfiable") from e
+        capture_exception(e)
+        raise HTTPException(status_code=404, detail="File not found") from e
 
-    return StreamingResponse(f, media_type=db_file.mimetype, headers=header)
+    headers = {
+        "Content-Disposition": f'inline; filename="{db_file.file_name}"',
+        "Content-Length": str(s3_object["ContentLength"]),
+        "Accept-Ranges": "bytes",
+        "ETag": s3_object["ETag"],
+    }
+    status_code = 200
+    if "ContentRange" in s3_object:
+        headers["Content-Range"] = s3_object["ContentRange"]
+        status_code = 206
+
+    body = s3_object["Body"]
+    return StreamingResponse(
+        body.iter_chunks(settings.S3_DOWNLOAD_CHUNK_SIZE),
+        status_code=status_code,
+        media_type=db_file.mimetype,
+        headers=headers,
+        background=BackgroundTask(body.close),
+    )
 
 
 @file_router.get("/download/", name="file:Download")
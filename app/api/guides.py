@@ -9,35 +9,39 @@ from fastapi_pagination.ext.sqlalchemy import paginate
 from sentry_sdk import capture_exception
 from sqlalchemy.orm import Session
 
-from app.crud import crud_files, crud_guides, crud_items, crud_qr
+from app.crud import crud_files, crud_guides, crud_items, crud_qr, load_profiles
 from app.crud.crud_auth import get_public_company_from_tenant
 from app.db import get_db
-from app.models.models import User
+from app.models.models import Guide
 from app.schemas.requests import GuideAddIn, GuideEditIn
-from app.schemas.responses import GuideIndexResponse, GuideResponse, StandardResponse
-from app.service.bearer_auth import has_token
+from app.schemas.responses import CursorPage, GuideIndexResponse, GuideResponse, StandardResponse
+from app.service.bearer_auth import Principal, has_token
+from app.service.pagination import CursorParams, paginate_cursor
+from app.service.qr_pool import claim_item_qr_id
 
 # from app.schemas.schemas import GuideIndexResponse
-from app.storage.aws_s3 import generate_presigned_url
+from app.storage.aws_s3 import set_presigned_urls
 
 guide_router = APIRouter()
 
-CurrentUser = Annotated[User, Depends(has_token)]
+CurrentUser = Annotated[Principal, Depends(has_token)]
 UserDB = Annotated[Session, Depends(get_db)]
 
 
-@guide_router.get("/", response_model=Page[GuideResponse])  #
+@guide_router.get("/", response_model=Page[GuideResponse] | CursorPage[GuideResponse])  #
 def guide_get_all(
     *,
     db: UserDB,
     params: Annotated[Params, Depends()],
+    cursor_params: Annotated[CursorParams, Depends()],
     auth_user: CurrentUser,
     search: str = None,
     item_uuid: UUID | None = None,
     order: str = "asc",
-    field: str = "name",
+    field: str | None = None,
 ):
-    if field not in ["name"]:
+    # no field: search results are ranked, otherwise listed by `name`
+    if field is not None and field not in ["name"]:
         field = "name"
 
     item_id = None
@@ -47,26 +51,28 @@ def guide_get_all(
             raise HTTPException(status_code=401, detail="Item not found")
         item_id = db_item.id
 
-    db_guides_query = crud_guides.get_guides(search, item_id, field, order)
+    db_guides_query = crud_guides.get_guides(search, item_id, field, order, auth_user.lang).options(
+        *load_profiles.GUIDE_INDEX
+    )
 
     # result = db.execute(db_guides_query)  # await db.execute(query)
     # db_guides = result.scalars().all()
 
-    return paginate(db, db_guides_query)
+    if cursor_params.pagination == "cursor":
+        sort_column = getattr(Guide, field or "name")
+        return paginate_cursor(db, db_guides_query, sort_column, Guide.id, order, params.size, cursor_params)
+    return paginate(db, db_guides_query, params)
 
 
 @guide_router.get("/{guide_uuid}", response_model=GuideIndexResponse)  # , response_model=Page[UserIndexResponse]
 def guide_get_one(*, db: UserDB, guide_uuid: UUID, request: Request, auth_user: CurrentUser):
-    db_guide = crud_guides.get_guide_by_uuid(db, guide_uuid)
+    db_guide = crud_guides.get_guide_by_uuid(db, guide_uuid, load_profiles.GUIDE_RESPONSE)
 
     if not db_guide:
         raise HTTPException(status_code=400, detail="Guide not found!")
 
     try:
-        for picture in db_guide.files_guide:
-            picture.url = generate_presigned_url(
-                request.headers.get("tenant", "public"), "_".join([str(picture.uuid), picture.file_name])
-            )
+        set_presigned_urls(request.headers.get("tenant", "public"), db_guide.files_guide)
     except Exception as e:
         capture_exception(e)
 
@@ -88,12 +94,7 @@ def guide_add(*, db: UserDB, request: Request, guide: GuideAddIn, auth_user: Cur
             raise HTTPException(status_code=400, detail="Related Item not found!")
         related_item = [db_item]
 
-    files = []
-    if guide.files is not None:
-        for file in guide.files:
-            db_file = crud_files.get_file_by_uuid(db, file)
-            if db_file:
-                files.append(db_file)
+    files = crud_files.get_files_by_uuids(db, guide.files).found
 
     description = BeautifulSoup(guide.text_html, "html.parser").get_text()
 
@@ -108,7 +109,7 @@ def guide_add(*, db: UserDB, request: Request, guide: GuideAddIn, auth_user: Cur
 
     guide_uuid = str(uuid4())
 
-    qr_code_id = crud_qr.generate_item_qr_id(db)
+    qr_code_id = claim_item_qr_id(db)
     qr_code_company = crud_qr.add_noise_to_qr(company.qr_id)
 
     qr_code_data = {
@@ -156,10 +157,7 @@ def guide_edit(*, db: UserDB, guide_uuid: UUID, guide: GuideEditIn, auth_user: C
     if ("files" in guide_data) and (guide_data["files"] is not None):
         for file in db_guide.files_guide:
             db_guide.files_guide.remove(file)
-        for file in guide_data["files"]:
-            db_file = crud_files.get_file_by_uuid(db, file)
-            if db_file:
-                files.append(db_file)
+        files = crud_files.get_files_by_uuids(db, guide_data["files"]).found
 
         guide_data["files_guide"] = files
         del guide_data["files"]
@@ -1,5 +1,3 @@
-import csv
-import io
 from collections import Counter
 from datetime import datetime, timezone
 from typing import Annotated
@@ -11,31 +9,50 @@ from fastapi_pagination import Page, Params
 from fastapi_pagination.ext.sqlalchemy import paginate
 from sentry_sdk import capture_exception
 from sqlalchemy.orm import Session
-from starlette.responses import StreamingResponse
 
-from app.crud import crud_events, crud_files, crud_issues, crud_items, crud_settings, crud_tags, crud_users
+from app.crud import (
+    crud_events,
+    crud_files,
+    crud_issues,
+    crud_items,
+    crud_settings,
+    crud_statistics,
+    crud_tags,
+    crud_users,
+    load_profiles,
+)
 from app.crud.crud_auth import get_public_company_from_tenant
-from app.db import get_db
-from app.models.models import User
+from app.db import get_db, get_session_tenant
+from app.models.models import Issue
 from app.schemas.requests import IssueAddIn, IssueChangeStatus, IssueEditIn
-from app.schemas.responses import EventTimelineResponse, IssueIndexResponse, IssueResponse, StandardResponse
+from app.schemas.responses import (
+    CursorPage,
+    EventTimelineResponse,
+    IssueIndexResponse,
+    IssueResponse,
+    StandardResponse,
+)
 from app.service import event
-from app.service.bearer_auth import has_token
+from app.service.bearer_auth import Principal, has_token
+from app.service.export import ExportFormat, export_response
 from app.service.helpers import is_valid_uuid
+from app.service.issue_symbol import next_issue_symbol
 from app.service.notifications import notify_users
-from app.storage.aws_s3 import generate_presigned_url
+from app.service.pagination import CursorParams, paginate_cursor
+from app.storage.aws_s3 import set_presigned_urls
 
 issue_router = APIRouter()
 
-CurrentUser = Annotated[User, Depends(has_token)]
+CurrentUser = Annotated[Principal, Depends(has_token)]
 UserDB = Annotated[Session, Depends(get_db)]
 
 
-@issue_router.get("/", response_model=Page[IssueIndexResponse])
+@issue_router.get("/", response_model=Page[IssueIndexResponse] | CursorPage[IssueIndexResponse])
 def issue_get_all(
     *,
     db: UserDB,
     params: Annotated[Params, Depends()],
+    cursor_params: Annotated[CursorParams, Depends()],
     auth_user: CurrentUser,
     search: str | None = None,
     status: str = "active",
@@ -44,10 +61,11 @@ def issue_get_all(
     dateFrom: datetime | None = None,
     dateTo: datetime | None = None,
     tag: Annotated[list[UUID] | None, Query()] = None,
-    field: str = "created_at",
+    field: str | None = None,
     order: str = "asc",
 ):
-    if field not in ["created_at", "name", "priority", "status"]:
+    # no field: search results are ranked, otherwise listed by `created_at`
+    if field is not None and field not in ["created_at", "name", "priority", "status"]:
         field = "created_at"
 
     tag_ids = None
@@ -61,27 +79,33 @@ def issue_get_all(
             raise HTTPException(status_code=401, detail="User not found")
         user_id = db_user.id
 
-    db_issues_query = crud_issues.get_issues(field, order, search, status, user_id, priority, dateFrom, dateTo, tag_ids)
-    return paginate(db, db_issues_query)
+    db_issues_query = crud_issues.get_issues(
+        field, order, search, status, user_id, priority, dateFrom, dateTo, tag_ids, auth_user.lang
+    ).options(*load_profiles.ISSUE_INDEX)
+    if cursor_params.pagination == "cursor":
+        sort_column = getattr(Issue, field or "created_at")
+        return paginate_cursor(db, db_issues_query, sort_column, Issue.id, order, params.size, cursor_params)
+    return paginate(db, db_issues_query, params)
 
 
 @issue_router.get("/export")
-def get_export_issues(*, db: UserDB, auth_user: CurrentUser):
+def get_export_issues(
+    *,
+    db: UserDB,
+    auth_user: CurrentUser,
+    export_format: Annotated[ExportFormat, Query(alias="format")] = "csv",
+    compress: bool = False,
+):
     db_issues_query = crud_issues.get_issues("name", "asc", None, "all", None, None, None, None, None)
-    result = db.execute(db_issues_query)  # await db.execute(query)
-
-    db_issues = result.scalars().all()
-    f = io.StringIO()
-    csv_file = csv.writer(f, delimiter=";")
-    csv_file.writerow(["Symbol", "Name", "Description", "Author", "Status", "Created at"])
-    for u in db_issues:
-        csv_file.writerow([u.symbol, u.name, u.text, u.author_name, u.status, u.created_at])
-
-    f.seek(0)
-    response = StreamingResponse(f, media_type="text/csv")
-    filename = f"issues_{datetime.today().strftime('%Y-%m-%d')}.csv"
-    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
-    return response
+    columns = {
+        "Symbol": Issue.symbol,
+        "Name": Issue.name,
+        "Description": Issue.text,
+        "Author": Issue.author_name,
+        "Status": Issue.status,
+        "Created at": Issue.created_at,
+    }
+    return export_response(get_session_tenant(db), db_issues_query, columns, "issues", export_format, compress)
 
 
 @issue_router.get("/timeline/{issue_uuid}", response_model=list[EventTimelineResponse])
@@ -113,9 +137,10 @@ def item_get_issue_summary(*, db: UserDB, issue_uuid: UUID, auth_user: CurrentUs
     events_users_info_keys = ("user_uuid", "duration", "counter")
     events_users_info_dict = [dict(zip(events_users_info_keys, values, strict=False)) for values in events_users_info]
 
+    db_users = crud_users.get_users_by_uuids(db, [user["user_uuid"] for user in events_users_info_dict]).found
+    users_names = {str(user.uuid): user.first_name + " " + user.last_name for user in db_users}
     for user in events_users_info_dict:
-        user_details = crud_users.get_user_by_uuid(db, user["user_uuid"])
-        user["name"] = user_details.first_name + " " + user_details.last_name
+        user["name"] = users_names.get(str(user["user_uuid"]))
         del user["user_uuid"]
         # events_users_info_dict
 
@@ -126,16 +151,13 @@ def item_get_issue_summary(*, db: UserDB, issue_uuid: UUID, auth_user: CurrentUs
 
 @issue_router.get("/{issue_uuid}", response_model=IssueResponse)  # , response_model=Page[UserIndexResponse]
 def issue_get_one(*, db: UserDB, issue_uuid: UUID, request: Request, auth_user: CurrentUser):
-    db_issue = crud_issues.get_issue_by_uuid(db, issue_uuid)
+    db_issue = crud_issues.get_issue_by_uuid(db, issue_uuid, load_profiles.ISSUE_RESPONSE)
 
     if not db_issue:
         raise HTTPException(status_code=400, detail="Issue not found!")
 
     try:
-        for picture in db_issue.files_issue:
-            picture.url = generate_presigned_url(
-                request.headers.get("tenant", "public"), "_".join([str(picture.uuid), picture.file_name])
-            )
+        set_presigned_urls(request.headers.get("tenant", "public"), db_issue.files_issue)
     except Exception as e:
         capture_exception(e)
 
@@ -150,19 +172,8 @@ def issue_add(*, db: UserDB, request: Request, issue: IssueAddIn, auth_user: Cur
 
     get_public_company_from_tenant(tenant_id)
 
-    files = []
-    if issue.files is not None:
-        for file in issue.files:
-            db_file = crud_files.get_file_by_uuid(db, file)
-            if db_file:
-                files.append(db_file)
-
-    tags = []
-    if issue.tags is not None:
-        for tag in issue.tags:
-            db_tag = crud_tags.get_tag_by_uuid(db, tag)
-            if db_tag:
-                tags.append(db_tag)
+    files = crud_files.get_files_by_uuids(db, issue.files).found
+    tags = crud_tags.get_tags_by_uuids(db, issue.tags).found
 
     issue_uuid = str(uuid4())
 
@@ -177,17 +188,12 @@ def issue_add(*, db: UserDB, request: Request, issue: IssueAddIn, auth_user: Cur
     if issue.text_html is not None:
         description = BeautifulSoup(issue.text_html, "html.parser").get_text()  # TODO add fix when empty
 
-    last_issue_id = crud_issues.get_last_issue_id(db)
-    if not last_issue_id:
-        last_issue_id = 0
-    last_issue_id += 1
-
     issue_data = {
         "uuid": issue_uuid,
         "author_id": db_user.id,
         "author_name": f"{db_user.first_name} {db_user.last_name}",
         "item_id": item_id,
-        "symbol": f"PR-{last_issue_id}",
+        "symbol": next_issue_symbol(db),
         "name": issue.name,
         "summary": issue.summary,
         "text": description,
@@ -200,17 +206,21 @@ def issue_add(*, db: UserDB, request: Request, issue: IssueAddIn, auth_user: Cur
         "created_at": datetime.now(timezone.utc),
     }
 
-    new_issue = crud_issues.create_issue(db, issue_data)
-
-    # Notification
+    # Notification, queued in the outbox and committed together with the issue
     email_users_list = crud_settings.get_users_list_for_email_notification(db, "all")  # empty: []
     sms_users_list = []
     if email_users_list or sms_users_list:
-        notify_users(sms_users_list, email_users_list, new_issue)
+        notify_users(
+            db, sms_users_list, email_users_list, issue.name, description, issue_uuid, f"issue_add:{issue_uuid}"
+        )
 
-    event.create_new_basic_event(db, db_user, new_issue, "issue_add")
-    event.open_new_basic_summary(db, "issue", new_issue.uuid, "issueTotalTime")
-    event.open_new_basic_summary(db, "issue", new_issue.uuid, "issueResponseTime")
+    new_issue = crud_issues.create_issue(db, issue_data)
+
+    uow = event.EventUnitOfWork(db, db_user)
+    uow.add_event(new_issue, "issue_add")
+    uow.open_summary("issue", new_issue.uuid, "issueTotalTime")
+    uow.open_summary("issue", new_issue.uuid, "issueResponseTime")
+    uow.commit()
 
     return new_issue
 
@@ -230,6 +240,7 @@ def issue_change_status(*, db: UserDB, issue_uuid: UUID, issue: IssueChangeStatu
     actions_counter = Counter(actions_list)
     internal_value = issue.internal_value
     status = None
+    uow = event.EventUnitOfWork(db, db_user)
 
     match issue.status:
         # case "issue_add":
@@ -241,28 +252,28 @@ def issue_change_status(*, db: UserDB, issue_uuid: UUID, issue: IssueChangeStatu
         #     event.open_new_basic_summary(db, "issue", db_issue.uuid, "issueResponseTime")
 
         case "issue_accept":
-            status = issue_status_accept(actions_list, db, db_issue, db_user, status)
+            status = issue_status_accept(actions_list, uow, db_issue, status)
 
         case "issue_reject":
-            status = issue_status_reject(actions_list, db, db_issue, db_user, status)
+            status = issue_status_reject(actions_list, uow, db_issue, status)
 
         case "issue_add_person":
-            status = issue_status_add_person(db, db_issue, db_user, internal_value, status)
+            status = issue_status_add_person(db, uow, db_issue, internal_value, status)
 
         case "issue_remove_person":
-            issue_status_remove_person(actions_list, db, db_issue, db_user, internal_value)
+            issue_status_remove_person(actions_list, uow, db_issue, internal_value)
 
         case "issue_start_progress":
-            status = issue_status_start_progress(db, db_issue, db_user, status)
+            status = issue_status_start_progress(uow, db_issue, status)
 
         case "issue_pause":
-            status = issue_status_pause(actions_counter, actions_list, db, db_issue, db_user, issue, status)
+            status = issue_status_pause(actions_counter, actions_list, uow, db_issue, issue, status)
 
         case "issue_resume":
-            status = issue_status_resume(db, db_issue, db_user, status)
+            status = issue_status_resume(uow, db_issue, status)
 
         case "issue_done":
-            status = issue_status_done(actions_list, db, db_issue, db_user, issue, status)
+            status = issue_status_done(actions_list, uow, db_issue, issue, status)
 
         case "issue_approve":
             if "issue_done" not in actions_list:
@@ -272,64 +283,66 @@ def issue_change_status(*, db: UserDB, issue_uuid: UUID, issue: IssueChangeStatu
             if "issue_done" not in actions_list:
                 raise HTTPException(status_code=400, detail="Issue not finished")
 
+    # events, summaries and the new status are committed together
+    uow.flush()
     if status in ["accepted", "rejected", "in_progress", "paused", "done"]:
         issue_update = {"status": status, "updated_at": datetime.now(timezone.utc)}
         crud_issues.update_issue(db, db_issue, issue_update)
+    else:
+        db.commit()
 
     return {"ok": True}
 
 
-def issue_status_done(actions_list, db, db_issue, db_user, issue, status):
+def issue_status_done(actions_list, uow, db_issue, issue, status):
     if "issue_done" in actions_list:
         raise HTTPException(status_code=400, detail="Task already finished!")
-    event.create_new_basic_event(db, db_user, db_issue, "issue_done", description=issue.description)
-    event.close_new_basic_summary(db, "issue", db_issue.uuid, "issueRepairPauseTime")
-    event.close_new_basic_summary(db, "issue", db_issue.uuid, "issueRepairTime")
-    event.close_new_basic_summary(db, "issue", db_issue.uuid, "issueTotalTime")
-    users_uuids = crud_events.get_basic_summary_users_uuids(db, "issue", db_issue.uuid, "issueUserActivity")
-    for user_uuid in users_uuids:
-        event.close_new_basic_summary(db, "issue", db_issue.uuid, "issueUserActivity", user_uuid)
+    uow.add_event(db_issue, "issue_done", description=issue.description)
+    uow.close_summary("issue", db_issue.uuid, "issueRepairPauseTime")
+    uow.close_summary("issue", db_issue.uuid, "issueRepairTime")
+    uow.close_summary("issue", db_issue.uuid, "issueTotalTime")
+    uow.close_summary("issue", db_issue.uuid, "issueUserActivity")  # every assigned user
     status = "done"
     return status
 
 
-def issue_status_resume(db, db_issue, db_user, status):
-    event.create_new_basic_event(db, db_user, db_issue, "issue_resume")
-    event.open_new_basic_summary(db, "issue", db_issue.uuid, "issueRepairTime")
-    event.close_new_basic_summary(db, "issue", db_issue.uuid, "issueRepairPauseTime")
+def issue_status_resume(uow, db_issue, status):
+    uow.add_event(db_issue, "issue_resume")
+    uow.open_summary("issue", db_issue.uuid, "issueRepairTime")
+    uow.close_summary("issue", db_issue.uuid, "issueRepairPauseTime")
     status = "in_progress"
     return status
 
 
-def issue_status_pause(actions_counter, actions_list, db, db_issue, db_user, issue, status):
+def issue_status_pause(actions_counter, actions_list, uow, db_issue, issue, status):
     if ("issue_start_progress" not in actions_list) and ((actions_counter.get("issue_start_progress") % 2) != 0):
         raise HTTPException(status_code=400, detail="No started task!")
-    event.create_new_basic_event(db, db_user, db_issue, "issue_pause", description=issue.description)
-    event.open_new_basic_summary(db, "issue", db_issue.uuid, "issueRepairPauseTime")
-    event.close_new_basic_summary(db, "issue", db_issue.uuid, "issueRepairTime")
+    uow.add_event(db_issue, "issue_pause", description=issue.description)
+    uow.open_summary("issue", db_issue.uuid, "issueRepairPauseTime")
+    uow.close_summary("issue", db_issue.uuid, "issueRepairTime")
     status = "paused"
     return status
 
 
-def issue_status_start_progress(db, db_issue, db_user, status):
-    event.create_new_basic_event(db, db_user, db_issue, "issue_start_progress")
-    event.open_new_basic_summary(db, "issue", db_issue.uuid, "issueRepairTime")
-    event.close_new_basic_summary(db, "issue", db_issue.uuid, "acceptToStartTime")
-    event.close_new_basic_summary(db, "issue", db_issue.uuid, "issueRepairPauseTime")
+def issue_status_start_progress(uow, db_issue, status):
+    uow.add_event(db_issue, "issue_start_progress")
+    uow.open_summary("issue", db_issue.uuid, "issueRepairTime")
+    uow.close_summary("issue", db_issue.uuid, "acceptToStartTime")
+    uow.close_summary("issue", db_issue.uuid, "issueRepairPauseTime")
     status = "in_progress"
     return status
 
 
-def issue_status_remove_person(actions_list, db, db_issue, db_user, internal_value):
+def issue_status_remove_person(actions_list, uow, db_issue, internal_value):
     if "issue_add_person" not in actions_list:
         raise HTTPException(status_code=400, detail="No user to remove!")
-    event.create_new_basic_event(db, db_user, db_issue, "issue_remove_person", internal_value=internal_value)
-    event.close_new_basic_summary(db, "issue", db_issue.uuid, "issueUserActivity", internal_value)
+    uow.add_event(db_issue, "issue_remove_person", internal_value=internal_value)
+    uow.close_summary("issue", db_issue.uuid, "issueUserActivity", internal_value)
 
 
-def issue_status_add_person(db, db_issue, db_user, internal_value, status):
-    event.create_new_basic_event(db, db_user, db_issue, "issue_add_person", internal_value=internal_value)
-    event.open_new_basic_summary(db, "issue", db_issue.uuid, "issueUserActivity", internal_value=internal_value)
+def issue_status_add_person(db, uow, db_issue, internal_value, status):
+    uow.add_event(db_issue, "issue_add_person", internal_value=internal_value)
+    uow.open_summary("issue", db_issue.uuid, "issueUserActivity", internal_value=internal_value)
     # TODO: now only frontend is checking if users is not added twice in row, add backend validation
     status = "assigned"
     user_db_id = None
@@ -337,32 +350,32 @@ def issue_status_add_person(db, db_issue, db_user, internal_value, status):
     email_users = []
     if internal_value:
         user_db_id = crud_users.get_user_by_uuid(db, is_valid_uuid(internal_value))
+    dedup_key = None
     if user_db_id:
         email_users = crud_settings.get_users_list_for_email_notification(db, "assigned_to_me", user_db_id.id)
-    notify_users(sms_notifications, email_users, db_issue)
+        dedup_key = f"issue_add_person:{db_issue.uuid}:{user_db_id.uuid}"
+    notify_users(db, sms_notifications, email_users, db_issue.name, db_issue.text, db_issue.uuid, dedup_key)
     return status
 
 
-def issue_status_reject(actions_list, db, db_issue, db_user, status):
+def issue_status_reject(actions_list, uow, db_issue, status):
     if ("issue_reject" in actions_list) or ("issue_accept" in actions_list):
         raise HTTPException(status_code=400, detail="Action Exists!")
-    event.create_new_basic_event(db, db_user, db_issue, "issue_reject")
-    event.close_new_basic_summary(db, "issue", db_issue.uuid, "issueResponseTime")
-    event.close_new_basic_summary(db, "issue", db_issue.uuid, "issueTotalTime")
-    users_uuids = crud_events.get_basic_summary_users_uuids(db, "issue", db_issue.uuid, "issueUserActivity")
-    for user_uuid in users_uuids:
-        event.close_new_basic_summary(db, "issue", db_issue.uuid, "issueUserActivity", user_uuid)
+    uow.add_event(db_issue, "issue_reject")
+    uow.close_summary("issue", db_issue.uuid, "issueResponseTime")
+    uow.close_summary("issue", db_issue.uuid, "issueTotalTime")
+    uow.close_summary("issue", db_issue.uuid, "issueUserActivity")  # every assigned user
     status = "rejected"
     return status
 
 
-def issue_status_accept(actions_list, db, db_issue, db_user, status):
+def issue_status_accept(actions_list, uow, db_issue, status):
     if "issue_accept" in actions_list:
         raise HTTPException(status_code=400, detail="Action Exists!")
-    event.create_new_basic_event(db, db_user, db_issue, "issue_accept")
-    event.close_new_basic_summary(db, "issue", db_issue.uuid, "issueResponseTime")
-    event.open_new_basic_summary(db, "issue", db_issue.uuid, "acceptToStartTime")
-    # event.close_new_basic_summary(db, "issue", db_issue.uuid, "issueTotalTime")
+    uow.add_event(db_issue, "issue_accept")
+    uow.close_summary("issue", db_issue.uuid, "issueResponseTime")
+    uow.open_summary("issue", db_issue.uuid, "acceptToStartTime")
+    # uow.close_summary("issue", db_issue.uuid, "issueTotalTime")
     status = "accepted"
     return status
 
@@ -379,10 +392,7 @@ def issue_edit(*, db: UserDB, issue_uuid: UUID, issue: IssueEditIn, auth_user: C
     if ("files" in issue_data) and (issue_data["files"] is not None):
         for file in db_issue.files_issue:
             db_issue.files_issue.remove(file)
-        for file in issue_data["files"]:
-            db_file = crud_files.get_file_by_uuid(db, file)
-            if db_file:
-                files.append(db_file)
+        files = crud_files.get_files_by_uuids(db, issue_data["files"]).found
 
         issue_data["files_issue"] = files
         del issue_data["files"]
@@ -391,10 +401,7 @@ def issue_edit(*, db: UserDB, issue_uuid: UUID, issue: IssueEditIn, auth_user: C
     if ("tags" in issue_data) and (issue_data["tags"] is not None):
         for tag in db_issue.tags_issue:
             db_issue.tags_issue.remove(tag)
-        for tag in issue_data["tags"]:
-            db_tag = crud_tags.get_tag_by_uuid(db, tag)
-            if db_tag:
-                tags.append(db_tag)
+        tags = crud_tags.get_tags_by_uuids(db, issue_data["tags"]).found
 
         issue_data["tags_issue"] = tags
         del issue_data["tags"]
@@ -403,10 +410,7 @@ def issue_edit(*, db: UserDB, issue_uuid: UUID, issue: IssueEditIn, auth_user: C
     if ("users" in issue_data) and (issue_data["users"] is not None):
         for user in db_issue.users_issue:
             db_issue.users_issue.remove(user)
-        for user in issue_data["users"]:
-            db_user = crud_users.get_user_by_uuid(db, user)
-            if db_user:
-                users.append(db_user)
+        users = crud_users.get_users_by_uuids(db, issue_data["users"]).found
 
         issue_data["users_issue"] = users
         del issue_data["users"]
@@ -433,6 +437,7 @@ def issue_delete(*, db: UserDB, issue_uuid: UUID, auth_user: CurrentUser):
         db_file = crud_files.get_file_by_uuid(db, file.uuid)
         print(db_file.file_name)
 
+    crud_statistics.update_issues_rollup(db, db_issue.id, -1)
     db.delete(db_issue)
     db.commit()
 
@@ -1,44 +1,46 @@
-import csv
-import io
-import sys
 from datetime import datetime, time, timezone
 from typing import Annotated
 from uuid import UUID, uuid4
 
 from bs4 import BeautifulSoup
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi_pagination import Page, Params
 from fastapi_pagination.ext.sqlalchemy import paginate
 from sentry_sdk import capture_exception
 from sqlalchemy.orm import Session
-from starlette.responses import StreamingResponse
 
-from app.crud import crud_files, crud_guides, crud_issues, crud_items, crud_qr, crud_users
+from app.crud import crud_files, crud_guides, crud_items, crud_qr, crud_statistics, crud_users, load_profiles
 from app.crud.crud_auth import get_public_company_from_tenant
-from app.db import get_db
-from app.models.models import User
+from app.db import get_db, get_session_tenant
+from app.models.models import Item
 from app.schemas.requests import FavouritesAddIn, ItemAddIn, ItemEditIn
-from app.schemas.responses import ItemIndexResponse, ItemResponse, StandardResponse
-from app.service.bearer_auth import has_token
-from app.storage.aws_s3 import generate_presigned_url
+from app.schemas.responses import CursorPage, ItemIndexResponse, ItemResponse, StandardResponse
+from app.service.bearer_auth import Principal, has_token
+from app.service.export import ExportFormat, export_response
+from app.service.pagination import CursorParams, paginate_cursor
+from app.service.qr_pool import claim_item_qr_id
+from app.service.statistics import get_item_statistics
+from app.storage.aws_s3 import set_presigned_urls
 
 item_router = APIRouter()
-CurrentUser = Annotated[User, Depends(has_token)]
+CurrentUser = Annotated[Principal, Depends(has_token)]
 UserDB = Annotated[Session, Depends(get_db)]
 
 
-@item_router.get("/", response_model=Page[ItemIndexResponse])
+@item_router.get("/", response_model=Page[ItemIndexResponse] | CursorPage[ItemIndexResponse])
 def item_get_all(
     *,
     db: UserDB,
     params: Annotated[Params, Depends()],
+    cursor_params: Annotated[CursorParams, Depends()],
     auth_user: CurrentUser,
     search: str | None = None,
     user_uuid: UUID | None = None,
-    field: str = "name",
+    field: str | None = None,
     order: str = "asc",
 ):
-    if field not in ["name", "created_at"]:
+    # no field: search results are ranked, otherwise listed by `name`
+    if field is not None and field not in ["name", "created_at"]:
         field = "name"
 
     user_id = None
@@ -48,27 +50,24 @@ def item_get_all(
             raise HTTPException(status_code=401, detail="User not found")
         user_id = db_user.id
 
-    db_items_query = crud_items.get_items(field, order, search, user_id)
-    return paginate(db, db_items_query)
+    db_items_query = crud_items.get_items(field, order, search, user_id, auth_user.lang)
+    if cursor_params.pagination == "cursor":
+        sort_column = getattr(Item, field or "name")
+        return paginate_cursor(db, db_items_query, sort_column, Item.id, order, params.size, cursor_params)
+    return paginate(db, db_items_query, params)
 
 
 @item_router.get("/export")
-def get_export_items(*, db: UserDB, auth_user: CurrentUser):
+def get_export_items(
+    *,
+    db: UserDB,
+    auth_user: CurrentUser,
+    export_format: Annotated[ExportFormat, Query(alias="format")] = "csv",
+    compress: bool = False,
+):
     db_items_query = crud_items.get_items("name", "asc")
-    result = db.execute(db_items_query)  # await db.execute(query)
-    db_items = result.scalars().all()
-
-    f = io.StringIO()
-    csv_file = csv.writer(f, delimiter=";")
-    csv_file.writerow(["Name", "Description", "Symbol"])
-    for u in db_items:
-        csv_file.writerow([u.name, u.text, u.symbol])
-
-    f.seek(0)
-    response = StreamingResponse(f, media_type="text/csv")
-    filename = f"items_{datetime.today().strftime('%Y-%m-%d')}.csv"
-    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
-    return response
+    columns = {"Name": Item.name, "Description": Item.text, "Symbol": Item.symbol}
+    return export_response(get_session_tenant(db), db_items_query, columns, "items", export_format, compress)
 
 
 # @item_router.post("/import")
@@ -96,16 +95,13 @@ def get_export_items(*, db: UserDB, auth_user: CurrentUser):
 
 @item_router.get("/{item_uuid}", response_model=ItemResponse)
 def item_get_one(*, db: UserDB, item_uuid: UUID, request: Request, auth_user: CurrentUser):
-    db_item = crud_items.get_item_by_uuid(db, item_uuid)
+    db_item = crud_items.get_item_by_uuid(db, item_uuid, load_profiles.ITEM_RESPONSE)
 
     if not db_item:
         raise HTTPException(status_code=400, detail="Item not found!")
 
     try:
-        for picture in db_item.files_item:
-            picture.url = generate_presigned_url(
-                request.headers.get("tenant", "public"), "_".join([str(picture.uuid), picture.file_name])
-            )
+        set_presigned_urls(request.headers.get("tenant", "public"), db_item.files_item)
     except Exception as e:
         capture_exception(e)
 
@@ -128,16 +124,16 @@ def item_get_one(*, db: UserDB, item_uuid: UUID, request: Request, auth_user: Cu
 def item_get_statistics_all(
     *, db: UserDB, auth_user: CurrentUser, date_from: datetime | None = None, date_to: datetime | None = None
 ):
-    issues_per_day = crud_issues.get_issues_by_day(db, date_from, date_to)
+    issues_per_day = crud_statistics.get_rollup_issues_by_day(db, date_from, date_to)
     issues_per_day_dict = {y.strftime("%Y-%m-%d"): x for y, x in issues_per_day}
 
-    issues_per_hour = crud_issues.get_issues_by_hour(db, None, None)
+    issues_per_hour = crud_statistics.get_rollup_issues_by_hour(db, None, None)
     issues_per_hour_dict = {str(y): x for y, x in issues_per_hour}
 
     for hours in [time(i).strftime("%H") for i in range(24)]:
         issues_per_hour_dict.setdefault(hours, 0)
 
-    issues_status = crud_issues.get_issues_status(db, date_from, date_to)
+    issues_status = crud_statistics.get_rollup_issues_status(db, date_from, date_to)
     issues_status_dict = dict(issues_status)
 
     for status in ["new", "accepted", "rejected", "assigned", "in_progress", "paused", "done"]:
@@ -172,84 +168,11 @@ def item_get_statistics(
     date_from: datetime | None = None,
     date_to: datetime | None = None,
 ):
-    issues_per_day_dict = None
-    issues_per_hour_dict = None
-    issues_status_dict = None
-    issues_total_time_list = None
-    issues_repair_time_list = None
-    users = None
-
     db_item = crud_items.get_item_by_uuid(db, item_uuid)
     if not db_item:
         raise HTTPException(status_code=400, detail="Item not found!")
 
-    db_issues_uuid: list[UUID] = crud_issues.get_item_issues_uuids(db, db_item.id)
-    # db_issues_id: list[int] = crud_issues.get_item_issues_ids(db, db_item.id)
-
-    issues_per_day = crud_issues.get_item_issues_by_day(db, [db_item.id], date_from, date_to)
-    issues_per_day_dict = {y.strftime("%Y-%m-%d"): x for y, x in issues_per_day}
-
-    issues_per_hour = crud_issues.get_item_issues_by_hour(db, [db_item.id], date_from, date_to)
-    issues_per_hour_dict = {str(y): x for y, x in issues_per_hour}
-
-    for hours in [time(i).strftime("%H") for i in range(24)]:
-        issues_per_hour_dict.setdefault(hours, 0)
-    issues_per_hour_dict = dict(sorted(issues_per_hour_dict.items()))
-
-    issues_status = crud_issues.get_item_issues_status(db, [db_item.id], date_from, date_to)
-    issues_status_dict = dict(issues_status)
-    for status in ["new", "accepted", "rejected", "assigned", "in_progress", "paused", "done"]:
-        issues_status_dict.setdefault(status, 0)
-
-    issues_status_dict = dict(sorted(issues_status_dict.items()))
-
-    try:
-        issues_repair_time = crud_issues.get_mode_action_time(db, db_issues_uuid, "issueRepairTime")
-        issues_repair_time_list = [item for tpl in issues_repair_time for item in tpl]
-
-        issues_total_time = crud_issues.get_mode_action_time(db, db_issues_uuid, "issueTotalTime")
-        issues_total_time_list = [item for tpl in issues_total_time for item in tpl]
-
-        issue_assigned_users = crud_issues.get_assigned_users(db, db_issues_uuid)
-        issue_assigned_users_list = [item for tpl in issue_assigned_users for item in tpl]
-        issue_assigned_users_list = list(set(issue_assigned_users_list))
-
-        users = {}
-        for user_uuid in issue_assigned_users_list:
-            user_details = crud_users.get_user_by_uuid(db, user_uuid)
-            users["name"] = user_details.first_name + " " + user_details.last_name
-
-    except Exception as e:
-        line_no = sys.exc_info()[-1].tb_lineno
-        file_name = sys.exc_info()[-1].tb_frame.f_code.co_filename
-        type_name = type(e).__name__
-        error_message = f"Error on line: {line_no}, file: {file_name}, type: {type_name}, message: " + str(e)
-        print(error_message)
-        # capture_exception(error_message)
-
-    # średni czas potrzebny na podjęcie zgłoszenia
-
-    data = {
-        "issuesCount": None,
-        "issuesPerDay": None,
-        "issuesPerHour": None,
-        "issuesStatus": None,
-        "repairTime": None,
-        "users": None,
-    }
-
-    data["issuesCount"] = len(db_issues_uuid)
-    data["issuesPerDay"] = issues_per_day_dict
-    data["issuesPerHour"] = issues_per_hour_dict
-    data["issuesStatus"] = issues_status_dict
-    if issues_total_time_list and len(issues_total_time_list) > 0:
-        data["totalTime"] = {"max": issues_total_time_list[0], "avg": issues_total_time_list[1]}
-    if issues_repair_time_list and len(issues_repair_time_list) > 0:
-        data["repairTime"] = {"max": issues_repair_time_list[0], "avg": issues_repair_time_list[1]}
-    if users:
-        data["users"] = users
-
-    return data
+    return get_item_statistics(db, db_item.id, date_from, date_to)
 
 
 @item_router.post("/favourites", response_model=StandardResponse)
@@ -284,16 +207,11 @@ def item_add(*, db: UserDB, request: Request, item: ItemAddIn, auth_user: Curren
 
     company = get_public_company_from_tenant(tenant_id)
 
-    files = []
-    if item.files is not None:
-        for file in item.files:
-            db_file = crud_files.get_file_by_uuid(db, file)
-            if db_file:
-                files.append(db_file)
+    files = crud_files.get_files_by_uuids(db, item.files).found
 
     item_uuid = str(uuid4())
 
-    qr_code_id = crud_qr.generate_item_qr_id(db)
+    qr_code_id = claim_item_qr_id(db)
     qr_code_company = crud_qr.add_noise_to_qr(company.qr_id)
 
     qr_code_data = {
@@ -340,10 +258,7 @@ def item_edit(*, db: UserDB, item_uuid: UUID, item: ItemEditIn, auth_user: Curre
     if ("files" in item_data) and (item_data["files"] is not None):
         for file in db_item.files_item:
             db_item.files_item.remove(file)
-        for file in item_data["files"]:
-            db_file = crud_files.get_file_by_uuid(db, file)
-            if db_file:
-                files.append(db_file)
+        files = crud_files.get_files_by_uuids(db, item_data["files"]).found
 
         item_data["files_item"] = files
         del item_data["files"]
@@ -381,6 +296,7 @@ def item_delete(*, db: UserDB, item_uuid: UUID, auth_user: CurrentUser, force: b
     for guide in db_item.item_guides:
         crud_guides.get_guide_by_uuid(db, guide.uuid)
 
+    crud_statistics.move_item_issues_rollup(db, db_item.id)
     db.delete(db_item)
     db.delete(db_qr)
     db.commit()
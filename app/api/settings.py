@@ -9,15 +9,14 @@ from sqlalchemy.orm import Session
 
 from app.crud import crud_settings, crud_users
 from app.db import get_db
-from app.models.models import User
 from app.schemas.requests import SettingGeneralIn, SettingNotificationIn, SettingUserLanguage
 from app.schemas.responses import SettingNotificationResponse, StandardResponse
-from app.service.bearer_auth import has_token
+from app.service.bearer_auth import Principal, has_token
 from app.service.default_settings import allowed_settings
 
 setting_router = APIRouter()
 
-CurrentUser = Annotated[User, Depends(has_token)]
+CurrentUser = Annotated[Principal, Depends(has_token)]
 UserDB = Annotated[Session, Depends(get_db)]
 
 
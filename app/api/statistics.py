@@ -7,15 +7,14 @@ from sqlalchemy.orm import Session
 
 from app.crud import crud_statistics, crud_users
 from app.db import get_db
-from app.models.models import User
 from app.schemas.responses import StatsIssuesCounterResponse
 
 # from app.schemas.schemas import IdeaIndexResponse
-from app.service.bearer_auth import has_token
+from app.service.bearer_auth import Principal, has_token
 
 statistics_router = APIRouter()
 
-CurrentUser = Annotated[User, Depends(has_token)]
+CurrentUser = Annotated[Principal, Depends(has_token)]
 UserDB = Annotated[Session, Depends(get_db)]
 
 
@@ -7,14 +7,13 @@ from sqlalchemy.orm import Session
 
 from app.crud import crud_issues, crud_tags
 from app.db import get_db
-from app.models.models import User
 from app.schemas.requests import TagCreateIn, TagEditIn
 from app.schemas.responses import StandardResponse, TagResponse
-from app.service.bearer_auth import has_token
+from app.service.bearer_auth import Principal, has_token
 
 tag_router = APIRouter()
 
-CurrentUser = Annotated[User, Depends(has_token)]
+CurrentUser = Annotated[Principal, Depends(has_token)]
 UserDB = Annotated[Session, Depends(get_db)]
 
 
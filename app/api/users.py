@@ -1,35 +1,51 @@
 import codecs
 import csv
-import io
 from datetime import datetime, timezone
 from typing import Annotated
 from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile
 from fastapi_pagination import Page, Params
 from fastapi_pagination.ext.sqlalchemy import paginate
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
-from starlette.responses import StreamingResponse
 
-from app.crud import crud_auth, crud_permission, crud_users
-from app.db import engine, get_db
+from app.config import get_settings
+from app.crud import crud_auth, crud_permission, crud_users, load_profiles
+from app.db import get_db, get_session_tenant
 from app.models.models import User
-from app.schemas.requests import UserCreateIn
-from app.schemas.responses import StandardResponse, UserIndexResponse
-from app.service.bearer_auth import has_token
-from app.service.password import Password
+from app.schemas.requests import UserCreateIn, UserImportRow
+from app.schemas.responses import CursorPage, StandardResponse, UserImportResponse, UserIndexResponse
+from app.service.bearer_auth import Principal, has_token, invalidate_user_tokens
+from app.service.export import ExportFormat, export_response
+from app.service.helpers import to_snake_case
+from app.service.pagination import CursorParams, paginate_cursor
+from app.service.password import Password, hash_passwords
+from app.service.permissions import can_edit_user, require_permission
+
+settings = get_settings()
 
 user_router = APIRouter()
 
-CurrentUser = Annotated[User, Depends(has_token)]
+CurrentUser = Annotated[Principal, Depends(has_token)]
 UserDB = Annotated[Session, Depends(get_db)]
 
 
-@user_router.get("/", response_model=Page[UserIndexResponse])
+def user_editor(*, db: UserDB, user_uuid: UUID, auth_user: CurrentUser) -> Principal:
+    if not can_edit_user(db, auth_user, user_uuid):
+        raise HTTPException(status_code=403, detail="Insufficient privileges")
+    return auth_user
+
+
+UserEditor = Annotated[Principal, Depends(user_editor)]
+
+
+@user_router.get("/", response_model=Page[UserIndexResponse] | CursorPage[UserIndexResponse])
 def user_get_all(
     *,
     db: UserDB,
     params: Annotated[Params, Depends()],
+    cursor_params: Annotated[CursorParams, Depends()],
     auth_user: CurrentUser,
     # search: Annotated[str | None, Query(max_length=50)] = None,
     search: str | None = None,
@@ -39,12 +55,14 @@ def user_get_all(
     if field not in ["first_name", "last_name", "created_at"]:
         field = "last_name"
 
-    db_users_query = crud_users.get_users(field, order, search)
+    db_users_query = crud_users.get_users(field, order, search).options(*load_profiles.USER_INDEX)
 
     # result = db.execute(db_users_query)  # await db.execute(query)
     # db_users = result.scalars().all()
 
-    return paginate(db, db_users_query)
+    if cursor_params.pagination == "cursor":
+        return paginate_cursor(db, db_users_query, getattr(User, field), User.id, order, params.size, cursor_params)
+    return paginate(db, db_users_query, params)
 
 
 @user_router.get("/count")
@@ -55,22 +73,16 @@ def get_users_count(*, db: UserDB, auth_user: CurrentUser):
 
 
 @user_router.get("/export")
-def get_export_users(*, db: UserDB, auth_user: CurrentUser):
+def get_export_users(
+    *,
+    db: UserDB,
+    auth_user: CurrentUser,
+    export_format: Annotated[ExportFormat, Query(alias="format")] = "csv",
+    compress: bool = False,
+):
     db_users_query = crud_users.get_users("last_name", "asc")
-    result = db.execute(db_users_query)  # await db.execute(query)
-    db_users = result.scalars().all()
-
-    f = io.StringIO()
-    csv_file = csv.writer(f, delimiter=";")
-    csv_file.writerow(["First Name", "Last Name", "Email"])
-    for u in db_users:
-        csv_file.writerow([u.first_name, u.last_name, u.email])
-
-    f.seek(0)
-    response = StreamingResponse(f, media_type="text/csv")
-    filename = f"users_{datetime.today().strftime('%Y-%m-%d')}.csv"
-    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
-    return response
+    columns = {"First Name": User.first_name, "Last Name": User.last_name, "Email": User.email}
+    return export_response(get_session_tenant(db), db_users_query, columns, "users", export_format, compress)
 
     # https://github.com/Nasajon/fidesops/blob/03800a1e1c654eb34739d7097d74b37e318bcb50/src/fidesops/api/v1/endpoints/privacy_request_endpoints.py#L3
 
@@ -79,33 +91,105 @@ def get_export_users(*, db: UserDB, auth_user: CurrentUser):
     #     csv_writer.writerow(["First Name","Last Name","Email"])
 
 
-@user_router.post("/import")
-def get_import_users(*, db: UserDB, auth_user: CurrentUser, file: UploadFile | None = None):
-    if not file:
-        raise HTTPException(status_code=400, detail="No file sent")
-
-    csv_reader = csv.DictReader(codecs.iterdecode(file.file, "utf-8"), delimiter=";")
-    data = {}
-    for idx, rows in enumerate(csv_reader):
-        key = idx  # Assuming a column named 'Id' to be the primary key
-        data[key] = rows
-        data[key]["uuid"] = str(uuid4())
-        data[key]["is_active"] = True
-        data[key]["is_verified"] = True
-        data[key]["tz"] = "Europe/Warsaw"
-        data[key]["lang"] = "pl"
-        data[key]["phone"] = None
-        # print(rows)
+def _parse_import_row(row: dict) -> UserImportRow:
+    data = {to_snake_case(key): value.strip() or None for key, value in row.items() if key and value}
+    try:
+        user = UserImportRow.model_validate(data)
+    except ValidationError as error:
+        raise ValueError("; ".join(f"{e['loc'][0]}: {e['msg']}" for e in error.errors())) from None
 
-    file.file.close()
+    if user.password is not None:
+        is_password_ok = Password(user.password).validate()
+        if is_password_ok is not True:
+            raise ValueError(f"password: {is_password_ok}")
+    return user
 
-    print(list(data.values()))
 
-    # crud_users.bulk_insert(db, list(data.values()))
+def _read_import_rows(file: UploadFile) -> list[UserImportRow]:
+    """Stream the `;` separated CSV, 400 with every invalid line listed, nothing is imported then"""
+    rows, errors = [], []
+    try:
+        csv_reader = csv.DictReader(codecs.iterdecode(file.file, "utf-8-sig"), delimiter=";")
+        for line, row in enumerate(csv_reader, start=2):
+            if len(rows) + len(errors) >= settings.USERS_IMPORT_MAX_ROWS:
+                raise HTTPException(status_code=400, detail=f"Too many rows, limit is {settings.USERS_IMPORT_MAX_ROWS}")
+            try:
+                rows.append(_parse_import_row(row))
+            except ValueError as error:
+                errors.append({"line": line, "error": str(error)})
+    except (UnicodeDecodeError, csv.Error) as error:
+        raise HTTPException(status_code=400, detail=f"Invalid CSV file: {error}") from None
+    finally:
+        file.file.close()
+
+    if errors:
+        raise HTTPException(status_code=400, detail=errors)
+    return rows
+
+
+@user_router.post("/import", response_model=UserImportResponse)
+def get_import_users(
+    *,
+    db: UserDB,
+    auth_user: Annotated[Principal, Depends(require_permission("USER_IMPORT"))],
+    file: UploadFile,
+    role_uuid: UUID | None = None,
+):
+    """Bulk user import: rows with a taken email (tenant or any account) or repeated in the file are skipped,
+    users without a password set it with password reset. All rows are inserted in one transaction."""
+    rows = _read_import_rows(file)
+
+    taken = crud_users.get_existing_emails(db, [row.email for row in rows])
+    new_rows, skipped = [], []
+    for row in rows:
+        if row.email.lower() in taken:
+            skipped.append(row.email)
+            continue
+        taken.add(row.email.lower())
+        new_rows.append(row)
+
+    default_role = crud_permission.get_role_by_uuid(db, role_uuid) if role_uuid else None
+    roles = {}
+    for title in {row.role for row in new_rows if row.role}:
+        roles[title] = crud_permission.get_role_by_name(db, title)
+    missing = sorted({row.role or "" for row in new_rows if (roles.get(row.role) or default_role) is None})
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Invalid Role: {', '.join(missing) or 'role is missing'}")
+
+    hashes = iter(hash_passwords([row.password for row in new_rows if row.password]))
+
+    tenant_id = get_session_tenant(db)
+    now = datetime.now(timezone.utc)
+    users, public_users = [], {}
+    for row in new_rows:
+        user_data = {
+            "uuid": uuid4(),
+            "email": row.email,
+            "phone": row.phone,
+            "password": next(hashes) if row.password else None,
+            "tos": True,
+            "first_name": row.first_name,
+            "last_name": row.last_name,
+            "user_role_id": (roles.get(row.role) or default_role).id,
+            "is_active": True,
+            "is_verified": True,
+            "is_visible": True,
+            "tz": "Europe/Warsaw",
+            "lang": "pl",
+            "tenant_id": tenant_id,
+            "created_at": now,
+        }
+        users.append(user_data)
+        public_users[user_data["uuid"]] = {
+            key: user_data[key]
+            for key in ("uuid", "first_name", "last_name", "email", "is_active", "is_verified", "tos", "tz", "lang")
+        } | {"tenant_id": tenant_id, "created_at": now}
 
-    # https://stackoverflow.com/a/70655118
+    inserted = crud_users.bulk_insert(db, users)
+    crud_auth.bulk_insert_public_users(db, [public_users[uuid] for uuid in inserted])
+    db.commit()
 
-    return data
+    return {"inserted": len(inserted), "skipped": skipped}
 
 
 @user_router.get("/{user_uuid}", response_model=UserIndexResponse)
@@ -117,7 +201,13 @@ def user_get_one(*, db: UserDB, user_uuid: UUID, auth_user: CurrentUser):
 
 
 @user_router.post("/", response_model=StandardResponse)  # , response_model=User , auth_user: CurrentUser
-def user_add(*, db: UserDB, user: UserCreateIn, request: Request, auth_user: CurrentUser):
+def user_add(
+    *,
+    db: UserDB,
+    user: UserCreateIn,
+    request: Request,
+    auth_user: Annotated[Principal, Depends(require_permission("USER_ADD"))],
+):
     db_user = crud_users.get_user_by_email(db, user.email)
     if db_user is not None:
         raise HTTPException(status_code=400, detail="User already exists")
@@ -163,29 +253,27 @@ def user_add(*, db: UserDB, user: UserCreateIn, request: Request, auth_user: Cur
 
     crud_users.create_user(db, user_data)
 
-    schema_translate_map = {"tenant": "public"}
-    connectable = engine.execution_options(schema_translate_map=schema_translate_map)
-    with Session(autocommit=False, autoflush=False, bind=connectable) as db:
-        public_user_data = {
-            "uuid": user_uuid,
-            "first_name": user.first_name,
-            "last_name": user.last_name,
-            "email": user.email,
-            "is_active": True,
-            "is_verified": True,
-            "tos": True,
-            "tenant_id": tenant_id,
-            "tz": "Europe/Warsaw",
-            "lang": "pl",
-            "created_at": datetime.now(timezone.utc),
-        }
-        crud_auth.create_public_user(db, public_user_data)
+    # `public_users` is not tenant translated, no need for a second connection
+    public_user_data = {
+        "uuid": user_uuid,
+        "first_name": user.first_name,
+        "last_name": user.last_name,
+        "email": user.email,
+        "is_active": True,
+        "is_verified": True,
+        "tos": True,
+        "tenant_id": tenant_id,
+        "tz": "Europe/Warsaw",
+        "lang": "pl",
+        "created_at": datetime.now(timezone.utc),
+    }
+    crud_auth.create_public_user(db, public_user_data)
 
     return {"ok": True}
 
 
 @user_router.patch("/{user_uuid}", response_model=StandardResponse)
-def user_edit(*, db: UserDB, user_uuid: UUID, user: UserCreateIn, auth_user: CurrentUser):
+def user_edit(*, db: UserDB, user_uuid: UUID, user: UserCreateIn, auth_user: UserEditor):
     db_user = crud_users.get_user_by_uuid(db, user_uuid)
     if not db_user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -220,22 +308,25 @@ def user_edit(*, db: UserDB, user_uuid: UUID, user: UserCreateIn, auth_user: Cur
 
     # print(user_data)
     crud_users.update_user(db, db_user, user_data)
+    invalidate_user_tokens(get_session_tenant(db), user_uuid)
 
     # UPDATE PUBLIC USER INFO
     if ("email" in user_data.keys()) and (user_data["email"] is not None):
-        schema_translate_map = {"tenant": "public"}
-        connectable = engine.execution_options(schema_translate_map=schema_translate_map)
-        with Session(autocommit=False, autoflush=False, bind=connectable) as public_db:
-            db_public_user = crud_auth.get_public_user_by_email(public_db, current_email)
-            # print(current_email, db_public_user.id)
-            # print({"email": user_data["email"]})
-            crud_auth.update_public_user(public_db, db_public_user, {"email": user_data["email"]})
+        db_public_user = crud_auth.get_public_user_by_email(db, current_email)
+        if db_public_user:
+            crud_auth.update_public_user(db, db_public_user, {"email": user_data["email"]})
 
     return {"ok": True}
 
 
 @user_router.delete("/{user_uuid}", response_model=StandardResponse)
-def user_delete(*, db: UserDB, user_uuid: UUID, auth_user: CurrentUser, force: bool = False):
+def user_delete(
+    *,
+    db: UserDB,
+    user_uuid: UUID,
+    auth_user: Annotated[Principal, Depends(require_permission("USER_DELETE"))],
+    force: bool = False,
+):
     db_user = crud_users.get_user_by_uuid(db, user_uuid)
 
     if not db_user:
@@ -248,14 +339,12 @@ def user_delete(*, db: UserDB, user_uuid: UUID, auth_user: CurrentUser, force: b
         db.commit()
     else:
         crud_users.update_user(db, db_user, {"deleted_at": datetime.now(timezone.utc)})
+    invalidate_user_tokens(get_session_tenant(db), user_uuid)
 
-    schema_translate_map = {"tenant": "public"}
-    connectable = engine.execution_options(schema_translate_map=schema_translate_map)
-    with Session(autocommit=False, autoflush=False, bind=connectable) as db:
-        db_public_user = crud_auth.get_public_user_by_email(db, email)
+    db_public_user = crud_auth.get_public_user_by_email(db, email)
 
-        if db_public_user:
-            db.delete(db_public_user)
-            db.commit()
+    if db_public_user:
+        db.delete(db_public_user)
+        db.commit()
 
     return {"ok": True}
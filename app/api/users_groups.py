@@ -8,14 +8,13 @@ from sqlalchemy.orm import Session
 
 from app.crud import crud_groups, crud_users
 from app.db import get_db
-from app.models.models import User
 from app.schemas.requests import GroupAddIn, GroupEditIn
 from app.schemas.responses import GroupResponse, GroupSummaryResponse, StandardResponse
-from app.service.bearer_auth import has_token
+from app.service.bearer_auth import Principal, has_token
 
 group_router = APIRouter()
 
-CurrentUser = Annotated[User, Depends(has_token)]
+CurrentUser = Annotated[Principal, Depends(has_token)]
 UserDB = Annotated[Session, Depends(get_db)]
 
 
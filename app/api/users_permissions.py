@@ -3,38 +3,55 @@ from typing import Annotated
 from uuid import UUID, uuid4
 
 from fastapi import APIRouter, Depends, HTTPException
-from fastapi_pagination import Page, Params, paginate
+from fastapi_pagination import Page, Params
+from fastapi_pagination.ext.sqlalchemy import paginate
 from sqlalchemy.orm import Session
 
 from app.crud import crud_permission, crud_users
 from app.db import get_db
-from app.models.models import User
+from app.models.models import Role
 from app.schemas.requests import RoleAddIn, RoleEditIn
-from app.schemas.responses import PermissionResponse, RolePermissionFull, RoleSummaryResponse, StandardResponse
-from app.service.bearer_auth import has_token
+from app.schemas.responses import (
+    CursorPage,
+    PermissionResponse,
+    RolePermissionFull,
+    RoleSummaryResponse,
+    StandardResponse,
+)
+from app.service.bearer_auth import Principal, has_token
 from app.service.helpers import to_snake_case
+from app.service.pagination import CursorParams, paginate_cursor
+from app.service.permissions import invalidate_role_permissions, require_permission
 
 permission_router = APIRouter()
 
-CurrentUser = Annotated[User, Depends(has_token)]
+CurrentUser = Annotated[Principal, Depends(has_token)]
 UserDB = Annotated[Session, Depends(get_db)]
+PermissionManager = Annotated[Principal, Depends(require_permission("SETTINGS_PERMISSION"))]
 
 
-@permission_router.get("/", response_model=Page[RoleSummaryResponse])  # , response_model=Page[UserIndexResponse]
+@permission_router.get("/", response_model=Page[RoleSummaryResponse] | CursorPage[RoleSummaryResponse])
 def role_get_all(
     *,
     db: UserDB,
     params: Annotated[Params, Depends()],
+    cursor_params: Annotated[CursorParams, Depends()],
     auth_user: CurrentUser,
     search: str = None,
     all: bool = True,
     sortOrder: str = "asc",
     sortColumn: str = "name",
 ):
-    sortTable = {"name": "role_title"}
+    sort_columns = {"name": Role.role_title, "created_at": Role.created_at}
+    sort_column = sort_columns.get(sortColumn, Role.role_title)
+    if sortOrder not in ["asc", "desc"]:
+        sortOrder = "asc"
 
-    db_roles = crud_permission.get_roles_summary(db, search, all, sortTable[sortColumn], sortOrder)
-    return paginate(db_roles, params)
+    db_roles_query = crud_permission.get_roles_summary(sort_column.key, sortOrder, search, all)
+
+    if cursor_params.pagination == "cursor":
+        return paginate_cursor(db, db_roles_query, sort_column, Role.id, sortOrder, params.size, cursor_params)
+    return paginate(db, db_roles_query, params)
 
 
 @permission_router.get("/all", response_model=list[PermissionResponse])
@@ -52,7 +69,7 @@ def role_get_one(*, db: UserDB, role_uuid: UUID, auth_user: CurrentUser):
 
 
 @permission_router.post("/", response_model=RolePermissionFull)
-def role_add(*, db: UserDB, role: RoleAddIn, auth_user: CurrentUser):
+def role_add(*, db: UserDB, role: RoleAddIn, auth_user: PermissionManager):
     db_role = crud_permission.get_role_by_name(db, role.title)
     if db_role:
         raise HTTPException(status_code=400, detail="Role already exists!")
@@ -76,11 +93,12 @@ def role_add(*, db: UserDB, role: RoleAddIn, auth_user: CurrentUser):
     }
 
     new_role = crud_permission.create_role_with_permissions(db, role_data)
+    invalidate_role_permissions(db)
     return new_role
 
 
 @permission_router.patch("/{role_uuid}", response_model=RolePermissionFull)
-def role_edit(*, db: UserDB, role_uuid: UUID, role: RoleEditIn, auth_user: CurrentUser):
+def role_edit(*, db: UserDB, role_uuid: UUID, role: RoleEditIn, auth_user: PermissionManager):
     db_role = crud_permission.get_role_by_uuid(db, role_uuid)
     if not db_role:
         raise HTTPException(status_code=400, detail="Role already exists!")
@@ -107,12 +125,13 @@ def role_edit(*, db: UserDB, role_uuid: UUID, role: RoleEditIn, auth_user: Curre
     del role_data["description"]
 
     new_role = crud_permission.update_role(db, db_role, role_data)
+    invalidate_role_permissions(db)
 
     return new_role
 
 
 @permission_router.delete("/{role_uuid}", response_model=StandardResponse)
-def role_delete(*, db: UserDB, role_uuid: UUID, auth_user: CurrentUser, force: bool = False):
+def role_delete(*, db: UserDB, role_uuid: UUID, auth_user: PermissionManager, force: bool = False):
     db_role = crud_permission.get_role_by_uuid(db, role_uuid)
 
     if not db_role:
@@ -129,8 +148,10 @@ def role_delete(*, db: UserDB, role_uuid: UUID, auth_user: CurrentUser, force: b
     if force is True:
         db.delete(db_role)
         db.commit()
+        invalidate_role_permissions(db)
         return {"ok": True}
 
     crud_permission.update_role(db, db_role, {"deleted_at": datetime.now(timezone.utc)})
+    invalidate_role_permissions(db)
 
     return {"ok": True}
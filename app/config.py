@@ -19,6 +19,8 @@ class Settings(BaseSettings):
     s3_secret_access_key: str | None = os.getenv("AWS_S3_SECRET_ACCESS_KEY")
     s3_bucket_name: str | None = os.getenv("AWS_S3_BUCKET")
     s3_bucket_region: str | None = os.getenv("AWS_S3_DEFAULT_REGION")
+    # CDN / public domain in front of the bucket, when set file urls are served unsigned from it
+    s3_custom_domain: str = os.getenv("AWS_S3_CUSTOM_DOMAIN", "")
 
     sentry_dsn: str | None = os.getenv("SENTRY_DSN")
 
@@ -50,6 +52,82 @@ class Settings(BaseSettings):
 
     # DEFAULT_SQLALCHEMY_DATABASE_URI: str | None = os.getenv("DEFAULT_SQLALCHEMY_DATABASE_URI")
 
+    # POSTGRESQL CONNECTION POOL (per worker process)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_POOL_MAX_OVERFLOW: int = int(os.getenv("DB_POOL_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", 280))
+    # True - test connection with `SELECT 1` on every checkout, False - rely on DB_POOL_RECYCLE
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "1").lower() in ("1", "true", "yes")
+    # async engine has its own pool (used by async routes only), sized separately so it does not double the above
+    DB_ASYNC_POOL_SIZE: int = int(os.getenv("DB_ASYNC_POOL_SIZE", 2))
+    DB_ASYNC_POOL_MAX_OVERFLOW: int = int(os.getenv("DB_ASYNC_POOL_MAX_OVERFLOW", 3))
+    # compiled SQL statements kept per engine, shared by all tenants (schema is substituted after compilation)
+    DB_QUERY_CACHE_SIZE: int = int(os.getenv("DB_QUERY_CACHE_SIZE", 1200))
+    # tenant bound engines (`schema_translate_map`) kept for reuse, least recently used are dropped
+    DB_TENANT_ENGINE_CACHE_SIZE: int = int(os.getenv("DB_TENANT_ENGINE_CACHE_SIZE", 256))
+
+    # CACHE
+    TENANT_CACHE_TTL: int = int(os.getenv("TENANT_CACHE_TTL", 300))
+    TENANT_CACHE_SIZE: int = int(os.getenv("TENANT_CACHE_SIZE", 1024))
+    TOKEN_CACHE_TTL: int = int(os.getenv("TOKEN_CACHE_TTL", 60))
+    TOKEN_CACHE_SIZE: int = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+    TOKEN_NEGATIVE_CACHE_TTL: int = int(os.getenv("TOKEN_NEGATIVE_CACHE_TTL", 30))
+    PERMISSION_CACHE_TTL: int = int(os.getenv("PERMISSION_CACHE_TTL", 300))
+    # signed urls are valid PRESIGNED_URL_EXPIRES, cached for a shorter time so a cached url never expires in use
+    PRESIGNED_URL_EXPIRES: int = int(os.getenv("PRESIGNED_URL_EXPIRES", 3600))
+    PRESIGNED_URL_CACHE_TTL: int = int(os.getenv("PRESIGNED_URL_CACHE_TTL", 3000))
+    PRESIGNED_URL_CACHE_SIZE: int = int(os.getenv("PRESIGNED_URL_CACHE_SIZE", 10000))
+    # bytes read from S3 and sent to the client at once by the download proxy
+    S3_DOWNLOAD_CHUNK_SIZE: int = int(os.getenv("S3_DOWNLOAD_CHUNK_SIZE", 1024 * 1024))
+    # direct uploads above the part size go through multipart upload (S3 minimum part size is 5 MiB)
+    S3_MULTIPART_PART_SIZE: int = int(os.getenv("S3_MULTIPART_PART_SIZE", 8 * 1024 * 1024))
+    FILES_QUOTA: int = int(os.getenv("FILES_QUOTA", 50000000))
+
+    # ISSUES
+    # numbers taken from `issues_symbol_seq` at once and handed out by the process, 1 - no pre-allocation
+    ISSUE_SYMBOL_BLOCK_SIZE: int = int(os.getenv("ISSUE_SYMBOL_BLOCK_SIZE", 1))
+
+    # QR CODES
+    QR_POOL_SIZE: int = int(os.getenv("QR_POOL_SIZE", 100))
+    QR_POOL_LOW_WATERMARK: int = int(os.getenv("QR_POOL_LOW_WATERMARK", 20))
+    QR_ID_MIN_LENGTH: int = int(os.getenv("QR_ID_MIN_LENGTH", 3))
+    # part of the id space that may be used before ids get one character longer
+    QR_ID_FILL_THRESHOLD: float = float(os.getenv("QR_ID_FILL_THRESHOLD", 0.5))
+
+    # MAILJET
+    # messages per Send API call (Mailjet v3.1 accepts up to 50) and batches sent at once
+    MAILJET_BATCH_SIZE: int = int(os.getenv("MAILJET_BATCH_SIZE", 50))
+    MAILJET_CONCURRENCY: int = int(os.getenv("MAILJET_CONCURRENCY", 4))
+    MAILJET_TIMEOUT: float = float(os.getenv("MAILJET_TIMEOUT", 10))
+
+    # PASSWORDS
+    # argon2 cost, hashes made with other values are rehashed on the next login
+    ARGON2_TIME_COST: int = int(os.getenv("ARGON2_TIME_COST", 2))
+    ARGON2_MEMORY_COST: int = int(os.getenv("ARGON2_MEMORY_COST", 102400))  # KiB
+    ARGON2_PARALLELISM: int = int(os.getenv("ARGON2_PARALLELISM", 8))
+    # worker processes hashing passwords, 0 - hash on the request thread
+    PASSWORD_POOL_SIZE: int = int(os.getenv("PASSWORD_POOL_SIZE", 2))
+    # jobs waiting for a worker before requests get 429
+    PASSWORD_POOL_MAX_QUEUE: int = int(os.getenv("PASSWORD_POOL_MAX_QUEUE", 16))
+    # passwords hashed by one worker job during bulk user import
+    PASSWORD_HASH_CHUNK_SIZE: int = int(os.getenv("PASSWORD_HASH_CHUNK_SIZE", 20))
+
+    # USERS
+    USERS_IMPORT_MAX_ROWS: int = int(os.getenv("USERS_IMPORT_MAX_ROWS", 5000))
+
+    # NOTIFICATION OUTBOX
+    OUTBOX_DISPATCH_INTERVAL: int = int(os.getenv("OUTBOX_DISPATCH_INTERVAL", 10))
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", 50))
+    # messages sent in parallel by one dispatcher run
+    OUTBOX_CONCURRENCY: int = int(os.getenv("OUTBOX_CONCURRENCY", 4))
+    # seconds a claimed message stays hidden from other dispatchers
+    OUTBOX_LEASE: int = int(os.getenv("OUTBOX_LEASE", 300))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 8))
+    # retry after OUTBOX_RETRY_BASE * 2^(attempt - 1) seconds, at most OUTBOX_RETRY_MAX
+    OUTBOX_RETRY_BASE: int = int(os.getenv("OUTBOX_RETRY_BASE", 30))
+    OUTBOX_RETRY_MAX: int = int(os.getenv("OUTBOX_RETRY_MAX", 3600))
+
     # POSTGRESQL TEST DATABASE
     TEST_DATABASE_HOSTNAME: str | None = "postgres"
     TEST_DATABASE_USER: str | None = "postgres"
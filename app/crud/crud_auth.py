@@ -1,11 +1,13 @@
 import base64
 from datetime import datetime, timezone
+from uuid import UUID
 
 from fastapi import HTTPException
 from sqlalchemy import distinct, func, select
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
-from app.db import engine
+from app.db import get_tenant_by_id
 from app.models.models import User
 from app.models.shared_models import PublicCompany, PublicUser
 
@@ -82,6 +84,17 @@ def create_public_user(db: Session, public_user: dict) -> PublicUser:
     return new_user
 
 
+def bulk_insert_public_users(db: Session, data: list[dict]) -> list[UUID]:
+    """Multi-row `INSERT ... ON CONFLICT DO NOTHING`, returns uuids of inserted rows, caller commits"""
+    if not data:
+        return []
+
+    query = insert(PublicUser).on_conflict_do_nothing().returning(PublicUser.uuid)
+
+    result = db.execute(query, data)  # await db.execute(query, data)
+    return list(result.scalars().all())
+
+
 def create_public_company(db: Session, company: dict) -> PublicCompany:
     new_company = PublicCompany(**company)
     db.add(new_company)
@@ -134,6 +147,7 @@ def get_tenant_user_by_auth_token(db: Session, token: str) -> User | None:
             .where(User.auth_token == token)
             .where(User.is_active == True)  # noqa: E712
             .where(User.auth_token_valid_to > datetime.now(timezone.utc))
+            .where(User.deleted_at.is_(None))
         )
 
         result = db.execute(query)  # await db.execute(query)
@@ -158,11 +172,7 @@ def generate_base64_token(token: str) -> str:
 
 
 def get_public_company_from_tenant(tenant_id: str) -> PublicCompany | None:
-    company = None
-    schema_translate_map = {"tenant": "public"}
-    connectable = engine.execution_options(schema_translate_map=schema_translate_map)
-    with Session(autocommit=False, autoflush=False, bind=connectable) as public_db:
-        company = get_public_company_by_tenant_id(public_db, tenant_id)
+    company = get_tenant_by_id(tenant_id)
     if not company:
         raise HTTPException(status_code=400, detail="Unknown Company!")
 
@@ -0,0 +1,17 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.shared_models import PublicCompany
+
+
+async def get_public_company_count(db: AsyncSession) -> int | None:
+    query = select(func.count(PublicCompany.id))
+
+    result = await db.execute(query)
+    return result.scalar_one_or_none()
+
+
+async def get_public_company_by_tenant_id(db: AsyncSession, tenant_id: str) -> PublicCompany | None:
+    query = select(PublicCompany).where(PublicCompany.tenant_id == tenant_id)
+    result = await db.execute(query)
+    return result.scalar_one_or_none()
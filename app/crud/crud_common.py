@@ -0,0 +1,33 @@
+from collections.abc import Iterable
+from typing import NamedTuple
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+
+class Resolved(NamedTuple):
+    found: list
+    missing: list[UUID]
+
+
+def resolve_uuids(db: Session, model, uuids: Iterable[UUID | str] | None, *criteria) -> Resolved:
+    """Fetch rows of `model` referenced by `uuids` with a single `IN (...)` query.
+
+    Rows come back in input order (duplicates dropped), UUIDs without a row (or filtered out by
+    `criteria`, e.g. `File.deleted_at.is_(None)`) are reported in `missing`.
+    """
+    requested = list(dict.fromkeys(UUID(str(uuid)) for uuid in uuids or []))
+    if not requested:
+        return Resolved([], [])
+
+    query = select(model).where(model.uuid.in_(requested))
+    for criterion in criteria:
+        query = query.where(criterion)
+
+    result = db.execute(query)  # await db.execute(query)
+    rows = {row.uuid: row for row in result.scalars().all()}
+
+    found = [rows[uuid] for uuid in requested if uuid in rows]
+    missing = [uuid for uuid in requested if uuid not in rows]
+    return Resolved(found, missing)
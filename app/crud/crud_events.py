@@ -1,7 +1,7 @@
 from collections.abc import Sequence
 from uuid import UUID
 
-from sqlalchemy import distinct, func, select
+from sqlalchemy import Integer, cast, distinct, extract, func, insert, select, update
 from sqlalchemy.orm import Session
 
 from app.models.models import Event, EventSummary
@@ -34,23 +34,32 @@ def get_statistics_by_issue_uuid_and_status(db: Session, issue_uuid: UUID, statu
     return db.execute(query).scalar_one_or_none()
 
 
-def get_event_summary_by_resource_uuid_and_status(
-    db: Session, resource: str, resource_uuid: UUID, status: str, internal_value: str | None = None
-) -> EventSummary | None:
+def close_event_summaries(
+    db: Session, resource: str, resource_uuid: UUID, actions: list[str], internal_values: list[str] | None = None
+):
+    """Close all open intervals of `actions` in a single UPDATE, duration is counted by the DB, caller commits.
+
+    `internal_values=None` closes intervals regardless of value (e.g. every assigned user).
+    """
     query = (
-        select(EventSummary)
+        update(EventSummary)
         .where(EventSummary.resource == resource)
         .where(EventSummary.resource_uuid == resource_uuid)
-        .where(EventSummary.action == status)
+        .where(EventSummary.action.in_(actions))
         .where(EventSummary.date_to.is_(None))
+        .values(
+            date_to=func.now(),
+            duration=cast(func.floor(extract("epoch", func.now() - EventSummary.date_from)), Integer),
+        )
+        .returning(EventSummary.id, EventSummary.action, EventSummary.internal_value, EventSummary.duration)
+        .execution_options(synchronize_session=False)
     )
 
-    if internal_value is not None:
-        query = query.where(EventSummary.internal_value == internal_value)
+    if internal_values is not None:
+        query = query.where(EventSummary.internal_value.in_(internal_values))
 
     result = db.execute(query)  # await db.execute(query)
-
-    return result.scalar_one_or_none()
+    return result.all()
 
 
 def get_basic_summary_users_uuids(db: Session, resource: str, resource_uuid: UUID, action: str) -> list[UUID]:
@@ -141,30 +150,14 @@ def get_events_by_thread(db: Session, resource_uuid: UUID, resource: str = None,
     return events_with_date
 
 
-def create_event(db: Session, data: dict) -> Event:
-    new_event = Event(**data)
-    db.add(new_event)
-    db.commit()
-    db.refresh(new_event)
-
-    return new_event
-
-
-def create_event_statistic(db: Session, data: dict) -> EventSummary:
-    new_event_statistics = EventSummary(**data)
-    db.add(new_event_statistics)
-    db.commit()
-    db.refresh(new_event_statistics)
-
-    return new_event_statistics
-
-
-def update_event(db: Session, db_event: EventSummary, update_data: dict) -> EventSummary:
-    for key, value in update_data.items():
-        setattr(db_event, key, value)
+def bulk_create_events(db: Session, data: list[dict]) -> Sequence[Event]:
+    """Single INSERT for all rows, caller commits"""
+    if not data:
+        return []
+    return db.scalars(insert(Event).returning(Event), data).all()
 
-    db.add(db_event)
-    db.commit()
-    db.refresh(db_event)
 
-    return db_event
+def bulk_create_event_summaries(db: Session, data: list[dict]) -> None:
+    """Single INSERT for all rows, caller commits"""
+    if data:
+        db.execute(insert(EventSummary), data)
@@ -4,6 +4,7 @@ from sqlalchemy import select
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
 
+from app.crud.crud_common import Resolved, resolve_uuids
 from app.models.models import File
 
 
@@ -19,6 +20,10 @@ def get_file_by_uuid(db: Session, uuid: UUID) -> File | None:
     return result.scalar_one_or_none()
 
 
+def get_files_by_uuids(db: Session, uuids: list[UUID]) -> Resolved:
+    return resolve_uuids(db, File, uuids, File.deleted_at.is_(None))
+
+
 def get_file_by_id(db: Session, id: int) -> File:
     return db.execute(select(File).where(File.id == id).where(File.deleted_at.is_(None))).scalar_one()
 
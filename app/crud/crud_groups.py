@@ -2,8 +2,9 @@ from collections.abc import Sequence
 from uuid import UUID
 
 from sqlalchemy import func, select, text
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm import Session
 
+from app.crud.load_profiles import GROUP_RESPONSE
 from app.models.models import UserGroup
 
 
@@ -25,7 +26,7 @@ def get_user_groups(db: Session, search: str, sort_column: str, sort_order: str)
 
 def get_user_group_by_uuid(db: Session, uuid: UUID) -> UserGroup:
     # return db.execute(select(UserGroup).where(UserGroup.uuid == uuid).options(selectinload("*"))).scalar_one_or_none()
-    return db.execute(select(UserGroup).where(UserGroup.uuid == uuid).options(selectinload("*"))).scalar_one_or_none()
+    return db.execute(select(UserGroup).where(UserGroup.uuid == uuid).options(*GROUP_RESPONSE)).scalar_one_or_none()
 
 
 def get_user_group_by_name(db: Session, name: str) -> UserGroup:
@@ -1,25 +1,23 @@
+from collections.abc import Sequence
 from uuid import UUID
 
-from sqlalchemy import Select, or_, select, text
+from sqlalchemy import Select, select, text
 from sqlalchemy.orm import Session
 
+from app.crud.crud_search import apply_search
 from app.models.models import Guide, Item
 
 
-def get_guides(search: str, item_id: int, sort_column: str, sort_order: str) -> Select[tuple[Guide]]:
+def get_guides(
+    search: str, item_id: int, sort_column: str | None, sort_order: str, lang: str | None = None
+) -> Select[tuple[Guide]]:
     query = select(Guide)
 
-    search_filters = []
-    if search is not None:
-        search_filters.append(Guide.name.ilike(f"%{search}%"))
-        search_filters.append(Guide.text.ilike(f"%{search}%"))
-
-        query = query.filter(or_(False, *search_filters))
-
     if item_id is not None:
         query = query.filter(Guide.item.any(Item.id == item_id))
 
-    query = query.order_by(text(f"{sort_column} {sort_order}"))
+    sort = text(f"{sort_column or 'name'} {sort_order}")
+    query = apply_search(query, Guide, search, lang, sort, rank_first=sort_column is None)
 
     return query
 
@@ -28,8 +26,8 @@ def get_guides(search: str, item_id: int, sort_column: str, sort_order: str) ->
     # return result.scalars().all()
 
 
-def get_guide_by_uuid(db: Session, uuid: UUID) -> Guide:
-    return db.execute(select(Guide).where(Guide.uuid == uuid)).scalar_one_or_none()
+def get_guide_by_uuid(db: Session, uuid: UUID, options: Sequence = ()) -> Guide:
+    return db.execute(select(Guide).where(Guide.uuid == uuid).options(*options)).scalar_one_or_none()
 
 
 def create_guide(db: Session, data: dict) -> Guide:
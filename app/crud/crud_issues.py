@@ -1,14 +1,20 @@
+from collections.abc import Sequence
 from datetime import datetime
 from uuid import UUID
 
-from sqlalchemy import Date, Select, distinct, extract, func, not_, or_, select, text
+from sqlalchemy import Select, func, not_, select, text
 from sqlalchemy.orm import Session
 
-from app.models.models import EventSummary, Issue, Tag, User
+from app.crud import crud_statistics
+from app.crud.crud_search import apply_search
+from app.models.models import Issue, Tag, User, issues_symbol_seq
+
+# Issue columns that pick the statistics rollup bucket
+ROLLUP_FIELDS = ("created_at", "status", "item_id")
 
 
 def get_issues(
-    sort_column: str,
+    sort_column: str | None,
     sort_order: str,
     search: str | None,
     status: str | None,
@@ -17,17 +23,10 @@ def get_issues(
     date_from: datetime = None,
     date_to: datetime = None,
     tags: list[int] = None,
+    lang: str | None = None,
 ) -> Select[tuple[Issue]]:
-    search_filters = []
-
     query = select(Issue)
 
-    if search is not None:
-        search_filters.append(Issue.name.ilike(f"%{search}%"))
-        search_filters.append(Issue.text.ilike(f"%{search}%"))
-
-        query = query.filter(or_(False, *search_filters))
-
     match status:
         case "all":
             ...
@@ -60,7 +59,8 @@ def get_issues(
     if tags is not None:
         query = query.where(Issue.tags_issue.any(Tag.id.in_(tags)))
 
-    query = query.order_by(text(f"{sort_column} {sort_order}"))
+    sort = text(f"{sort_column or 'created_at'} {sort_order}")
+    query = apply_search(query, Issue, search, lang, sort, rank_first=sort_column is None)
 
     return query
     # result = db.execute(query)  # await db.execute(query)
@@ -68,15 +68,16 @@ def get_issues(
     # return result.scalars().all()
 
 
-def get_last_issue_id(db):
-    query = select(Issue.id).order_by(Issue.id.desc()).limit(1)
+def get_next_issue_numbers(db: Session, count: int = 1) -> list[int]:
+    """Take `count` consecutive-ish numbers from the tenant sequence, safe across workers"""
+    query = select(issues_symbol_seq.next_value()).select_from(func.generate_series(1, count))
 
     result = db.execute(query)  # await db.execute(query)
-    return result.scalar_one_or_none()
+    return result.scalars().all()
 
 
-def get_issue_by_uuid(db: Session, uuid: UUID) -> Issue:
-    query = select(Issue).where(Issue.uuid == uuid)
+def get_issue_by_uuid(db: Session, uuid: UUID, options: Sequence = ()) -> Issue:
+    query = select(Issue).where(Issue.uuid == uuid).options(*options)
 
     result = db.execute(query)  # await db.execute(query)
     return result.scalar_one_or_none()
@@ -89,173 +90,11 @@ def count_issues_by_tag(db: Session, tag_id: int):
     return result.scalar_one_or_none()
 
 
-# --- STATS ---
-def get_item_issues_uuids(db, item_id: int) -> list[UUID]:
-    query = select(Issue.uuid).where(Issue.item_id == item_id)
-
-    result = db.execute(query)  # await db.execute(query)
-
-    return result.scalars().all()
-
-
-def get_item_issues_ids(db, item_id: int) -> list[int]:
-    query = select(Issue.id).where(Issue.item_id == item_id)
-
-    result = db.execute(query)  # await db.execute(query)
-
-    return result.scalars().all()
-
-
-def get_item_issues_by_day(db, item_ids: list[int], date_from: datetime = None, date_to: datetime = None):
-    query = select(Issue.created_at.cast(Date).label("date"), func.count(distinct(Issue.id)))
-    query = query.where(Issue.item_id.in_(item_ids))
-
-    if date_from is not None:
-        query = query.filter(func.DATE(Issue.created_at) >= date_from)
-
-    if date_to is not None:
-        query = query.filter(func.DATE(Issue.created_at) <= date_to)
-
-    query = query.group_by("date")
-
-    result = db.execute(query)  # await db.execute(query)
-
-    return result.all()
-
-
-def get_issues_by_day(db, date_from: datetime = None, date_to: datetime = None):
-    query = select(Issue.created_at.cast(Date).label("date"), func.count(distinct(Issue.id)))
-
-    if date_from is not None:
-        query = query.filter(func.DATE(Issue.created_at) >= date_from)
-
-    if date_to is not None:
-        query = query.filter(func.DATE(Issue.created_at) <= date_to)
-
-    query = query.group_by("date")
-
-    result = db.execute(query)  # await db.execute(query)
-
-    return result.all()
-
-
-def get_item_issues_by_hour(db, item_ids: list[int] | None, date_from: datetime = None, date_to: datetime = None):
-    query = select(extract("hour", Issue.created_at).label("hour"), func.count(distinct(Issue.id)))
-
-    query = query.where(Issue.item_id.in_(item_ids))
-
-    if date_from is not None:
-        query = query.filter(func.DATE(Issue.created_at) >= date_from)
-
-    if date_to is not None:
-        query = query.filter(func.DATE(Issue.created_at) <= date_to)
-
-    query = query.group_by("hour")
-
-    result = db.execute(query)  # await db.execute(query)
-
-    return result.all()
-
-
-def get_issues_by_hour(db, date_from: datetime = None, date_to: datetime = None):
-    query = select(extract("hour", Issue.created_at).label("hour"), func.count(distinct(Issue.id)))
-
-    if date_from is not None:
-        query = query.filter(func.DATE(Issue.created_at) >= date_from)
-
-    if date_to is not None:
-        query = query.filter(func.DATE(Issue.created_at) <= date_to)
-
-    query = query.group_by("hour")
-
-    result = db.execute(query)  # await db.execute(query)
-
-    return result.all()
-
-
-def get_item_issues_status(db, item_ids: list[int], date_from: datetime = None, date_to: datetime = None):
-    query = select(Issue.status.label("status"), func.count(distinct(Issue.id)))
-    query = query.where(Issue.item_id.in_(item_ids))
-
-    if date_from is not None:
-        query = query.filter(func.DATE(Issue.created_at) >= date_from)
-
-    if date_to is not None:
-        query = query.filter(func.DATE(Issue.created_at) <= date_to)
-
-    query = query.group_by("status")
-
-    result = db.execute(query)  # await db.execute(query)
-
-    return result.all()
-
-    # query = (
-    #     select(Issue.status.label("status"), func.count(distinct(Issue.id)))
-    #     .where(Issue.item_id.in_(item_ids))
-    #     .group_by("status")
-    # )
-    #
-    # result = db.execute(query)  # await db.execute(query)
-    #
-    # return result.all()
-
-
-def get_issues_status(db, date_from: datetime = None, date_to: datetime = None):
-    query = select(Issue.status.label("status"), func.count(distinct(Issue.id)))
-
-    if date_from is not None:
-        query = query.filter(func.DATE(Issue.created_at) >= date_from)
-
-    if date_to is not None:
-        query = query.filter(func.DATE(Issue.created_at) <= date_to)
-
-    query = query.group_by("status")
-
-    result = db.execute(query)  # await db.execute(query)
-
-    return result.all()
-
-
-def get_mode_action_time(db, issues_uuids: list[UUID], action: str):
-    query = (
-        select(func.max(EventSummary.duration), func.avg(EventSummary.duration), func.min(EventSummary.duration))
-        .where(EventSummary.resource_uuid.in_(issues_uuids))
-        .where(EventSummary.resource == "issue")
-        .where(EventSummary.action == action)
-    )
-
-    result = db.execute(query)  # await db.execute(query)
-
-    return result.all()
-
-
-def get_assigned_users(db, issues_uuids: list[UUID]):
-    query = (
-        select(distinct(EventSummary.internal_value))
-        .where(EventSummary.resource_uuid.in_(issues_uuids))
-        .where(EventSummary.resource == "issue")
-        .where(EventSummary.action == "issueUserActivity")
-    )
-
-    result = db.execute(query)  # await db.execute(query)
-
-    return result.all()
-
-
-# --- STATS ---
-
-# def get_issue_summary(db: Session):
-#     # return db.execute(select(Issue.status, func.count(Issue.status)).group_by(Issue.status)).all()
-
-#     query = select(Issue.status, func.count(Issue.status)).group_by(Issue.status)
-
-#     result = db.execute(query)  # await db.execute(query)
-#     return result.all()
-
-
 def create_issue(db: Session, data: dict) -> Issue:
     new_issue = Issue(**data)
     db.add(new_issue)
+    db.flush()
+    crud_statistics.update_issues_rollup(db, new_issue.id, 1)
     db.commit()
     db.refresh(new_issue)
 
@@ -263,10 +102,17 @@ def create_issue(db: Session, data: dict) -> Issue:
 
 
 def update_issue(db: Session, db_issue: Issue, update_data: dict) -> Issue:
+    rollup_changed = any(key in update_data and update_data[key] != getattr(db_issue, key) for key in ROLLUP_FIELDS)
+    if rollup_changed:
+        crud_statistics.update_issues_rollup(db, db_issue.id, -1)
+
     for key, value in update_data.items():
         setattr(db_issue, key, value)
 
     db.add(db_issue)
+    if rollup_changed:
+        db.flush()
+        crud_statistics.update_issues_rollup(db, db_issue.id, 1)
     db.commit()
     db.refresh(db_issue)
 
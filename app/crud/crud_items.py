@@ -1,35 +1,35 @@
+from collections.abc import Sequence
 from uuid import UUID
 
-from sqlalchemy import Select, or_, select, text
+from sqlalchemy import Select, select, text
 from sqlalchemy.orm import Session
 
+from app.crud.crud_search import apply_search
 from app.models.models import Item, User
 
 
 def get_items(
-    sort_column: str, sort_order: str, search: str | None = None, user_id: int | None = None
+    sort_column: str | None,
+    sort_order: str,
+    search: str | None = None,
+    user_id: int | None = None,
+    lang: str | None = None,
 ) -> Select[tuple[Item]]:
     query = select(Item).where(Item.deleted_at.is_(None))
 
-    search_filters = []
-    if search is not None:
-        search_filters.append(Item.name.ilike(f"%{search}%"))
-        search_filters.append(Item.text.ilike(f"%{search}%"))
-
-        query = query.filter(or_(False, *search_filters))
-
     if user_id is not None:
         query = query.filter(Item.users_item.any(User.id == user_id))
 
-    query = query.order_by(text(f"{sort_column} {sort_order}"))
+    sort = text(f"{sort_column or 'name'} {sort_order}")
+    query = apply_search(query, Item, search, lang, sort, rank_first=sort_column is None)
     return query
     # result = db.execute(query)  # await db.execute(query)
     #
     # return result.scalars().all()
 
 
-def get_item_by_uuid(db: Session, uuid: UUID) -> Item | None:
-    query = select(Item).where(Item.uuid == uuid)
+def get_item_by_uuid(db: Session, uuid: UUID, options: Sequence = ()) -> Item | None:
+    query = select(Item).where(Item.uuid == uuid).options(*options)
 
     result = db.execute(query)  # await db.execute(query)
     return result.scalar_one_or_none()
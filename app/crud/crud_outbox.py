@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.shared_models import NotificationOutbox
+
+
+def add_outbox_message(
+    db: Session, tenant_id: str | None, kind: str, payload: dict, dedup_key: str | None = None
+) -> int | None:
+    """Queue a message in the current transaction, a repeated `dedup_key` is skipped (None), caller commits"""
+    query = (
+        insert(NotificationOutbox)
+        .values(tenant_id=tenant_id, kind=kind, payload=payload, dedup_key=dedup_key)
+        .on_conflict_do_nothing(index_elements=[NotificationOutbox.dedup_key])
+        .returning(NotificationOutbox.id)
+    )
+
+    result = db.execute(query)  # await db.execute(query)
+    return result.scalar_one_or_none()
+
+
+def claim_outbox_messages(db: Session, limit: int, lease: int) -> list:
+    """Take due messages and push their next attempt `lease` seconds ahead, so a crashed dispatcher's
+    messages come back after the lease and concurrent dispatchers skip each other's rows, caller commits.
+
+    Returns plain rows (`id`, `kind`, `payload`, `attempts`), safe to hand over to other threads"""
+    due = (
+        select(NotificationOutbox.id)
+        .where(NotificationOutbox.status == "pending")
+        .where(NotificationOutbox.next_attempt_at <= func.now())
+        .order_by(NotificationOutbox.next_attempt_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    query = (
+        update(NotificationOutbox)
+        .where(NotificationOutbox.id.in_(due.scalar_subquery()))
+        .values(
+            attempts=NotificationOutbox.attempts + 1,
+            next_attempt_at=datetime.now(timezone.utc) + timedelta(seconds=lease),
+        )
+        .returning(
+            NotificationOutbox.id, NotificationOutbox.kind, NotificationOutbox.payload, NotificationOutbox.attempts
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+    result = db.execute(query)  # await db.execute(query)
+    return result.all()
+
+
+def mark_outbox_sent(db: Session, ids: list[int]) -> None:
+    if not ids:
+        return
+
+    query = (
+        update(NotificationOutbox)
+        .where(NotificationOutbox.id.in_(ids))
+        .values(status="sent", sent_at=datetime.now(timezone.utc), last_error=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(query)  # await db.execute(query)
+
+
+def mark_outbox_error(db: Session, id: int, error: str, retry_in: int | None, payload: dict | None = None) -> None:
+    """Retry after `retry_in` seconds, None gives up (`failed`), `payload` replaces the queued one (partial send)"""
+    values = {"last_error": error}
+    if payload is not None:
+        values["payload"] = payload
+    if retry_in is None:
+        values["status"] = "failed"
+    else:
+        values["next_attempt_at"] = datetime.now(timezone.utc) + timedelta(seconds=retry_in)
+
+    query = (
+        update(NotificationOutbox)
+        .where(NotificationOutbox.id == id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(query)  # await db.execute(query)
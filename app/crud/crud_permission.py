@@ -1,15 +1,17 @@
 from collections.abc import Sequence
 from uuid import UUID
 
-from sqlalchemy import func, select, text
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import Session
 
-from app.models.models import Permission, Role, User
+from app.crud.load_profiles import ROLE_RESPONSE
+from app.models.models import Permission, Role, User, role_permission_rel
 
 
-def get_roles_summary(db: Session, search: str, all: bool, sortColumn: str, sortOrder: str):
+def get_roles_summary(sort_column: str, sort_order: str, search: str | None, all: bool) -> Select:
     query = (
         select(
+            Role.id,
             Role.uuid,
             Role.role_title,
             Role.role_description,
@@ -19,10 +21,12 @@ def get_roles_summary(db: Session, search: str, all: bool, sortColumn: str, sort
         )
         .outerjoin(User, User.user_role_id == Role.id)
         .where(Role.deleted_at.is_(None))
-        .group_by(Role.uuid, Role.role_title, Role.role_description, Role.is_custom)
-        .order_by(text(f"{sortColumn} {sortOrder}"))
+        .group_by(Role.id)
     )
 
+    order_column = getattr(Role, sort_column)
+    query = query.order_by(order_column.desc() if sort_order == "desc" else order_column.asc())
+
     all_filters = []
 
     if search is not None:
@@ -32,13 +36,11 @@ def get_roles_summary(db: Session, search: str, all: bool, sortColumn: str, sort
     if (all is not None) and (all is False):
         query = query.where(Role.is_system == False)  # noqa: E712
 
-    result = db.execute(query)  # await db.execute(query)
-
-    return result.all()
+    return query
 
 
 def get_role_by_uuid(db: Session, uuid: UUID) -> Role | None:
-    query = select(Role).where(Role.uuid == uuid).options(selectinload("*"))
+    query = select(Role).where(Role.uuid == uuid).options(*ROLE_RESPONSE)
 
     result = db.execute(query)
 
@@ -67,6 +69,18 @@ def get_permissions(db: Session) -> Sequence[Permission]:
     return result.scalars().all()
 
 
+def get_roles_permission_names(db: Session) -> Sequence[tuple[int, str]]:
+    """`(role_id, permission name)` of roles that are not (soft) deleted"""
+    query = (
+        select(role_permission_rel.c.role_id, Permission.name)
+        .join(Permission, Permission.id == role_permission_rel.c.permission_id)
+        .join(Role, Role.id == role_permission_rel.c.role_id)
+        .where(Role.deleted_at.is_(None))
+    )
+    result = db.execute(query)
+    return result.all()
+
+
 def create_role_with_permissions(db: Session, data: dict) -> Role:
     new_role = Role(**data)
     db.add(new_role)
@@ -1,10 +1,12 @@
 import random
+from datetime import datetime, timezone
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
-from app.models.models import QrCode
+from app.models.models import QrCode, QrCodeId
 from app.models.shared_models import PublicCompany
 
 
@@ -25,11 +27,8 @@ def create_qr_code(db: Session, data: dict) -> QrCode:
     return new_qr_code
 
 
-def generate_custom_unique_id(allowed_chars: str, company_ids):
-    proposed_id = "".join(random.choice(allowed_chars) for _x in range(3))
-    while proposed_id in company_ids:
-        proposed_id = "".join(random.choice(allowed_chars) for _x in range(3))
-    return proposed_id
+def generate_custom_id(allowed_chars: str, length: int) -> str:
+    return "".join(random.choice(allowed_chars) for _x in range(length))
 
 
 def add_noise_to_qr(qr_code: str) -> str:
@@ -37,13 +36,65 @@ def add_noise_to_qr(qr_code: str) -> str:
     return "".join(f"{x}{random.choice(noise) if random.randint(0, 1) else ''}" for x in qr_code)
 
 
-def generate_company_qr_id(db: Session) -> str:
-    company_ids = db.execute(select(PublicCompany.qr_id)).scalars().all()
+def generate_company_qr_id(db: Session, length: int = 3, batch_size: int = 20, rounds: int = 2) -> str:
+    """Check a batch of random candidates with one query, use a longer id when every round is taken"""
     allowed_chars = "abcdefghijkmnopqrstuvwxyz"  # ABCDEFGHJKLMNPRSTUVWXYZ23456789
-    return generate_custom_unique_id(allowed_chars, company_ids)
-
-
-def generate_item_qr_id(db: Session) -> str:
-    items_ids = db.execute(select(QrCode.qr_code_id)).scalars().all()
-    allowed_chars = "abcdefghijkmnopqrstuvwxyz23456789"  # ABCDEFGHJKLMNPRSTUVWXYZ23456789
-    return generate_custom_unique_id(allowed_chars, items_ids)
+    while True:
+        for _round in range(rounds):
+            candidates = {generate_custom_id(allowed_chars, length) for _x in range(batch_size)}
+            taken = db.execute(select(PublicCompany.qr_id).where(PublicCompany.qr_id.in_(candidates))).scalars().all()
+            free = candidates.difference(taken)
+            if free:
+                return free.pop()
+        length += 1
+
+
+# --- QR CODE IDS POOL ---
+
+
+def claim_qr_code_id(db: Session) -> str | None:
+    """Atomically take one free id from the pool, concurrent claims skip each other's rows, caller commits"""
+    free_id = (
+        select(QrCodeId.qr_code_id)
+        .where(QrCodeId.claimed_at.is_(None))
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    query = (
+        update(QrCodeId)
+        .where(QrCodeId.qr_code_id == free_id)
+        .values(claimed_at=datetime.now(timezone.utc))
+        .returning(QrCodeId.qr_code_id)
+        .execution_options(synchronize_session=False)
+    )
+
+    result = db.execute(query)  # await db.execute(query)
+    return result.scalar_one_or_none()
+
+
+def count_free_qr_code_ids(db: Session) -> int:
+    query = select(func.count()).select_from(QrCodeId).where(QrCodeId.claimed_at.is_(None))
+    return db.execute(query).scalar_one()
+
+
+def count_qr_code_ids_by_length(db: Session, length: int) -> int:
+    query = select(func.count()).select_from(QrCodeId).where(func.length(QrCodeId.qr_code_id) == length)
+    return db.execute(query).scalar_one()
+
+
+def add_qr_code_ids(db: Session, qr_code_ids: set[str]) -> int:
+    """Insert new free ids, ids generated before (free or claimed) are skipped, caller commits"""
+    if not qr_code_ids:
+        return 0
+
+    now = datetime.now(timezone.utc)
+    query = (
+        insert(QrCodeId)
+        .values([{"qr_code_id": qr_code_id, "created_at": now} for qr_code_id in qr_code_ids])
+        .on_conflict_do_nothing(index_elements=[QrCodeId.qr_code_id])
+        .returning(QrCodeId.qr_code_id)
+    )
+
+    result = db.execute(query)  # await db.execute(query)
+    return len(result.all())
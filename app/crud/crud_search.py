@@ -0,0 +1,36 @@
+import re
+
+from sqlalchemy import Select, desc, func
+
+# user language -> text search configuration, Postgres ships no Polish stemmer so `simple` is used
+SEARCH_CONFIGS = {"pl": "simple", "en": "english"}
+DEFAULT_SEARCH_CONFIG = "simple"
+
+
+def build_tsquery(search: str, lang: str | None = None):
+    """Prefix query matching all words, e.g. `pompa hydr` -> `pompa:* & hydr:*`, None when nothing to search"""
+    words = re.findall(r"\w+", search)
+    if not words:
+        return None
+
+    config = SEARCH_CONFIGS.get(lang, DEFAULT_SEARCH_CONFIG)
+    return func.to_tsquery(config, " & ".join(f"{word}:*" for word in words))
+
+
+def apply_search(
+    query: Select, model, search: str | None, lang: str | None = None, sort=None, rank_first: bool = False
+) -> Select:
+    """Filter by `search_vector` GIN index and order by `sort`.
+
+    With `rank_first` (no sort picked by the client) best matches come first and `sort` breaks ties,
+    otherwise the rank only breaks ties of `sort`.
+    """
+    tsquery = build_tsquery(search, lang) if search is not None else None
+    if tsquery is None:
+        return query.order_by(sort) if sort is not None else query
+
+    query = query.where(model.search_vector.bool_op("@@")(tsquery))
+    rank = desc(func.ts_rank(model.search_vector, tsquery))
+    if sort is None:
+        return query.order_by(rank)
+    return query.order_by(rank, sort) if rank_first else query.order_by(sort, rank)
@@ -1,9 +1,16 @@
 from datetime import datetime, time, timezone
 
-from sqlalchemy import func, select
+from sqlalchemy import Date, and_, delete, distinct, extract, func, literal, literal_column, select, text
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
-from app.models.models import Event, Issue, Item, User
+from app.models.models import Event, EventSummary, Issue, IssueStatsRollup, Item, User
+
+# GROUPING(date, hour, status) bitmask for each grouping set, bit is set for columns aggregated away
+GROUPING_BY_DAY = 0b011
+GROUPING_BY_HOUR = 0b101
+GROUPING_BY_STATUS = 0b110
+GROUPING_TOTAL = 0b111
 
 
 def get_issues_counter_summary(db: Session):
@@ -11,8 +18,12 @@ def get_issues_counter_summary(db: Session):
 
     date_from = datetime.combine(datetime.now(timezone.utc), time.min)
 
-    query = select(Issue.status, func.count(Issue.status)).group_by(Issue.status)
-    query = query.filter(func.DATE(Issue.created_at) >= date_from)
+    query = (
+        select(IssueStatsRollup.status, func.sum(IssueStatsRollup.count))
+        .where(IssueStatsRollup.day >= date_from)
+        .group_by(IssueStatsRollup.status)
+        .having(func.sum(IssueStatsRollup.count) > 0)
+    )
 
     result = db.execute(query)  # await db.execute(query)
     return result.all()
@@ -46,3 +57,160 @@ def get_events(db: Session):
     result = db.execute(query)  # await db.execute(query)
 
     return result.all()
+
+
+def get_item_issues_aggregates(db: Session, item_id: int, date_from: datetime = None, date_to: datetime = None):
+    """Issues per day, per hour, per status and in total for an item in one grouped pass.
+
+    Date range is applied as aggregate FILTER so the total still counts every issue of the item.
+    """
+    issue_date = Issue.created_at.cast(Date)
+    issue_hour = extract("hour", Issue.created_at)
+
+    in_range = []
+    if date_from is not None:
+        in_range.append(func.DATE(Issue.created_at) >= date_from)
+    if date_to is not None:
+        in_range.append(func.DATE(Issue.created_at) <= date_to)
+
+    counter = func.count(distinct(Issue.id))
+    if in_range:
+        counter = counter.filter(and_(*in_range))
+
+    query = (
+        select(
+            func.grouping(issue_date, issue_hour, Issue.status).label("grouping"),
+            issue_date.label("date"),
+            issue_hour.label("hour"),
+            Issue.status.label("status"),
+            counter.label("count"),
+            func.count(distinct(Issue.id)).label("total"),
+        )
+        .where(Issue.item_id == item_id)
+        .group_by(func.grouping_sets(issue_date, issue_hour, Issue.status, text("()")))
+    )
+
+    result = db.execute(query)  # await db.execute(query)
+    return result.all()
+
+
+def get_item_event_summary_aggregates(db: Session, item_id: int, actions: list[str]):
+    """Duration max/avg/min and distinct internal values (user uuids) per action for issues of an item"""
+    item_issues = select(Issue.uuid).where(Issue.item_id == item_id)
+
+    query = (
+        select(
+            EventSummary.action,
+            func.max(EventSummary.duration),
+            func.avg(EventSummary.duration),
+            func.min(EventSummary.duration),
+            func.array_agg(distinct(EventSummary.internal_value)),
+        )
+        .where(EventSummary.resource == "issue")
+        .where(EventSummary.resource_uuid.in_(item_issues))
+        .where(EventSummary.action.in_(actions))
+        .group_by(EventSummary.action)
+    )
+
+    result = db.execute(query)  # await db.execute(query)
+    return result.all()
+
+
+# --- ROLLUP ---
+
+ROLLUP_COLUMNS = ["day", "hour", "status", "item_id", "count"]
+
+
+def _rollup_upsert(source):
+    """INSERT ... SELECT into the rollup, adding counts to existing (day, hour, status, item) buckets"""
+    stmt = insert(IssueStatsRollup).from_select(ROLLUP_COLUMNS, source)
+    return stmt.on_conflict_do_update(
+        index_elements=[
+            IssueStatsRollup.day,
+            IssueStatsRollup.hour,
+            func.coalesce(IssueStatsRollup.status, literal_column("''")),
+            func.coalesce(IssueStatsRollup.item_id, literal_column("0")),
+        ],
+        set_={"count": IssueStatsRollup.count + stmt.excluded.count},
+    )
+
+
+def issue_rollup_statement(issue_id: int, delta: int):
+    """Add `delta` to the bucket of the issue as currently stored in DB"""
+    source = (
+        select(
+            Issue.created_at.cast(Date),
+            extract("hour", Issue.created_at),
+            Issue.status,
+            Issue.item_id,
+            literal(delta),
+        )
+        .where(Issue.id == issue_id)
+        .where(Issue.created_at.is_not(None))
+    )
+    return _rollup_upsert(source)
+
+
+def update_issues_rollup(db: Session, issue_id: int, delta: int) -> None:
+    """Caller commits, so the counter moves together with the issue row"""
+    db.execute(issue_rollup_statement(issue_id, delta))
+
+
+def move_item_issues_rollup(db: Session, item_id: int) -> None:
+    """Issues of a removed item lose their `item_id`, move their buckets accordingly, caller commits"""
+    source = select(
+        IssueStatsRollup.day, IssueStatsRollup.hour, IssueStatsRollup.status, literal(None), IssueStatsRollup.count
+    ).where(IssueStatsRollup.item_id == item_id)
+    db.execute(_rollup_upsert(source))
+    db.execute(delete(IssueStatsRollup).where(IssueStatsRollup.item_id == item_id))
+
+
+def rebuild_issues_rollup(db: Session) -> int:
+    issue_date = Issue.created_at.cast(Date)
+    issue_hour = extract("hour", Issue.created_at)
+
+    source = (
+        select(issue_date, issue_hour, Issue.status, Issue.item_id, func.count(Issue.id))
+        .where(Issue.created_at.is_not(None))
+        .group_by(issue_date, issue_hour, Issue.status, Issue.item_id)
+    )
+
+    db.execute(delete(IssueStatsRollup))
+    db.execute(insert(IssueStatsRollup).from_select(ROLLUP_COLUMNS, source))
+    db.commit()
+
+    return db.execute(select(func.count(IssueStatsRollup.id))).scalar_one()
+
+
+def _rollup_dates(query, date_from: datetime = None, date_to: datetime = None):
+    if date_from is not None:
+        query = query.where(IssueStatsRollup.day >= date_from)
+
+    if date_to is not None:
+        query = query.where(IssueStatsRollup.day <= date_to)
+
+    return query.having(func.sum(IssueStatsRollup.count) > 0)
+
+
+def get_rollup_issues_by_day(db: Session, date_from: datetime = None, date_to: datetime = None):
+    query = select(IssueStatsRollup.day, func.sum(IssueStatsRollup.count)).group_by(IssueStatsRollup.day)
+    query = _rollup_dates(query, date_from, date_to)
+
+    result = db.execute(query)  # await db.execute(query)
+    return result.all()
+
+
+def get_rollup_issues_by_hour(db: Session, date_from: datetime = None, date_to: datetime = None):
+    query = select(IssueStatsRollup.hour, func.sum(IssueStatsRollup.count)).group_by(IssueStatsRollup.hour)
+    query = _rollup_dates(query, date_from, date_to)
+
+    result = db.execute(query)  # await db.execute(query)
+    return result.all()
+
+
+def get_rollup_issues_status(db: Session, date_from: datetime = None, date_to: datetime = None):
+    query = select(IssueStatsRollup.status, func.sum(IssueStatsRollup.count)).group_by(IssueStatsRollup.status)
+    query = _rollup_dates(query, date_from, date_to)
+
+    result = db.execute(query)  # await db.execute(query)
+    return result.all()
@@ -3,6 +3,7 @@ from uuid import UUID
 from sqlalchemy import not_, select, text
 from sqlalchemy.orm import Session
 
+from app.crud.crud_common import Resolved, resolve_uuids
 from app.models.models import Tag
 
 
@@ -27,6 +28,10 @@ def get_tag_by_uuid(db: Session, uuid: UUID) -> Tag | None:
     return result.scalar_one_or_none()
 
 
+def get_tags_by_uuids(db: Session, uuids: list[UUID]) -> Resolved:
+    return resolve_uuids(db, Tag, uuids)
+
+
 def get_tag_by_name(db: Session, name: str) -> Tag | None:
     query = select(Tag).where(Tag.name == name).where(Tag.deleted_at.is_(None))
 
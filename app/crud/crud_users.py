@@ -1,10 +1,13 @@
 from uuid import UUID
 
 from pydantic import EmailStr
-from sqlalchemy import Select, func, select, text
+from sqlalchemy import Select, func, select, text, union
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
+from app.crud.crud_common import Resolved, resolve_uuids
 from app.models.models import User
+from app.models.shared_models import PublicUser
 
 
 def get_users(sort_column: str, sort_order: str, search: str | None = None) -> Select[tuple[User]]:
@@ -35,6 +38,10 @@ def get_user_by_uuid(db: Session, uuid: UUID) -> User:
     return result.scalar_one_or_none()
 
 
+def get_users_by_uuids(db: Session, uuids: list[UUID]) -> Resolved:
+    return resolve_uuids(db, User, uuids)
+
+
 def get_users_by_role_id(db: Session, id: int):
     query = (
         select(User.uuid, User.first_name, User.last_name)
@@ -87,11 +94,29 @@ def create_user(db: Session, data: dict) -> User:
     return new_user
 
 
-def bulk_insert(db: Session, data: dict) -> bool:
-    db.bulk_insert_mappings(User, data)
-    db.commit()
+def get_existing_emails(db: Session, emails: list[str]) -> set[str]:
+    """Lower cased `emails` taken by a user of the tenant or by any account (login looks users up by email)"""
+    emails = [email.lower() for email in emails]
+    if not emails:
+        return set()
+
+    tenant_emails = select(func.lower(User.email)).where(func.lower(User.email).in_(emails))
+    public_emails = select(func.lower(PublicUser.email)).where(func.lower(PublicUser.email).in_(emails))
+    query = union(tenant_emails, public_emails)
+
+    result = db.execute(query)  # await db.execute(query)
+    return set(result.scalars().all())
+
+
+def bulk_insert(db: Session, data: list[dict]) -> list[UUID]:
+    """Multi-row `INSERT ... ON CONFLICT DO NOTHING`, returns uuids of inserted rows, caller commits"""
+    if not data:
+        return []
+
+    query = insert(User).on_conflict_do_nothing().returning(User.uuid)
 
-    return True
+    result = db.execute(query, data)  # await db.execute(query, data)
+    return list(result.scalars().all())
 
 
 def update_user(db: Session, db_user: User, update_data: dict) -> User:
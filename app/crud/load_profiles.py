@@ -0,0 +1,46 @@
+"""Eager loading profiles - relationships each response schema serializes, loaded up front.
+
+Many-to-one relations are joined, collections use `selectinload` (one `IN (...)` query per relation),
+so a single object costs a fixed number of queries and a page of objects does not grow with its size.
+"""
+
+from sqlalchemy.orm import joinedload, selectinload
+
+from app.models.models import Guide, Issue, Item, Role, User, UserGroup
+
+# IssueIndexResponse
+ISSUE_INDEX = (selectinload(Issue.item), selectinload(Issue.users_issue))
+
+# IssueResponse
+ISSUE_RESPONSE = (
+    joinedload(Issue.item),
+    selectinload(Issue.users_issue),
+    selectinload(Issue.files_issue),
+    selectinload(Issue.tags_issue),
+)
+
+# ItemResponse
+ITEM_RESPONSE = (
+    joinedload(Item.qr_code),
+    selectinload(Item.files_item),
+    selectinload(Item.item_guides),
+    selectinload(Item.users_item),
+)
+
+# GuideResponse (listing)
+GUIDE_INDEX = (selectinload(Guide.item),)
+
+# GuideResponse + `files_guide` for presigned urls
+GUIDE_RESPONSE = (selectinload(Guide.item), selectinload(Guide.files_guide))
+
+# UserIndexResponse
+USER_INDEX = (selectinload(User.role_FK),)
+
+# UserLoginOut, UserVerifyToken
+USER_LOGIN = (joinedload(User.role_FK).selectinload(Role.permission),)
+
+# RolePermissionFull
+ROLE_RESPONSE = (selectinload(Role.permission),)
+
+# GroupResponse
+GROUP_RESPONSE = (selectinload(UserGroup.users),)
@@ -1,6 +1,5 @@
 import time
-from contextlib import contextmanager
-from functools import lru_cache
+from contextlib import asynccontextmanager, contextmanager
 from typing import Annotated
 
 import sqlalchemy as sa
@@ -8,10 +7,18 @@ from fastapi import Depends, Request
 from loguru import logger
 from sqlalchemy import create_engine, event, select
 from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import Session, declarative_base
 
 from app.config import get_settings
 from app.models.shared_models import PublicCompany
+from app.service.db_metrics import (
+    MeteredAsyncAdaptedQueuePool,
+    MeteredQueuePool,
+    register_pool_metrics,
+    register_query_cache_metrics,
+)
+from app.utils.cache import TTLCache
 
 settings = get_settings()
 
@@ -56,7 +63,28 @@ if settings.ENVIRONMENT != "PRD":
     echo = False
 
 # TODO: https://bitestreams.com/nl/blog/fastapi_sqlalchemy/
-engine = create_engine(SQLALCHEMY_DB_URL, echo=echo, pool_pre_ping=True, pool_recycle=280)
+pool_options = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_POOL_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    "query_cache_size": settings.DB_QUERY_CACHE_SIZE,
+}
+
+async_pool_options = pool_options | {
+    "pool_size": settings.DB_ASYNC_POOL_SIZE,
+    "max_overflow": settings.DB_ASYNC_POOL_MAX_OVERFLOW,
+}
+
+engine = create_engine(SQLALCHEMY_DB_URL, echo=echo, poolclass=MeteredQueuePool, **pool_options)
+async_engine = create_async_engine(
+    SQLALCHEMY_DB_URL, echo=echo, poolclass=MeteredAsyncAdaptedQueuePool, **async_pool_options
+)
+register_pool_metrics(engine)
+register_pool_metrics(async_engine.sync_engine)
+register_query_cache_metrics(engine)
+register_query_cache_metrics(async_engine.sync_engine)
 
 # print(SQLALCHEMY_DB_URL)
 
@@ -70,8 +98,60 @@ class TenantNotFoundError(Exception):
         super().__init__(self.message)
 
 
-@lru_cache
+tenant_cache = TTLCache(maxsize=settings.TENANT_CACHE_SIZE, ttl=settings.TENANT_CACHE_TTL)
+
+
+def get_tenant_by_id(tenant_id: str) -> PublicCompany | None:
+    tenant = tenant_cache.get(tenant_id)
+    if tenant is not None:
+        return tenant
+
+    with with_db(None) as db:
+        query = select(PublicCompany).where(PublicCompany.tenant_id == tenant_id)
+
+        result = db.execute(query)
+        tenant = result.scalar_one_or_none()
+
+    if tenant is not None:
+        tenant_cache.set(tenant_id, tenant)
+    return tenant
+
+
+def invalidate_tenant(tenant_id: str) -> None:
+    tenant_cache.invalidate(tenant_id)
+
+
+def get_session_tenant(db: Session) -> str | None:
+    """Tenant schema the session is bound to"""
+    schema_translate_map = db.get_bind().get_execution_options().get("schema_translate_map") or {}
+    return schema_translate_map.get("tenant")
+
+
+# tenant -> engine with `schema_translate_map`, reused instead of a new option engine per session
+tenant_engines = TTLCache(maxsize=settings.DB_TENANT_ENGINE_CACHE_SIZE, ttl=None)
+
+
+def get_tenant_engine(tenant_schema: str | None) -> Engine:
+    """Engine bound to `tenant_schema` (None - no translation), shares pool and compiled cache with `engine`"""
+    connectable = tenant_engines.get(("sync", tenant_schema))
+    if connectable is None:
+        schema_translate_map = {"tenant": tenant_schema} if tenant_schema else None
+        connectable = engine.execution_options(schema_translate_map=schema_translate_map)
+        tenant_engines.set(("sync", tenant_schema), connectable)
+    return connectable
+
+
+def get_async_tenant_engine(tenant_schema: str | None) -> AsyncEngine:
+    connectable = tenant_engines.get(("async", tenant_schema))
+    if connectable is None:
+        schema_translate_map = {"tenant": tenant_schema} if tenant_schema else None
+        connectable = async_engine.execution_options(schema_translate_map=schema_translate_map)
+        tenant_engines.set(("async", tenant_schema), connectable)
+    return connectable
+
+
 def get_tenant(request: Request) -> PublicCompany | None:
+    tenant = None
     try:
         # host_without_port = request.headers["host"].split(":", 1)[0] # based on domain: __abc__.domain.com
         host_without_port = request.headers.get("tenant")  # based on tenant header: abc
@@ -79,11 +159,7 @@ def get_tenant(request: Request) -> PublicCompany | None:
         if host_without_port is None:
             return None
 
-        with with_db(None) as db:
-            query = select(PublicCompany).where(PublicCompany.tenant_id == host_without_port)
-
-            result = db.execute(query)
-            tenant = result.scalar_one_or_none()
+        tenant = get_tenant_by_id(host_without_port)
 
         if tenant is None:
             # raise TenantNotFoundError(host_without_port)
@@ -96,6 +172,7 @@ def get_tenant(request: Request) -> PublicCompany | None:
 def get_db(tenant: Annotated[PublicCompany, Depends(get_tenant)]):
     if tenant is None:
         yield None
+        return
 
     with with_db(tenant.tenant_id) as db:
         yield db
@@ -109,12 +186,7 @@ def get_public_db():
 
 @contextmanager
 def with_db(tenant_schema: str | None):
-    if tenant_schema:
-        schema_translate_map = {"tenant": tenant_schema}
-    else:
-        schema_translate_map = None
-
-    connectable = engine.execution_options(schema_translate_map=schema_translate_map)
+    connectable = get_tenant_engine(tenant_schema)
     try:
         db = Session(autocommit=False, autoflush=False, bind=connectable)
         yield db
@@ -124,3 +196,25 @@ def with_db(tenant_schema: str | None):
         raise
     finally:
         db.close()
+
+
+# --- ASYNC ---
+
+
+async def get_async_public_db():
+    async with with_async_db("public") as db:
+        yield db
+
+
+@asynccontextmanager
+async def with_async_db(tenant_schema: str | None):
+    connectable = get_async_tenant_engine(tenant_schema)
+    db = AsyncSession(autoflush=False, bind=connectable, expire_on_commit=False)
+    try:
+        yield db
+    except Exception as e:
+        logger.error(e)
+        print("ERRRR: " + str(tenant_schema))
+        raise
+    finally:
+        await db.close()
@@ -23,6 +23,8 @@ from app.api.users_groups import group_router
 from app.api.users_permissions import permission_router
 from app.config import get_settings
 from app.service.health_check import test_db
+from app.service.outbox import start_outbox_dispatcher
+from app.service.password import shutdown_password_pool
 from app.service.scheduler import scheduler, start_scheduler
 from app.service.tenants import alembic_upgrade_head
 from app.storage.s3 import S3Storage
@@ -124,6 +126,7 @@ def welcome_message(text: str):
 
 
 start_scheduler(app)
+start_outbox_dispatcher()
 job = scheduler.add_job(welcome_message, args=["Everything OK, application is running correctly"])
 
 
@@ -131,6 +134,7 @@ job = scheduler.add_job(welcome_message, args=["Everything OK, application is ru
 def shutdown_event():
     logger.info("👋 Bye!")
     print("👋 Bye!")
+    shutdown_password_pool()
     # scheduler.shutdown()
 
 
@@ -1,9 +1,20 @@
 import sqlalchemy as sa
-from sqlalchemy.dialects.postgresql import JSONB, UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR, UUID
+from sqlalchemy.orm import deferred, relationship
 
 from app.db import Base
 
+
+def search_vector_sql(**weighted_columns: str) -> str:
+    """Generated `tsvector` over columns ({column: weight}), `simple` (pl, no stemming) and `english` lexemes"""
+    parts = [
+        f"setweight(to_tsvector('{config}'::regconfig, coalesce({column}, '')), '{weight}')"
+        for column, weight in weighted_columns.items()
+        for config in ("simple", "english")
+    ]
+    return " || ".join(parts)
+
+
 role_permission_rel = sa.Table(
     "roles_permissions_link",
     Base.metadata,
@@ -192,6 +203,9 @@ class Item(Base):
     created_at = sa.Column(sa.TIMESTAMP(timezone=True), autoincrement=False, nullable=True)
     updated_at = sa.Column(sa.TIMESTAMP(timezone=True), autoincrement=False, nullable=True)
     deleted_at = sa.Column(sa.TIMESTAMP(timezone=True), autoincrement=False, nullable=True)
+    search_vector = deferred(
+        sa.Column(TSVECTOR, sa.Computed(search_vector_sql(name="A", summary="B", text="C"), persisted=True))
+    )
 
     files_item = relationship("File", secondary=file_item_rel, back_populates="item")
     item_guides = relationship("Guide", secondary=item_guide_rel, back_populates="item")
@@ -226,6 +240,7 @@ class Guide(Base):
     created_at = sa.Column(sa.TIMESTAMP(timezone=True), autoincrement=False, nullable=True)
     updated_at = sa.Column(sa.TIMESTAMP(timezone=True), autoincrement=False, nullable=True)
     deleted_at = sa.Column(sa.TIMESTAMP(timezone=True), autoincrement=False, nullable=True)
+    search_vector = deferred(sa.Column(TSVECTOR, sa.Computed(search_vector_sql(name="A", text="C"), persisted=True)))
 
     files_guide = relationship("File", secondary=file_guide_rel, back_populates="guide")
     item = relationship("Item", secondary=item_guide_rel, back_populates="item_guides")
@@ -254,6 +269,10 @@ tag_issue_rel = sa.Table(
 # )
 
 
+# Source of `PR-<n>` issue symbols, lives in the tenant schema next to `issues`
+issues_symbol_seq = sa.Sequence("issues_symbol_seq", metadata=Base.metadata)
+
+
 class Issue(Base):
     __tablename__ = "issues"
     id = sa.Column(sa.INTEGER(), sa.Identity(), primary_key=True, autoincrement=True, nullable=False)
@@ -273,6 +292,9 @@ class Issue(Base):
     created_at = sa.Column(sa.TIMESTAMP(timezone=True), autoincrement=False, nullable=True)
     updated_at = sa.Column(sa.TIMESTAMP(timezone=True), autoincrement=False, nullable=True)
     deleted_at = sa.Column(sa.TIMESTAMP(timezone=True), autoincrement=False, nullable=True)
+    search_vector = deferred(
+        sa.Column(TSVECTOR, sa.Computed(search_vector_sql(name="A", summary="B", text="C"), persisted=True))
+    )
 
     files_issue = relationship("File", secondary=file_issue_rel, back_populates="issue")
     users_issue = relationship("User", secondary=users_issues_rel, back_populates="problem")
@@ -282,6 +304,27 @@ class Issue(Base):
     # part = relationship("PartUsed", secondary=part_used_issue_rel, back_populates="issue_part")
 
 
+class IssueStatsRollup(Base):
+    __tablename__ = "issues_stats_rollup"
+    id = sa.Column(sa.INTEGER(), sa.Identity(), primary_key=True, autoincrement=True, nullable=False)
+    day = sa.Column(sa.DATE(), autoincrement=False, nullable=False)
+    hour = sa.Column(sa.SMALLINT(), autoincrement=False, nullable=False)
+    status = sa.Column(sa.VARCHAR(length=256), autoincrement=False, nullable=True)
+    item_id = sa.Column(sa.INTEGER(), autoincrement=False, nullable=True)
+    count = sa.Column(sa.INTEGER(), autoincrement=False, nullable=False, server_default="0")
+
+    __table_args__ = (
+        sa.Index(
+            "issues_stats_rollup_key",
+            "day",
+            "hour",
+            sa.func.coalesce(status, ""),
+            sa.func.coalesce(item_id, 0),
+            unique=True,
+        ),
+    )
+
+
 class PartUsed(Base):
     __tablename__ = "parts_used"
     id = sa.Column(sa.INTEGER(), sa.Identity(), primary_key=True, autoincrement=True, nullable=False)
@@ -375,6 +418,15 @@ class QrCode(Base):
     guides_FK = relationship("Guide", back_populates="qr_code")
 
 
+class QrCodeId(Base):
+    """Every generated item/guide QR id, rows with empty `claimed_at` are the free pool"""
+
+    __tablename__ = "qr_code_ids_pool"
+    qr_code_id = sa.Column(sa.VARCHAR(length=32), primary_key=True, autoincrement=False, nullable=False)
+    claimed_at = sa.Column(sa.TIMESTAMP(timezone=True), autoincrement=False, nullable=True)
+    created_at = sa.Column(sa.TIMESTAMP(timezone=True), autoincrement=False, nullable=True)
+
+
 class UserGroup(Base):
     __tablename__ = "users_groups"
     id = sa.Column(sa.INTEGER(), sa.Identity(), primary_key=True, autoincrement=True, nullable=False)
@@ -1,7 +1,7 @@
 from uuid import uuid4
 
 import sqlalchemy as sa
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import declarative_base
 
 metadata = sa.MetaData(schema="shared")
@@ -54,3 +54,19 @@ class PublicCompany(Base):
     created_at = sa.Column(sa.TIMESTAMP(timezone=True), autoincrement=False, nullable=True)
     updated_at = sa.Column(sa.TIMESTAMP(timezone=True), autoincrement=False, nullable=True)
     __table_args__ = {"schema": "public"}
+
+
+class NotificationOutbox(Base):
+    __tablename__ = "notification_outbox"
+    id = sa.Column(sa.BIGINT(), sa.Identity(), primary_key=True, autoincrement=True, nullable=False)
+    tenant_id = sa.Column(sa.VARCHAR(length=256), autoincrement=False, nullable=True)
+    kind = sa.Column(sa.VARCHAR(length=64), autoincrement=False, nullable=False)
+    dedup_key = sa.Column(sa.VARCHAR(length=256), autoincrement=False, nullable=True, unique=True)
+    payload = sa.Column(JSONB, autoincrement=False, nullable=False)
+    status = sa.Column(sa.VARCHAR(length=16), autoincrement=False, nullable=False, server_default="pending")
+    attempts = sa.Column(sa.INTEGER(), autoincrement=False, nullable=False, server_default="0")
+    next_attempt_at = sa.Column(sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.func.now())
+    last_error = sa.Column(sa.TEXT(), autoincrement=False, nullable=True)
+    created_at = sa.Column(sa.TIMESTAMP(timezone=True), nullable=False, server_default=sa.func.now())
+    sent_at = sa.Column(sa.TIMESTAMP(timezone=True), autoincrement=False, nullable=True)
+    __table_args__ = {"schema": "public"}
@@ -1,7 +1,7 @@
 # from typing import list
 from uuid import UUID
 
-from pydantic import BaseModel, EmailStr, condecimal
+from pydantic import BaseModel, EmailStr, PositiveInt, condecimal, constr
 from pydantic_extra_types.color import Color
 
 
@@ -58,6 +58,16 @@ class UserCreateIn(BaseRequest):
     user_role_uuid: UUID | None = None
 
 
+class UserImportRow(BaseRequest):
+    # one CSV line of `POST /users/import`, headers as in `/users/export` ("First Name") or snake case
+    first_name: constr(strip_whitespace=True, min_length=1, max_length=100)
+    last_name: constr(strip_whitespace=True, min_length=1, max_length=100)
+    email: EmailStr
+    phone: constr(strip_whitespace=True, max_length=16) | None = None
+    password: str | None = None
+    role: str | None = None
+
+
 class IdeaAddIn(BaseRequest):
     name: str
     summary: str | None = None
@@ -227,3 +237,22 @@ class PartEditIn(BaseRequest):
     quantity: condecimal(max_digits=4, decimal_places=2) | None = None
     unit: str | None = None
     value: condecimal(max_digits=10, decimal_places=2) | None = None
+
+
+class FileUploadIn(BaseRequest):
+    file_name: str
+    mimetype: str
+    size: PositiveInt
+
+
+class FileUploadPart(BaseRequest):
+    part_number: int
+    etag: str
+
+
+class FileUploadCompleteIn(BaseRequest):
+    file_name: str
+    mimetype: str
+    size: PositiveInt
+    upload_id: str | None = None
+    parts: list[FileUploadPart] | None = None
@@ -1,14 +1,25 @@
 from datetime import datetime
+from typing import Generic, TypeVar
 from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict, condecimal
 from pydantic_extra_types.color import Color
 
+T = TypeVar("T")
+
 
 class BaseResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class CursorPage(BaseResponse, Generic[T]):
+    items: list[T]
+    size: int
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+    total: int | None = None
+
+
 class StandardResponse(BaseResponse):
     ok: bool
 
@@ -80,6 +91,11 @@ class UserIndexResponse(BaseResponse):
     role_FK: RoleBasic
 
 
+class UserImportResponse(BaseResponse):
+    inserted: int
+    skipped: list[str]
+
+
 class FileResponse(BaseResponse):
     uuid: UUID
     file_name: str
@@ -89,6 +105,20 @@ class FileResponse(BaseResponse):
     url: str | None = None
 
 
+class FileUploadPartUrl(BaseResponse):
+    part_number: int
+    url: str
+
+
+class FileUploadResponse(BaseResponse):
+    uuid: UUID
+    url: str | None = None
+    fields: dict | None = None
+    upload_id: str | None = None
+    part_size: int | None = None
+    parts: list[FileUploadPartUrl] | None = None
+
+
 class SettingBase(BaseResponse):
     id: int
     account_id: int
@@ -1,5 +1,8 @@
 import base64
+from dataclasses import dataclass
+from datetime import datetime, timezone
 from typing import Annotated
+from uuid import UUID
 
 import pendulum
 from fastapi import Depends, HTTPException
@@ -8,8 +11,10 @@ from sqlalchemy.orm import Session
 
 from app.config import get_settings
 from app.crud import crud_auth
-from app.db import get_db
+from app.db import get_db, get_tenant
 from app.models.models import User
+from app.models.shared_models import PublicCompany
+from app.utils.cache import TTLCache
 
 settings = get_settings()
 security = HTTPBearer()
@@ -17,6 +22,41 @@ security = HTTPBearer()
 UserDB = Annotated[Session, Depends(get_db)]
 
 
+@dataclass(frozen=True)
+class Principal:
+    """Authenticated user of a request, detached from any session (no relations, no token or password)"""
+
+    id: int
+    uuid: UUID
+    lang: str | None = None
+    user_role_id: int | None = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, uuid=user.uuid, lang=user.lang, user_role_id=user.user_role_id)
+
+
+# (tenant_id, token) -> Principal, cached principal never outlives `auth_token_valid_to`
+token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL)
+invalid_token_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_NEGATIVE_CACHE_TTL)
+
+
+def cache_principal(key: tuple, principal: Principal, valid_to: datetime | None) -> None:
+    ttl = settings.TOKEN_CACHE_TTL
+    if valid_to is not None:
+        ttl = min(ttl, (valid_to - datetime.now(timezone.utc)).total_seconds())
+    if ttl <= 0:
+        return
+
+    token_cache.set(key, principal, ttl=ttl)
+
+
+def invalidate_user_tokens(tenant_id: str | None, user_uuid: UUID | str) -> int:
+    """Drop cached principals of a user, call after logout, password change, user edit or delete"""
+    user_uuid = str(user_uuid)
+    return token_cache.invalidate_if(lambda key, value: key[0] == tenant_id and str(value.uuid) == user_uuid)
+
+
 def is_base64(sb: str) -> bool:
     try:
         if isinstance(sb, str):
@@ -34,7 +74,12 @@ def is_base64(sb: str) -> bool:
         return False
 
 
-def has_token(*, db: UserDB, credentials: Annotated[HTTPBasicCredentials, Depends(security)]) -> User:
+def has_token(
+    *,
+    db: UserDB,
+    tenant: Annotated[PublicCompany | None, Depends(get_tenant)],
+    credentials: Annotated[HTTPBasicCredentials, Depends(security)],
+) -> Principal:
     """
     Function that is used to validate the token in the case that it requires it
     """
@@ -46,12 +91,22 @@ def has_token(*, db: UserDB, credentials: Annotated[HTTPBasicCredentials, Depend
     if token is None:
         raise HTTPException(status_code=401, detail="Missing auth token")
 
+    cache_key = (tenant.tenant_id if tenant else None, token)
+    principal = token_cache.get(cache_key)
+    if principal is not None:
+        return principal
+
+    if invalid_token_cache.get(cache_key) is not None:
+        raise HTTPException(status_code=401, detail="Incorrect auth token")
+
     db_user_data = crud_auth.get_tenant_user_by_auth_token(db, token)
 
     if db_user_data is not None:
         # user_id, account_id = db_user_data
         # return {"user_id": db_user_data.id}
-        return db_user_data
+        principal = Principal.from_user(db_user_data)
+        cache_principal(cache_key, principal, db_user_data.auth_token_valid_to)
+        return principal
 
     if is_base64(token) and (db_user_data is None):
         base64_message = token
@@ -65,8 +120,14 @@ def has_token(*, db: UserDB, credentials: Annotated[HTTPBasicCredentials, Depend
         if dt.diff(pendulum.now("UTC")).in_seconds() < 1:
             raise HTTPException(status_code=401, detail="Anonymous token expired")
 
-        return crud_auth.get_anonymous_user(db)
+        db_anonymous_user = crud_auth.get_anonymous_user(db)
+        if db_anonymous_user is None:
+            raise HTTPException(status_code=401, detail="Incorrect auth token")
+        principal = Principal.from_user(db_anonymous_user)
+        cache_principal(cache_key, principal, dt)
+        return principal
 
+    invalid_token_cache.set(cache_key, True)
     raise HTTPException(status_code=401, detail="Incorrect auth token")
 
 
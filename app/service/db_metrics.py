@@ -0,0 +1,174 @@
+import threading
+from time import perf_counter
+
+from loguru import logger
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+UNKNOWN_TENANT = "unknown"
+
+
+class PoolMetrics:
+    """Connection pool counters broken down by tenant schema (taken from `schema_translate_map`)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tenants: dict[str, dict] = {}
+        self.timeouts = 0
+        self.overflow_created = 0
+
+    def _tenant(self, tenant: str) -> dict:
+        return self._tenants.setdefault(
+            tenant, {"checkouts": 0, "waits": 0, "in_use": 0, "checkout_time_total": 0.0, "checkout_time_max": 0.0}
+        )
+
+    def record_overflow(self) -> None:
+        with self._lock:
+            self.overflow_created += 1
+
+    def record_checkout(self, tenant: str, waited: bool = False, latency: float = 0.0) -> None:
+        with self._lock:
+            stats = self._tenant(tenant)
+            stats["checkouts"] += 1
+            stats["in_use"] += 1
+            stats["waits"] += int(waited)
+            stats["checkout_time_total"] += latency
+            stats["checkout_time_max"] = max(stats["checkout_time_max"], latency)
+
+    def record_checkin(self, tenant: str) -> None:
+        with self._lock:
+            stats = self._tenant(tenant)
+            stats["in_use"] = max(stats["in_use"] - 1, 0)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+            holders = {tenant: stats["in_use"] for tenant, stats in self._tenants.items() if stats["in_use"]}
+        logger.error(f"Connection pool timeout, connections in use by tenant: {holders}")
+
+    def snapshot(self, *pools: Pool) -> dict:
+        with self._lock:
+            tenants = {}
+            for tenant, stats in self._tenants.items():
+                checkouts = stats["checkouts"]
+                tenants[tenant] = {
+                    "checkouts": checkouts,
+                    "waits": stats["waits"],
+                    "in_use": stats["in_use"],
+                    "checkout_time_avg_ms": round(stats["checkout_time_total"] / checkouts * 1000, 3)
+                    if checkouts
+                    else 0,
+                    "checkout_time_max_ms": round(stats["checkout_time_max"] * 1000, 3),
+                }
+
+            return {
+                "pools": [
+                    {
+                        "class": type(pool).__name__,
+                        "size": pool.size(),
+                        "checked_out": pool.checkedout(),
+                        "overflow": pool.overflow(),
+                        "status": pool.status(),
+                    }
+                    for pool in pools
+                ],
+                "timeouts": self.timeouts,
+                "overflow_created": self.overflow_created,
+                "tenants": tenants,
+            }
+
+
+pool_metrics = PoolMetrics()
+
+
+class QueryCacheMetrics:
+    """SQL compilation cache lookups of executed statements (`ExecutionContext.cache_hit`)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+
+    def record(self, cache_hit) -> None:
+        with self._lock:
+            if cache_hit is CACHE_HIT:
+                self.hits += 1
+            elif cache_hit is CACHE_MISS:
+                self.misses += 1
+            else:
+                self.uncached += 1
+
+    def snapshot(self, *engines: Engine) -> dict:
+        caches = [engine._compiled_cache for engine in engines if engine._compiled_cache is not None]
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": sum(len(cache) for cache in caches),
+                "maxsize": sum(cache.capacity for cache in caches),
+                "hits": self.hits,
+                "misses": self.misses,
+                "uncached": self.uncached,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+query_cache_metrics = QueryCacheMetrics()
+
+
+class MeteredPoolMixin:
+    """Measures how long `QueuePool` blocks before handing out a connection"""
+
+    def _do_get(self):
+        started_at = perf_counter()
+        idle = not self._pool.empty()
+        overflow_left = self._max_overflow == -1 or self._overflow < self._max_overflow
+        # `_overflow` starts at -pool_size, connections above zero are the overflow ones
+        overflow = not idle and overflow_left and self._overflow >= 0
+        if overflow:
+            pool_metrics.record_overflow()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record_timeout()
+            raise
+        # kept on the connection record, async checkouts interleave on one thread
+        connection.info["metrics_checkout"] = (not idle and not overflow_left, perf_counter() - started_at)
+        return connection
+
+
+class MeteredQueuePool(MeteredPoolMixin, QueuePool):
+    pass
+
+
+class MeteredAsyncAdaptedQueuePool(MeteredPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _tenant_from_options(options: dict) -> str:
+    schema_translate_map = options.get("schema_translate_map") or {}
+    return schema_translate_map.get("tenant") or UNKNOWN_TENANT
+
+
+def register_query_cache_metrics(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def on_before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            query_cache_metrics.record(context.cache_hit)
+
+
+def register_pool_metrics(engine: Engine) -> None:
+    @event.listens_for(engine, "engine_connect")
+    def on_engine_connect(connection):
+        tenant = _tenant_from_options(connection.get_execution_options())
+        connection.info["metrics_tenant"] = tenant
+        waited, latency = connection.info.pop("metrics_checkout", (False, 0.0))
+        pool_metrics.record_checkout(tenant, waited, latency)
+
+    @event.listens_for(engine.pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        tenant = connection_record.info.pop("metrics_tenant", None)
+        if tenant is not None:
+            pool_metrics.record_checkin(tenant)
@@ -1,11 +1,10 @@
 from datetime import datetime, timezone
 from uuid import UUID, uuid4
 
-import pendulum
 from sqlalchemy.orm import Session
 
 from app.crud import crud_events
-from app.models.models import Event, EventSummary, Issue, User
+from app.models.models import Event, Issue, User
 
 # OPEN (start)
 # REJECT (?)
@@ -20,66 +19,97 @@ from app.models.models import Event, EventSummary, Issue, User
 # Resolution – why the issue is no longer in flight (for example, because it’s completed)
 
 
-def create_new_basic_event(
-    db: Session,
-    author: User,
-    issue: Issue,
-    action: str,
-    description: str | None = None,
-    internal_value: str | None = None,
-) -> Event:
-    resource_id = None
-    resource_uuid = None
-    if issue is not None:
-        resource_id = issue.id
-        resource_uuid = issue.uuid
-
-    event_data = {
-        "uuid": str(uuid4()),
-        "author_id": author.id,
-        "resource": "issue",
-        "resource_id": resource_id,
-        "resource_uuid": resource_uuid,
-        "action": action,
-        "description": description,
-        "internal_value": internal_value,
-        "created_at": datetime.now(timezone.utc),
-    }
-
-    new_event = crud_events.create_event(db, event_data)
-    return new_event
-
-
-def open_new_basic_summary(
-    db: Session, resource: str, resource_uuid: UUID, action: str, internal_value: str | None = None
-) -> EventSummary:
-    event_statistic = {
-        "uuid": str(uuid4()),
-        "resource": resource,
-        "resource_uuid": resource_uuid,
-        "action": action,
-        "internal_value": internal_value,
-        "date_from": datetime.now(timezone.utc),
-        "date_to": None,
-        "duration": None,
-        "created_at": datetime.now(timezone.utc),
-    }
-    new_event_statistics = crud_events.create_event_statistic(db, event_statistic)
-    return new_event_statistics
-
-
-def close_new_basic_summary(
-    db: Session, resource: str, resource_uuid: UUID, previous_event: str, internal_value: str | UUID | None = None
-):
-    event = crud_events.get_event_summary_by_resource_uuid_and_status(
-        db, resource, resource_uuid, previous_event, internal_value
-    )
-
-    if event is not None:
-        dt = pendulum.parse(str(event.date_from))
-        time_diff = dt.diff(pendulum.now("UTC")).in_seconds()
-
-        event_statistic_update = {"date_to": datetime.now(timezone.utc), "duration": time_diff}
-        event = crud_events.update_event(db, event, event_statistic_update)
-
-    return event
+class EventUnitOfWork:
+    """Collects issue events and summary open/close operations and writes them in one transaction.
+
+    Nothing touches the DB before `flush()`, which closes intervals with set-based UPDATEs and issues
+    one bulk INSERT for opened summaries and one for events. `commit()` additionally commits the session.
+    """
+
+    def __init__(self, db: Session, author: User | None = None):
+        self.db = db
+        self.author = author
+        self._events: list[dict] = []
+        self._opened: list[dict] = []
+        self._closed: list[tuple[str, UUID, str, str | None]] = []
+
+    def add_event(
+        self,
+        issue: Issue,
+        action: str,
+        description: str | None = None,
+        internal_value: str | None = None,
+    ) -> None:
+        resource_id = None
+        resource_uuid = None
+        if issue is not None:
+            resource_id = issue.id
+            resource_uuid = issue.uuid
+
+        self._events.append(
+            {
+                "uuid": uuid4(),
+                "author_id": self.author.id if self.author is not None else None,
+                "resource": "issue",
+                "resource_id": resource_id,
+                "resource_uuid": resource_uuid,
+                "action": action,
+                "description": description,
+                "internal_value": internal_value,
+                "created_at": datetime.now(timezone.utc),
+            }
+        )
+
+    def open_summary(self, resource: str, resource_uuid: UUID, action: str, internal_value: str | None = None) -> None:
+        self._opened.append(
+            {
+                "uuid": uuid4(),
+                "resource": resource,
+                "resource_uuid": resource_uuid,
+                "action": action,
+                "internal_value": internal_value,
+                "date_from": datetime.now(timezone.utc),
+                "date_to": None,
+                "duration": None,
+                "created_at": datetime.now(timezone.utc),
+            }
+        )
+
+    def close_summary(
+        self, resource: str, resource_uuid: UUID, action: str, internal_value: str | UUID | None = None
+    ) -> None:
+        """Close open interval(s) of `action`, `internal_value=None` closes them for every value (e.g. all users)"""
+        if internal_value is not None:
+            internal_value = str(internal_value)
+        self._closed.append((resource, resource_uuid, action, internal_value))
+
+    def _close_pending(self) -> list:
+        """One UPDATE per resource for value-less closes, one per action for closes of specific values"""
+        actions: dict[tuple[str, UUID], list[str]] = {}
+        values: dict[tuple[str, UUID, str], list[str]] = {}
+        for resource, resource_uuid, action, internal_value in self._closed:
+            if internal_value is None:
+                actions.setdefault((resource, resource_uuid), []).append(action)
+            else:
+                values.setdefault((resource, resource_uuid, action), []).append(internal_value)
+
+        closed = []
+        for (resource, resource_uuid), resource_actions in actions.items():
+            closed += crud_events.close_event_summaries(self.db, resource, resource_uuid, resource_actions)
+        for (resource, resource_uuid, action), internal_values in values.items():
+            closed += crud_events.close_event_summaries(self.db, resource, resource_uuid, [action], internal_values)
+        return closed
+
+    def flush(self) -> list[Event]:
+        # close first - interval opened in this unit of work must not be closed by it
+        self._close_pending()
+        crud_events.bulk_create_event_summaries(self.db, self._opened)
+        new_events = crud_events.bulk_create_events(self.db, self._events)
+
+        self._events, self._opened, self._closed = [], [], []
+        return new_events
+
+    def commit(self) -> list[Event]:
+        new_events = self.flush()
+        self.db.commit()
+        return new_events
@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+import zlib
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from typing import Literal
+
+from sqlalchemy import Select
+from sqlalchemy.orm import InstrumentedAttribute
+from starlette.responses import StreamingResponse
+
+from app.db import with_db
+
+ExportFormat = Literal["csv", "ndjson"]
+
+EXPORT_BATCH_SIZE = 1000
+
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def stream_rows(tenant_id: str, query: Select, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[list]:
+    """Yield batches of rows read through a server side cursor.
+
+    Session is opened inside the generator - the request scoped one is already closed when
+    `StreamingResponse` starts to iterate.
+    """
+    with with_db(tenant_id) as db:
+        result = db.execute(query.execution_options(yield_per=batch_size))
+        yield from result.partitions()
+
+
+def csv_chunks(header: list[str], batches: Iterable[list]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=";")
+
+    writer.writerow(header)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def ndjson_chunks(keys: list[str], batches: Iterable[list]) -> Iterator[bytes]:
+    for rows in batches:
+        lines = (json.dumps(dict(zip(keys, row, strict=True)), default=str) for row in rows)
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_response(
+    tenant_id: str,
+    query: Select,
+    columns: dict[str, InstrumentedAttribute],
+    name: str,
+    export_format: ExportFormat = "csv",
+    compress: bool = False,
+) -> StreamingResponse:
+    """Stream `query` restricted to `columns` ({header: column}) as CSV or NDJSON, optionally gzipped"""
+    query = query.with_only_columns(*columns.values())
+    batches = stream_rows(tenant_id, query)
+
+    if export_format == "ndjson":
+        chunks = ndjson_chunks([column.key for column in columns.values()], batches)
+    else:
+        chunks = csv_chunks(list(columns.keys()), batches)
+
+    media_type = MEDIA_TYPES[export_format]
+    filename = f"{name}_{datetime.today().strftime('%Y-%m-%d')}.{export_format}"
+    if compress is True:
+        chunks = gzip_chunks(chunks)
+        media_type = "application/gzip"
+        filename = f"{filename}.gz"
+
+    response = StreamingResponse(chunks, media_type=media_type)
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return response
@@ -10,3 +10,9 @@ def is_valid_uuid(value: str):
         return uuid.UUID(str(value))
     except ValueError:
         return None
+
+
+def chunks(lst, n):
+    """Yield successive n-sized chunks from lst."""
+    for i in range(0, len(lst), n):
+        yield lst[i : i + n]
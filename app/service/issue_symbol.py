@@ -0,0 +1,42 @@
+import threading
+from collections import deque
+
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.crud import crud_issues
+from app.db import get_session_tenant
+
+settings = get_settings()
+
+# tenant_id -> numbers already reserved from the sequence by this process
+_reserved: dict[str, deque[int]] = {}
+_lock = threading.Lock()
+
+
+def next_issue_number(db: Session) -> int:
+    """Next issue number for the session tenant.
+
+    With `ISSUE_SYMBOL_BLOCK_SIZE` > 1 a block of numbers is reserved in one round trip and handed out
+    from memory, numbers stay unique across workers but are no longer in creation order.
+    """
+    block_size = settings.ISSUE_SYMBOL_BLOCK_SIZE
+    if block_size <= 1:
+        return crud_issues.get_next_issue_numbers(db)[0]
+
+    tenant_id = get_session_tenant(db)
+    with _lock:
+        reserved = _reserved.setdefault(tenant_id, deque())
+        if not reserved:
+            reserved.extend(crud_issues.get_next_issue_numbers(db, block_size))
+        return reserved.popleft()
+
+
+def next_issue_symbol(db: Session) -> str:
+    return f"PR-{next_issue_number(db)}"
+
+
+def discard_reserved_numbers(tenant_id: str) -> None:
+    """Forget reserved numbers, e.g. when the tenant schema (and its sequence) is dropped"""
+    with _lock:
+        _reserved.pop(tenant_id, None)
@@ -1,16 +1,38 @@
 import base64
 import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, zip_longest
 from uuid import UUID
 
+import httpx
 from loguru import logger
-from requests import request
 
 from app.config import get_settings
 from app.models.models import User
 from app.models.shared_models import PublicUser
+from app.service.helpers import chunks
 
 settings = get_settings()
 
+MAILJET_SEND_URL = "https://api.mailjet.com/v3.1/send"
+
+# keep-alive connection pool shared by the whole process, `httpx.Client` is thread safe
+mailjet_client = httpx.Client(
+    timeout=settings.MAILJET_TIMEOUT,
+    limits=httpx.Limits(
+        max_connections=settings.MAILJET_CONCURRENCY, max_keepalive_connections=settings.MAILJET_CONCURRENCY
+    ),
+)
+
+
+class MailjetDeliveryError(Exception):
+    """Some messages were not accepted, `remaining_payload` holds only those (retried by the outbox)"""
+
+    def __init__(self, failed_messages: list[dict], results: dict[str, str]):
+        super().__init__(f"{len(failed_messages)} message(s) not sent: {results}")
+        self.results = results
+        self.remaining_payload = {"Messages": failed_messages}
+
 
 class EmailNotification:
     def __init__(self):
@@ -44,21 +66,58 @@ class EmailNotification:
     #     response = request("POST", url, headers=headers, data=payload, files=files)
     #     return response.text
 
-    def send_by_mailjet(self, payload: dict):
+    def _send_mailjet_batch(self, messages: list[dict]) -> list[tuple[dict, str]]:
+        """One Send API call, `(message, "success" or error)` for every message"""
+        headers = {"Content-Type": "application/json", "Authorization": f"Basic {self.auth_header.decode()}"}
+        try:
+            response = mailjet_client.post(MAILJET_SEND_URL, headers=headers, json={"Messages": messages})
+            if not response.is_success:
+                logger.warning(f"Mailjet batch of {len(messages)} failed: HTTP {response.status_code}")
+                return [(message, f"HTTP {response.status_code}") for message in messages]
+            results = response.json()["Messages"][: len(messages)]
+        except (httpx.HTTPError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Mailjet batch of {len(messages)} failed: {e!r}")
+            return [(message, repr(e)) for message in messages]
+
+        statuses = []
+        # a message without its result was not confirmed, so it is retried as failed
+        for message, result in zip_longest(messages, results):
+            if result is None:
+                statuses.append((message, "no result"))
+            elif result.get("Status") == "success":
+                statuses.append((message, "success"))
+            else:
+                errors = [error.get("ErrorMessage", "") for error in result.get("Errors", [])]
+                statuses.append((message, "; ".join(errors) or "error"))
+        return statuses
+
+    def send_by_mailjet(self, payload: dict) -> dict[str, str]:
+        """Send `Messages` in MAILJET_BATCH_SIZE batches, concurrently over the pooled client.
+
+        Returns status per recipient e-mail, raises `MailjetDeliveryError` listing the messages to retry.
+        """
         if (os.getenv("TESTING") is not None) and (os.getenv("TESTING") == "1"):
             logger.info("Email test")
-            return "TEST_EMAIL_NOTIFICATION"
-
-        url = "https://api.mailjet.com/v3.1/send"
-        headers = {"Content-Type": "application/json", "Authorization": f"Basic {self.auth_header.decode()}"}
-
-        # pprint(payload)
-        response = request("POST", url, headers=headers, json=payload)
-        print("======")
-        print(response.text)
-        return response.text
-
-        # return "OK"
+            return {"TEST_EMAIL_NOTIFICATION": "success"}
+
+        batches = list(chunks(payload["Messages"], settings.MAILJET_BATCH_SIZE))
+        if len(batches) == 1:
+            batch_statuses = [self._send_mailjet_batch(batches[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=settings.MAILJET_CONCURRENCY) as executor:
+                batch_statuses = list(executor.map(self._send_mailjet_batch, batches))
+
+        results = {}
+        failed_messages = []
+        for message, status in chain.from_iterable(batch_statuses):
+            for recipient in message["To"]:
+                results[recipient["Email"]] = status
+            if status != "success":
+                failed_messages.append(message)
+
+        if failed_messages:
+            raise MailjetDeliveryError(failed_messages, results)
+        return results
 
     # MAILJET TEMPLATES COMMON
 
@@ -139,19 +198,3 @@ class EmailNotification:
 
     def add_template_debugging(self, message_dict):
         message_dict["TemplateErrorReporting"] = {"Email": "m@m.pl", "Name": "Mailjet Template Errors"}
-
-    def send_admin_registration(self, user: User | PublicUser, activation_url: str) -> None:
-        data = self.get_template_admin_registration(user, activation_url)
-        self.send_by_mailjet(data)
-
-    def send_password_reset_request(
-        self, user: User | PublicUser, reset_token: str, browser: str, user_os: str
-    ) -> None:
-        data = self.get_template_reset_password_request(user, reset_token, browser, user_os)
-
-        self.send_by_mailjet(data)
-
-    def send_failure_notification(self, users: list[User], name: str, description: str, uuid: UUID):
-        data = self.get_template_failure(users, name, description, uuid)
-        print(data)
-        self.send_by_mailjet(data)
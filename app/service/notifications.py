@@ -1,17 +1,25 @@
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
 from app.config import get_settings
-from app.models.models import Issue, User
+from app.models.models import User
 from app.service.notification_email import EmailNotification
+from app.service.outbox import enqueue_email
 
 settings = get_settings()
 
 
-def notify_users(sms_list: list[User], email_list: list[User], issue: Issue = None):
-    print(">>> bulk_email_notification")
-    email = EmailNotification()
-    email.send_failure_notification(email_list, issue.name, issue.text, issue.uuid)
-
-
-def chunks(lst, n):
-    """Yield successive n-sized chunks from lst."""
-    for i in range(0, len(lst), n):
-        yield lst[i : i + n]
+def notify_users(
+    db: Session,
+    sms_list: list[User],
+    email_list: list[User],
+    name: str,
+    description: str | None,
+    uuid: UUID,
+    dedup_key: str | None = None,
+):
+    """Queue issue notifications in the outbox, they are sent once the caller commits"""
+    if email_list:
+        email = EmailNotification()
+        enqueue_email(db, email.get_template_failure(email_list, name, description, uuid), dedup_key)
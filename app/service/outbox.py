@@ -0,0 +1,111 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from apscheduler.triggers.interval import IntervalTrigger
+from loguru import logger
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.crud import crud_outbox
+from app.db import get_session_tenant, with_db
+from app.service.notification_email import EmailNotification
+from app.service.scheduler import scheduler
+
+settings = get_settings()
+
+EMAIL = "email"
+# `Session.info` key, set while the open transaction holds queued messages
+OUTBOX_PENDING = "outbox_pending"
+
+
+def _send_email(payload: dict) -> None:
+    EmailNotification().send_by_mailjet(payload)
+
+
+SENDERS = {EMAIL: _send_email}
+
+# one dispatcher per process, messages committed meanwhile are claimed by its next batch or by the interval run
+_dispatch_lock = threading.Lock()
+
+
+def enqueue_email(db: Session, payload: dict, dedup_key: str | None = None) -> None:
+    """Store a Mailjet payload in the outbox within the caller's transaction, dispatch starts after commit"""
+    crud_outbox.add_outbox_message(db, get_session_tenant(db), EMAIL, payload, dedup_key)
+    db.info[OUTBOX_PENDING] = True
+    # kept for the life of the session, every commit with queued messages starts a dispatch
+    if not event.contains(db, "after_commit", _dispatch_soon):
+        event.listen(db, "after_commit", _dispatch_soon)
+        event.listen(db, "after_rollback", _discard_pending)
+
+
+def _dispatch_soon(db: Session) -> None:
+    if db.info.pop(OUTBOX_PENDING, False) and not _dispatch_lock.locked():
+        scheduler.add_job(dispatch_outbox)
+
+
+def _discard_pending(db: Session) -> None:
+    db.info.pop(OUTBOX_PENDING, None)
+
+
+def retry_delay(attempts: int) -> int | None:
+    """Exponential backoff, None once `OUTBOX_MAX_ATTEMPTS` is used up"""
+    if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        return None
+    return min(settings.OUTBOX_RETRY_BASE * 2 ** (attempts - 1), settings.OUTBOX_RETRY_MAX)
+
+
+def _deliver(message) -> tuple[str | None, dict | None]:
+    """Error (None when sent) and the part of the payload still to send, when the sender reports one"""
+    try:
+        SENDERS[message.kind](message.payload)
+    except Exception as e:
+        return repr(e), getattr(e, "remaining_payload", None)
+    return None, None
+
+
+def dispatch_outbox() -> int:
+    """Send due outbox messages in batches, returns number of sent messages (0 when a dispatch is running)"""
+    if not _dispatch_lock.acquire(blocking=False):
+        return 0
+    try:
+        return _dispatch_batches()
+    finally:
+        _dispatch_lock.release()
+
+
+def _dispatch_batches() -> int:
+    sent_count = 0
+    with with_db("public") as db:
+        while True:
+            messages = crud_outbox.claim_outbox_messages(db, settings.OUTBOX_BATCH_SIZE, settings.OUTBOX_LEASE)
+            db.commit()
+            if not messages:
+                break
+
+            with ThreadPoolExecutor(max_workers=settings.OUTBOX_CONCURRENCY) as executor:
+                outcomes = list(executor.map(_deliver, messages))
+
+            sent = []
+            for message, (error, remaining_payload) in zip(messages, outcomes, strict=True):
+                if error is None:
+                    sent.append(message.id)
+                    continue
+                retry_in = retry_delay(message.attempts)
+                logger.warning(f"Outbox message {message.id} ({message.kind}) attempt {message.attempts}: {error}")
+                crud_outbox.mark_outbox_error(db, message.id, error, retry_in, remaining_payload)
+
+            crud_outbox.mark_outbox_sent(db, sent)
+            db.commit()
+            sent_count += len(sent)
+
+            if len(messages) < settings.OUTBOX_BATCH_SIZE:
+                break
+
+    return sent_count
+
+
+def start_outbox_dispatcher() -> None:
+    scheduler.add_schedule(
+        dispatch_outbox, IntervalTrigger(seconds=settings.OUTBOX_DISPATCH_INTERVAL), id="notification_outbox"
+    )
@@ -0,0 +1,150 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from typing import Literal
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import ClauseElement, Executable, Select, and_, func, or_, select, tuple_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+
+from app.schemas.responses import CursorPage
+
+
+class CursorParams(BaseModel):
+    """Opt-in keyset mode for listings, `pagination=cursor` ignores `page` and reads `cursor` + `size`"""
+
+    pagination: Literal["offset", "cursor"] = Query("offset", description="Pagination mode")
+    cursor: str | None = Query(None, description="Opaque `next_cursor` / `prev_cursor` of previous response")
+    count: Literal["none", "exact", "estimate"] = Query("none", description="Total count in cursor mode")
+
+
+class _Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement: Select):
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def _encode_cursor(value, id: int, backward: bool) -> str:
+    if isinstance(value, datetime | date):
+        value = value.isoformat()
+    payload = json.dumps({"v": value, "id": id, "b": backward}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort_column) -> tuple:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        value, id, backward = payload["v"], int(payload["id"]), bool(payload["b"])
+        if value is not None and _python_type(sort_column) in (datetime, date):
+            value = _python_type(sort_column).fromisoformat(value)
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+    return value, id, backward
+
+
+def _python_type(column):
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
+def _seek(sort_column, id_column, value, id: int, ascending: bool, backward: bool):
+    """Rows after (or before, going back) `(value, id)` in `sort_column, id` order with NULLs last"""
+    after = ascending != backward
+    if value is None:
+        beyond = id_column > id if after else id_column < id
+        if backward:
+            return or_(sort_column.is_not(None), and_(sort_column.is_(None), beyond))
+        return and_(sort_column.is_(None), beyond)
+
+    key, boundary = tuple_(sort_column, id_column), tuple_(value, id)
+    beyond = key > boundary if after else key < boundary
+    if backward:
+        return beyond
+    return or_(beyond, sort_column.is_(None))
+
+
+def _order_by(sort_column, id_column, ascending: bool, backward: bool) -> list:
+    if ascending != backward:
+        columns = [sort_column.asc(), id_column.asc()]
+    else:
+        columns = [sort_column.desc(), id_column.desc()]
+    columns[0] = columns[0].nulls_first() if backward else columns[0].nulls_last()
+    return columns
+
+
+def count_rows(db: Session, query: Select, mode: Literal["none", "exact", "estimate"]) -> int | None:
+    """`exact` runs `COUNT(*)`, `estimate` reads the planner row estimate (`EXPLAIN`) without scanning"""
+    query = query.order_by(None)
+    match mode:
+        case "exact":
+            result = db.execute(select(func.count()).select_from(query.subquery()))  # await db.execute(query)
+            return result.scalar_one()
+        case "estimate":
+            result = db.execute(_Explain(query))  # await db.execute(query)
+            plan = result.scalar_one()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]["Plan"]["Plan Rows"])
+    return None
+
+
+def paginate_cursor(
+    db: Session,
+    query: Select,
+    sort_column,
+    id_column,
+    sort_order: str,
+    size: int,
+    params: CursorParams,
+) -> CursorPage:
+    """Keyset pagination on `(sort_column, id_column)` - cost of a page does not grow with its depth.
+
+    Existing `ORDER BY` of `query` (e.g. search rank) is replaced, items keep the `sort_column` order.
+    Single entity selects return entities, multi column selects return row mappings.
+    """
+    ascending = sort_order.lower() != "desc"
+    single_entity = len(query.column_descriptions) == 1
+
+    value, id, backward = None, None, False
+    if params.cursor:
+        value, id, backward = _decode_cursor(params.cursor, sort_column)
+
+    page_query = query.order_by(None).add_columns(sort_column.label("cursor_value"), id_column.label("cursor_id"))
+    if id is not None:
+        page_query = page_query.where(_seek(sort_column, id_column, value, id, ascending, backward))
+    page_query = page_query.order_by(*_order_by(sort_column, id_column, ascending, backward)).limit(size + 1)
+
+    result = db.execute(page_query)  # await db.execute(query)
+    rows = result.all()
+
+    has_more = len(rows) > size
+    rows = rows[:size]
+    if backward:
+        rows.reverse()
+
+    next_cursor = prev_cursor = None
+    if rows:
+        first, last = rows[0], rows[-1]
+        if has_more or backward:
+            next_cursor = _encode_cursor(last.cursor_value, last.cursor_id, False)
+        if (has_more and backward) or (id is not None and not backward):
+            prev_cursor = _encode_cursor(first.cursor_value, first.cursor_id, True)
+
+    return CursorPage(
+        items=[row[0] if single_entity else dict(row._mapping) for row in rows],
+        size=size,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+        total=count_rows(db, query, params.count),
+    )
@@ -1,4 +1,108 @@
-from passlib.hash import argon2
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from app.config import get_settings
+from app.service.helpers import chunks
+
+settings = get_settings()
+
+# built from Settings in every process, hashes made with other parameters verify and report `needs_update`
+password_context = CryptContext(
+    schemes=["argon2"],
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+# jobs running or waiting in the pool, above it the request is refused instead of queued
+_pool_slots = threading.BoundedSemaphore(max(settings.PASSWORD_POOL_SIZE, 1) + settings.PASSWORD_POOL_MAX_QUEUE)
+
+
+def _hash(password: str) -> str:
+    return password_context.hash(password)
+
+
+def _hash_many(passwords: list[str]) -> list[str]:
+    return [password_context.hash(password) for password in passwords]
+
+
+def _verify_and_update(password: str, password_hash: str) -> tuple[bool, str | None]:
+    return password_context.verify_and_update(password, password_hash)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn - workers do not inherit the scheduler / db pool threads of the app process
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_POOL_SIZE, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def shutdown_password_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _submit(fn, *args) -> Future:
+    """Queue `fn` in the password pool, 429 when the pool is saturated"""
+    if not _pool_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=429, detail="Too many password operations, try again later", headers={"Retry-After": "1"}
+        )
+    try:
+        future: Future = _get_pool().submit(fn, *args)
+    except BaseException:
+        _pool_slots.release()
+        raise
+    future.add_done_callback(lambda _: _pool_slots.release())
+    return future
+
+
+def _run(fn, *args):
+    """Run `fn` in the password pool, inline when `PASSWORD_POOL_SIZE` is 0"""
+    if settings.PASSWORD_POOL_SIZE == 0:
+        return fn(*args)
+    return _submit(fn, *args).result()
+
+
+def hash_password(password: str) -> str:
+    return _run(_hash, password)
+
+
+def hash_passwords(passwords: list[str]) -> list[str]:
+    """Hash in `PASSWORD_HASH_CHUNK_SIZE` chunks on all workers, at most one chunk per worker is queued
+    so logins still get a worker between chunks"""
+    if settings.PASSWORD_POOL_SIZE == 0:
+        return _hash_many(passwords)
+
+    hashes, pending = [], deque()
+    for chunk in chunks(passwords, settings.PASSWORD_HASH_CHUNK_SIZE):
+        if len(pending) >= settings.PASSWORD_POOL_SIZE:
+            hashes.extend(pending.popleft().result())
+        pending.append(_submit(_hash_many, chunk))
+    while pending:
+        hashes.extend(pending.popleft().result())
+    return hashes
+
+
+def verify_password(password: str, password_hash: str | None) -> tuple[bool, str | None]:
+    """Returns `(valid, new_hash)`, `new_hash` is set when the stored hash uses outdated argon2 parameters"""
+    if not password_hash:
+        return False, None
+    return _run(_verify_and_update, password, password_hash)
 
 
 class Password:
@@ -32,4 +136,4 @@ class Password:
         return True
 
     def hash(self):
-        return argon2.hash(self.password)
+        return hash_password(self.password)
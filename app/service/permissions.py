@@ -0,0 +1,65 @@
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.crud import crud_permission
+from app.db import get_db, get_session_tenant
+from app.service.bearer_auth import Principal, has_token
+from app.utils.cache import TTLCache
+
+settings = get_settings()
+
+UserDB = Annotated[Session, Depends(get_db)]
+CurrentUser = Annotated[Principal, Depends(has_token)]
+
+# tenant_id -> {role_id: frozenset(permission names)}
+role_permissions_cache = TTLCache(maxsize=settings.TENANT_CACHE_SIZE, ttl=settings.PERMISSION_CACHE_TTL)
+
+
+def get_role_permissions(db: Session) -> dict[int, frozenset[str]]:
+    tenant_id = get_session_tenant(db)
+    role_permissions = role_permissions_cache.get(tenant_id)
+    if role_permissions is not None:
+        return role_permissions
+
+    grouped: dict[int, set[str]] = {}
+    for role_id, name in crud_permission.get_roles_permission_names(db):
+        grouped.setdefault(role_id, set()).add(name)
+
+    role_permissions = {role_id: frozenset(names) for role_id, names in grouped.items()}
+    role_permissions_cache.set(tenant_id, role_permissions)
+    return role_permissions
+
+
+def invalidate_role_permissions(db: Session) -> None:
+    role_permissions_cache.invalidate(get_session_tenant(db))
+
+
+def get_user_permissions(db: Session, user: Principal) -> frozenset[str]:
+    if user.user_role_id is None:
+        return frozenset()
+    return get_role_permissions(db).get(user.user_role_id, frozenset())
+
+
+def has_permission(db: Session, user: Principal, *permissions: str) -> bool:
+    return get_user_permissions(db, user).issuperset(permissions)
+
+
+def can_edit_user(db: Session, auth_user: Principal, user_uuid: UUID) -> bool:
+    if has_permission(db, auth_user, "USER_EDIT"):
+        return True
+    return str(auth_user.uuid) == str(user_uuid) and has_permission(db, auth_user, "USER_EDIT_SELF")
+
+
+def require_permission(*permissions: str):
+    """Dependency factory, returns current user if his role grants all `permissions`"""
+
+    def permission_checker(*, db: UserDB, auth_user: CurrentUser) -> Principal:
+        if not has_permission(db, auth_user, *permissions):
+            raise HTTPException(status_code=403, detail="Insufficient privileges")
+        return auth_user
+
+    return permission_checker
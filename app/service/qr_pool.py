@@ -0,0 +1,80 @@
+import threading
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.crud import crud_qr
+from app.db import get_session_tenant, with_db
+from app.service.scheduler import scheduler
+
+settings = get_settings()
+
+ITEM_QR_ALLOWED_CHARS = "abcdefghijkmnopqrstuvwxyz23456789"  # ABCDEFGHJKLMNPRSTUVWXYZ23456789
+REFILL_ROUNDS = 3
+
+# tenants with a refill job queued or running, claims below the watermark do not queue another one
+_refilling: set[str] = set()
+_refilling_lock = threading.Lock()
+
+
+def current_qr_id_length(db: Session) -> int:
+    """Shortest id length whose space is filled below `QR_ID_FILL_THRESHOLD`"""
+    length = settings.QR_ID_MIN_LENGTH
+    while (
+        crud_qr.count_qr_code_ids_by_length(db, length)
+        >= settings.QR_ID_FILL_THRESHOLD * len(ITEM_QR_ALLOWED_CHARS) ** length
+    ):
+        length += 1
+    return length
+
+
+def refill_qr_code_pool(db: Session) -> int:
+    """Top up free ids to `QR_POOL_SIZE`, returns number of added ids"""
+    added = 0
+    for _round in range(REFILL_ROUNDS):
+        missing = settings.QR_POOL_SIZE - crud_qr.count_free_qr_code_ids(db)
+        if missing <= 0:
+            break
+
+        length = current_qr_id_length(db)
+        candidates = {crud_qr.generate_custom_id(ITEM_QR_ALLOWED_CHARS, length) for _x in range(missing)}
+        added += crud_qr.add_qr_code_ids(db, candidates)
+        db.commit()
+
+    return added
+
+
+def refill_qr_code_pool_job(tenant_id: str) -> None:
+    try:
+        with with_db(tenant_id) as db:
+            added = refill_qr_code_pool(db)
+    finally:
+        with _refilling_lock:
+            _refilling.discard(tenant_id)
+    logger.info(f"QR code pool for {tenant_id} refilled with {added} ids")
+
+
+def _refill_soon(tenant_id: str) -> None:
+    with _refilling_lock:
+        if tenant_id in _refilling:
+            return
+        _refilling.add(tenant_id)
+    try:
+        scheduler.add_job(refill_qr_code_pool_job, args=[tenant_id])
+    except BaseException:
+        with _refilling_lock:
+            _refilling.discard(tenant_id)
+        raise
+
+
+def claim_item_qr_id(db: Session) -> str:
+    """Free id from the tenant pool, the pool is refilled in place only when it is empty"""
+    qr_code_id = crud_qr.claim_qr_code_id(db)
+    if qr_code_id is None:
+        refill_qr_code_pool(db)
+        qr_code_id = crud_qr.claim_qr_code_id(db)
+    elif crud_qr.count_free_qr_code_ids(db) < settings.QR_POOL_LOW_WATERMARK:
+        _refill_soon(get_session_tenant(db))
+
+    return qr_code_id
@@ -0,0 +1,80 @@
+from datetime import datetime, time
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from app.crud import crud_statistics, crud_users
+from app.crud.crud_statistics import GROUPING_BY_DAY, GROUPING_BY_HOUR, GROUPING_BY_STATUS, GROUPING_TOTAL
+
+ISSUE_STATUSES = ["new", "accepted", "rejected", "assigned", "in_progress", "paused", "done"]
+
+REPAIR_TIME = "issueRepairTime"
+TOTAL_TIME = "issueTotalTime"
+USER_ACTIVITY = "issueUserActivity"
+
+
+def _to_uuids(values) -> list[UUID]:
+    uuids = []
+    for value in values or []:
+        try:
+            uuids.append(UUID(str(value)))
+        except ValueError:
+            continue
+    return uuids
+
+
+def _issues_counters(db: Session, item_id: int, date_from: datetime = None, date_to: datetime = None):
+    issues_per_day = {}
+    issues_per_hour = {}
+    issues_status = {}
+    issues_count = 0
+
+    for row in crud_statistics.get_item_issues_aggregates(db, item_id, date_from, date_to):
+        if row.grouping == GROUPING_TOTAL:
+            issues_count = row.total
+        elif not row.count:
+            continue
+        elif row.grouping == GROUPING_BY_DAY:
+            issues_per_day[row.date.strftime("%Y-%m-%d")] = row.count
+        elif row.grouping == GROUPING_BY_HOUR:
+            issues_per_hour[str(row.hour)] = row.count
+        elif row.grouping == GROUPING_BY_STATUS:
+            issues_status[row.status] = row.count
+
+    for hours in [time(i).strftime("%H") for i in range(24)]:
+        issues_per_hour.setdefault(hours, 0)
+
+    for status in ISSUE_STATUSES:
+        issues_status.setdefault(status, 0)
+
+    return issues_count, issues_per_day, dict(sorted(issues_per_hour.items())), dict(sorted(issues_status.items()))
+
+
+def get_item_statistics(db: Session, item_id: int, date_from: datetime = None, date_to: datetime = None) -> dict:
+    """Item dashboard: issue counters (one GROUPING SETS query), durations (one grouped query), users (one lookup)"""
+    issues_count, issues_per_day, issues_per_hour, issues_status = _issues_counters(db, item_id, date_from, date_to)
+
+    durations = {}
+    for action, max_time, avg_time, _min_time, values in crud_statistics.get_item_event_summary_aggregates(
+        db, item_id, [REPAIR_TIME, TOTAL_TIME, USER_ACTIVITY]
+    ):
+        durations[action] = (max_time, avg_time, values)
+
+    users = None
+    user_uuids = _to_uuids(durations.get(USER_ACTIVITY, (None, None, None))[2])
+    db_users = crud_users.get_users_by_uuids(db, user_uuids).found
+    if db_users:
+        users = {"name": ", ".join(sorted(f"{user.first_name} {user.last_name}" for user in db_users))}
+
+    total_max, total_avg, _ = durations.get(TOTAL_TIME, (None, None, None))
+    repair_max, repair_avg, _ = durations.get(REPAIR_TIME, (None, None, None))
+
+    return {
+        "issuesCount": issues_count,
+        "issuesPerDay": issues_per_day,
+        "issuesPerHour": issues_per_hour,
+        "issuesStatus": issues_status,
+        "repairTime": {"max": repair_max, "avg": repair_avg},
+        "users": users,
+        "totalTime": {"max": total_max, "avg": total_avg},
+    }
@@ -1,6 +1,11 @@
+from collections.abc import Iterable
+from urllib.parse import quote
+
 import boto3
 
 from app.config import get_settings
+from app.storage.s3 import S3Storage
+from app.utils.cache import TTLCache
 
 settings = get_settings()
 
@@ -18,9 +23,122 @@ s3_client = boto3.client(
     aws_secret_access_key=settings.s3_secret_access_key,
 )
 
+# (tenant, file) -> signed url, expires before the url itself does
+presigned_url_cache = TTLCache(
+    maxsize=settings.PRESIGNED_URL_CACHE_SIZE,
+    ttl=min(settings.PRESIGNED_URL_CACHE_TTL, settings.PRESIGNED_URL_EXPIRES * 0.9),
+)
+
+
+def _sign_url(tenant: str, file: str) -> str:
+    if S3Storage.AWS_S3_CUSTOM_DOMAIN:
+        return f"https://{S3Storage.AWS_S3_CUSTOM_DOMAIN}/{quote(f'{tenant}/{file}')}"
+
+    return s3_client.generate_presigned_url(
+        ClientMethod="get_object",
+        Params={"Bucket": settings.s3_bucket_name, "Key": f"{tenant}/{file}"},
+        ExpiresIn=settings.PRESIGNED_URL_EXPIRES,
+    )
+
+
+def generate_presigned_urls(tenant: str, files: Iterable[str]) -> dict[str, str]:
+    """Urls for many objects of a tenant, only files missing in the cache are signed"""
+    urls = {}
+    for file in dict.fromkeys(files):
+        url = presigned_url_cache.get((tenant, file))
+        if url is None:
+            url = _sign_url(tenant, file)
+            presigned_url_cache.set((tenant, file), url)
+        urls[file] = url
+    return urls
+
 
 def generate_presigned_url(tenant: str, file: str) -> str:
-    presigned_url = s3_client.generate_presigned_url(
-        ClientMethod="get_object", Params={"Bucket": settings.s3_bucket_name, "Key": f"{tenant}/{file}"}, ExpiresIn=3600
+    return generate_presigned_urls(tenant, [file])[file]
+
+
+def set_presigned_urls(tenant: str, db_files: Iterable) -> None:
+    """Fill `url` of `File` rows, object keys are `<tenant>/<uuid>_<file_name>`"""
+    db_files = list(db_files)
+    urls = generate_presigned_urls(tenant, [f"{db_file.uuid}_{db_file.file_name}" for db_file in db_files])
+    for db_file in db_files:
+        db_file.url = urls[f"{db_file.uuid}_{db_file.file_name}"]
+
+
+def get_object(tenant: str, file: str, byte_range: str | None = None, if_none_match: str | None = None) -> dict:
+    """`get_object` response with unread streaming `Body`, `Range` and `If-None-Match` are passed to S3 as is"""
+    params = {"Bucket": settings.s3_bucket_name, "Key": f"{tenant}/{file}"}
+    if byte_range is not None:
+        params["Range"] = byte_range
+    if if_none_match is not None:
+        params["IfNoneMatch"] = if_none_match
+
+    return s3_client.get_object(**params)
+
+
+def create_upload(tenant: str, file: str, size: int, mimetype: str) -> dict:
+    """Presigned POST for a single request upload or presigned `upload_part` urls for a multipart upload"""
+    key = f"{tenant}/{file}"
+    part_size = settings.S3_MULTIPART_PART_SIZE
+
+    if size <= part_size:
+        post = s3_client.generate_presigned_post(
+            Bucket=settings.s3_bucket_name,
+            Key=key,
+            Fields={"Content-Type": mimetype},
+            Conditions=[{"Content-Type": mimetype}, ["content-length-range", size, size]],
+            ExpiresIn=settings.PRESIGNED_URL_EXPIRES,
+        )
+        return {"url": post["url"], "fields": post["fields"]}
+
+    upload_id = s3_client.create_multipart_upload(Bucket=settings.s3_bucket_name, Key=key, ContentType=mimetype)[
+        "UploadId"
+    ]
+    parts = [
+        {
+            "part_number": part_number,
+            "url": s3_client.generate_presigned_url(
+                ClientMethod="upload_part",
+                Params={
+                    "Bucket": settings.s3_bucket_name,
+                    "Key": key,
+                    "UploadId": upload_id,
+                    "PartNumber": part_number,
+                },
+                ExpiresIn=settings.PRESIGNED_URL_EXPIRES,
+            ),
+        }
+        for part_number in range(1, -(-size // part_size) + 1)
+    ]
+    return {"upload_id": upload_id, "part_size": part_size, "parts": parts}
+
+
+def complete_upload(tenant: str, file: str, upload_id: str, parts: list[dict]) -> None:
+    """`parts` - `{"part_number", "etag"}` reported by the client for every uploaded part"""
+    s3_client.complete_multipart_upload(
+        Bucket=settings.s3_bucket_name,
+        Key=f"{tenant}/{file}",
+        UploadId=upload_id,
+        MultipartUpload={
+            "Parts": [
+                {"PartNumber": part["part_number"], "ETag": part["etag"]}
+                for part in sorted(parts, key=lambda part: part["part_number"])
+            ]
+        },
     )
-    return presigned_url
+
+
+def abort_upload(tenant: str, file: str, upload_id: str) -> None:
+    s3_client.abort_multipart_upload(Bucket=settings.s3_bucket_name, Key=f"{tenant}/{file}", UploadId=upload_id)
+
+
+def head_object(tenant: str, file: str) -> dict:
+    return s3_client.head_object(Bucket=settings.s3_bucket_name, Key=f"{tenant}/{file}")
+
+
+def delete_object(tenant: str, file: str) -> None:
+    s3_client.delete_object(Bucket=settings.s3_bucket_name, Key=f"{tenant}/{file}")
+
+
+def invalidate_presigned_url(tenant: str, file: str) -> None:
+    presigned_url_cache.invalidate((tenant, file))
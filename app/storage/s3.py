@@ -47,7 +47,7 @@ class S3Storage(BaseStorage):
     AWS_QUERYSTRING_AUTH = False
     """Indicate if query parameter authentication should be used in URLs."""
 
-    AWS_S3_CUSTOM_DOMAIN = ""
+    AWS_S3_CUSTOM_DOMAIN = settings.s3_custom_domain
     """Custom domain to use for serving object URLs."""
 
     def __init__(self) -> None:
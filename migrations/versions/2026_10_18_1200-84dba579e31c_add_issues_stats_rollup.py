@@ -0,0 +1,49 @@
+"""add issues stats rollup
+
+Revision ID: 84dba579e31c
+Revises: 13be30248d7d
+Create Date: 2026-10-18 12:00:41.513226
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "84dba579e31c"
+down_revision = "13be30248d7d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "issues_stats_rollup",
+        sa.Column("id", sa.INTEGER(), sa.Identity(), autoincrement=True, nullable=False),
+        sa.Column("day", sa.DATE(), autoincrement=False, nullable=False),
+        sa.Column("hour", sa.SMALLINT(), autoincrement=False, nullable=False),
+        sa.Column("status", sa.VARCHAR(length=256), autoincrement=False, nullable=True),
+        sa.Column("item_id", sa.INTEGER(), autoincrement=False, nullable=True),
+        sa.Column("count", sa.INTEGER(), autoincrement=False, nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("id", name="issues_stats_rollup_pkey"),
+        schema=None,
+    )
+    op.create_index(
+        "issues_stats_rollup_key",
+        "issues_stats_rollup",
+        ["day", "hour", sa.text("coalesce(status, '')"), sa.text("coalesce(item_id, 0)")],
+        unique=True,
+    )
+
+    backfill = """
+    INSERT INTO issues_stats_rollup (day, hour, status, item_id, count)
+    SELECT CAST(created_at AS DATE), EXTRACT(HOUR FROM created_at), status, item_id, count(*)
+    FROM issues
+    WHERE created_at IS NOT NULL
+    GROUP BY 1, 2, 3, 4;
+    """
+    op.execute(backfill)
+
+
+def downgrade() -> None:
+    op.drop_index("issues_stats_rollup_key", table_name="issues_stats_rollup")
+    op.drop_table("issues_stats_rollup")
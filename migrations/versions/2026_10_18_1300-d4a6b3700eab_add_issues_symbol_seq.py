@@ -0,0 +1,31 @@
+"""add issues symbol sequence
+
+Revision ID: d4a6b3700eab
+Revises: 84dba579e31c
+Create Date: 2026-10-18 13:00:12.604821
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d4a6b3700eab"
+down_revision = "84dba579e31c"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE SEQUENCE IF NOT EXISTS issues_symbol_seq;")
+
+    # continue after both the last issue id (old `PR-<last id + 1>` scheme) and the highest existing symbol
+    start_value = """
+    SELECT setval('issues_symbol_seq', GREATEST(
+        COALESCE((SELECT max(id) FROM issues), 0),
+        COALESCE((SELECT max(substring(symbol FROM '^PR-([0-9]+)$')::bigint) FROM issues), 0)
+    ) + 1, false);
+    """
+    op.execute(start_value)
+
+
+def downgrade() -> None:
+    op.execute("DROP SEQUENCE IF EXISTS issues_symbol_seq;")
@@ -0,0 +1,48 @@
+"""add QR Code ids pool
+
+Revision ID: 45f843faabb2
+Revises: d4a6b3700eab
+Create Date: 2026-10-18 14:00:37.190254
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "45f843faabb2"
+down_revision = "d4a6b3700eab"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "qr_code_ids_pool",
+        sa.Column("qr_code_id", sa.VARCHAR(length=32), autoincrement=False, nullable=False),
+        sa.Column("claimed_at", postgresql.TIMESTAMP(timezone=True), autoincrement=False, nullable=True),
+        sa.Column("created_at", postgresql.TIMESTAMP(timezone=True), autoincrement=False, nullable=True),
+        sa.PrimaryKeyConstraint("qr_code_id", name="qr_code_ids_pool_pkey"),
+        schema=None,
+    )
+    op.create_index(
+        "qr_code_ids_pool_free_idx",
+        "qr_code_ids_pool",
+        ["qr_code_id"],
+        postgresql_where=sa.text("claimed_at IS NULL"),
+    )
+
+    # ids already printed on labels are never handed out again
+    backfill = """
+    INSERT INTO qr_code_ids_pool (qr_code_id, claimed_at, created_at)
+    SELECT DISTINCT qr_code_id, now(), now()
+    FROM qr_codes
+    WHERE qr_code_id IS NOT NULL
+    ON CONFLICT DO NOTHING;
+    """
+    op.execute(backfill)
+
+
+def downgrade() -> None:
+    op.drop_index("qr_code_ids_pool_free_idx", table_name="qr_code_ids_pool")
+    op.drop_table("qr_code_ids_pool")
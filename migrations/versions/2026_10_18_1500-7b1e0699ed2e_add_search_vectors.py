@@ -0,0 +1,50 @@
+"""add full text search vectors
+
+Revision ID: 7b1e0699ed2e
+Revises: 45f843faabb2
+Create Date: 2026-10-18 15:00:05.881940
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "7b1e0699ed2e"
+down_revision = "45f843faabb2"
+branch_labels = None
+depends_on = None
+
+SEARCHABLE = {
+    "issues": {"name": "A", "summary": "B", "text": "C"},
+    "items": {"name": "A", "summary": "B", "text": "C"},
+    "guides": {"name": "A", "text": "C"},
+}
+
+
+def search_vector_sql(weighted_columns: dict[str, str]) -> str:
+    return " || ".join(
+        f"setweight(to_tsvector('{config}'::regconfig, coalesce({column}, '')), '{weight}')"
+        for column, weight in weighted_columns.items()
+        for config in ("simple", "english")
+    )
+
+
+def upgrade() -> None:
+    for table, weighted_columns in SEARCHABLE.items():
+        op.add_column(
+            table,
+            sa.Column(
+                "search_vector",
+                postgresql.TSVECTOR(),
+                sa.Computed(search_vector_sql(weighted_columns), persisted=True),
+                nullable=True,
+            ),
+        )
+        op.create_index(f"{table}_search_vector_idx", table, ["search_vector"], postgresql_using="gin")
+
+
+def downgrade() -> None:
+    for table in SEARCHABLE:
+        op.drop_index(f"{table}_search_vector_idx", table_name=table)
+        op.drop_column(table, "search_vector")
@@ -0,0 +1,46 @@
+"""add notification outbox
+
+Revision ID: 5c2e8a91d0f3
+Revises: 7b1e0699ed2e
+Create Date: 2026-10-18 16:00:27.318804
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5c2e8a91d0f3"
+down_revision = "7b1e0699ed2e"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # shared by all tenants, every tenant upgrade runs this migration hence IF NOT EXISTS
+    notification_outbox = """
+    CREATE TABLE IF NOT EXISTS public.notification_outbox (
+       id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+       tenant_id varchar(256),
+       kind varchar(64) NOT NULL,
+       dedup_key varchar(256) UNIQUE,
+       payload jsonb NOT NULL,
+       status varchar(16) NOT NULL DEFAULT 'pending',
+       attempts int NOT NULL DEFAULT 0,
+       next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+       last_error text,
+       created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+       sent_at TIMESTAMPTZ
+      );
+    """
+    op.execute(notification_outbox)
+
+    notification_outbox_index = """
+      CREATE INDEX IF NOT EXISTS notification_outbox_pending_idx ON public.notification_outbox (next_attempt_at)
+      WHERE status = 'pending';
+    """
+    op.execute(notification_outbox_index)
+
+
+def downgrade() -> None:
+    # shared by all tenants, a single tenant downgrade must not drop it
+    # op.execute("DROP TABLE IF EXISTS public.notification_outbox;")
+    pass
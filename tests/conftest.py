@@ -4,6 +4,7 @@ import os
 import traceback
 import warnings
 from pathlib import Path
+from uuid import uuid4
 
 from dotenv import load_dotenv
 from fastapi_pagination.utils import FastAPIPaginationWarning
@@ -19,13 +20,15 @@ import alembic.util  # pylint: disable=E0401
 import pytest
 from fastapi.testclient import TestClient
 from loguru import logger
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
 
-from app.db import get_db, get_public_db
+from app.db import get_async_public_db, get_db, get_public_db
 from app.main import app
-from app.models.models import User
-from app.service.bearer_auth import has_token
+from app.service.bearer_auth import Principal, has_token
 
 # def get_settings_override():
 #     load_dotenv("./app/.env")
@@ -124,7 +127,8 @@ def client_fixture(session: Session):
         return session
 
     def get_auth_override():
-        return User(id=1)
+        # seeded ADMIN_MASTER role, grants every permission
+        return Principal(id=1, uuid=uuid4(), lang="pl", user_role_id=1)
 
     app.dependency_overrides[get_db] = get_session_override
     app.dependency_overrides[has_token] = get_auth_override
@@ -134,6 +138,19 @@ def client_fixture(session: Session):
     app.dependency_overrides.clear()
 
 
+@pytest.fixture(name="queries")
+def queries_fixture():
+    """SQL statements executed during the test, e.g. `queries.clear()` before a request, `len(queries)` after"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+
+
 @pytest.fixture(name="publicSession")
 def public_session_fixture():
     engine = create_engine(URL, echo=False, pool_pre_ping=True, pool_recycle=280)
@@ -151,7 +168,16 @@ def public_client_fixture(publicSession: Session):
     def get_auth_override():
         return {"user_id": 1}
 
+    async def get_async_session_override():
+        # TestClient spins a new event loop per request, pooled async connections can't be shared between them
+        async_engine = create_async_engine(URL, poolclass=NullPool)
+        connectable = async_engine.execution_options(schema_translate_map={"tenant": "public"})
+        async with AsyncSession(autoflush=False, bind=connectable, expire_on_commit=False) as session:
+            yield session
+        await async_engine.dispose()
+
     app.dependency_overrides[get_public_db] = get_session_override
+    app.dependency_overrides[get_async_public_db] = get_async_session_override
     app.dependency_overrides[has_token] = get_auth_override
 
     client = TestClient(app)
@@ -0,0 +1,146 @@
+import secrets
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from app.main import app
+from app.models.models import User
+from app.models.shared_models import PublicCompany, PublicUser
+from app.service.bearer_auth import Principal, has_token, invalid_token_cache, token_cache
+
+TENANT_ID = "fake_tenant_company_for_test_00000000000000000000000000000000"
+HEADERS = {"tenant": TENANT_ID}
+
+
+def authenticate(session: Session, token: str) -> Principal:
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    return has_token(db=session, tenant=PublicCompany(tenant_id=TENANT_ID), credentials=credentials)
+
+
+@pytest.fixture(name="token_user")
+def token_user_fixture(session: Session):
+    """Tenant user with a valid auth token (and its public user with a reset token)"""
+    user_uuid = uuid4()
+    now = datetime.now(timezone.utc)
+    email = f"token_{user_uuid.hex}@email.com"
+    user = User(
+        uuid=user_uuid,
+        email=email,
+        first_name="Token",
+        last_name="User",
+        auth_token=secrets.token_hex(64),
+        auth_token_valid_to=now + timedelta(days=1),
+        user_role_id=1,
+        is_active=True,
+        is_verified=True,
+        is_visible=True,
+        tz="Europe/Warsaw",
+        lang="pl",
+        tenant_id=TENANT_ID,
+        created_at=now,
+    )
+    public_user = PublicUser(
+        uuid=user_uuid,
+        email=email,
+        first_name="Token",
+        last_name="User",
+        service_token=secrets.token_hex(32),
+        service_token_valid_to=now + timedelta(days=1),
+        is_active=True,
+        is_verified=True,
+        tos=True,
+        tenant_id=TENANT_ID,
+        created_at=now,
+    )
+    session.add_all([user, public_user])
+    session.commit()
+    token, service_token = user.auth_token, public_user.service_token
+    token_cache.clear()
+    invalid_token_cache.clear()
+
+    yield user_uuid, token, service_token
+
+    session.rollback()
+    session.execute(delete(User).where(User.uuid == user_uuid))
+    session.execute(delete(PublicUser).where(PublicUser.uuid == user_uuid))
+    session.commit()
+
+
+def is_cached(token: str) -> bool:
+    return token_cache.get((TENANT_ID, token)) is not None
+
+
+def test_has_token_miss_then_hit(session: Session, token_user, queries):
+    user_uuid, token, _ = token_user
+
+    principal = authenticate(session, token)
+    assert principal == Principal(id=principal.id, uuid=user_uuid, lang="pl", user_role_id=1)
+    assert len(queries) > 0
+
+    queries.clear()
+    assert authenticate(session, token) == principal
+    assert queries == []
+
+
+def test_has_token_negative_cache(session: Session, queries):
+    token = "not a token!"
+    invalid_token_cache.clear()
+
+    with pytest.raises(HTTPException) as error:
+        authenticate(session, token)
+    assert error.value.status_code == 401
+
+    queries.clear()
+    with pytest.raises(HTTPException):
+        authenticate(session, token)
+    assert queries == []
+
+
+def test_logout_invalidates_token(session: Session, client: TestClient, token_user):
+    _, token, _ = token_user
+    principal = authenticate(session, token)
+    app.dependency_overrides[has_token] = lambda: principal
+
+    response = client.post("/auth/logout", headers=HEADERS)
+    assert response.status_code == 200
+    assert not is_cached(token)
+
+    del app.dependency_overrides[has_token]
+    with pytest.raises(HTTPException):
+        authenticate(session, token)
+
+
+def test_user_edit_invalidates_token(session: Session, client: TestClient, token_user):
+    user_uuid, token, _ = token_user
+    authenticate(session, token)
+    assert is_cached(token)
+
+    response = client.patch(f"/users/{user_uuid}", headers=HEADERS, json={"first_name": "Edited"})
+    assert response.status_code == 200
+    assert not is_cached(token)
+
+
+def test_user_delete_invalidates_token(session: Session, client: TestClient, token_user):
+    user_uuid, token, _ = token_user
+    authenticate(session, token)
+    assert is_cached(token)
+
+    response = client.delete(f"/users/{user_uuid}", headers=HEADERS)
+    assert response.status_code == 200
+    assert not is_cached(token)
+
+
+def test_password_reset_invalidates_token(session: Session, publicClient: TestClient, token_user):
+    _, token, service_token = token_user
+    authenticate(session, token)
+    assert is_cached(token)
+
+    response = publicClient.post(f"/auth/reset-password/{service_token}", json={"password": "new secret"})
+    assert response.status_code == 200
+    assert not is_cached(token)
@@ -0,0 +1,36 @@
+from uuid import uuid4
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.crud import crud_users
+from app.crud.crud_common import resolve_uuids
+from app.models.models import User
+
+
+def test_resolve_uuids(session: Session, queries):
+    first, second = session.execute(select(User).order_by(User.id).limit(2)).scalars().all()
+    unknown = uuid4()
+
+    queries.clear()
+    resolved = resolve_uuids(session, User, [second.uuid, str(first.uuid), unknown, second.uuid])
+    assert len(queries) == 1
+    assert resolved.found == [second, first]
+    assert resolved.missing == [unknown]
+
+    # rows filtered out by criteria are reported missing
+    resolved = resolve_uuids(session, User, [first.uuid, second.uuid], User.id != first.id)
+    assert resolved.found == [second]
+    assert resolved.missing == [first.uuid]
+
+    queries.clear()
+    assert resolve_uuids(session, User, None) == ([], [])
+    assert resolve_uuids(session, User, []) == ([], [])
+    assert queries == []
+
+
+def test_get_users_by_uuids_reports_missing(session: Session):
+    user = session.execute(select(User).limit(1)).scalar_one()
+    unknown = uuid4()
+
+    assert crud_users.get_users_by_uuids(session, [user.uuid, unknown]) == ([user], [unknown])
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.crud import crud_events
+from app.models.models import Event, EventSummary, Issue, User
+from app.service.event import EventUnitOfWork
+
+
+@pytest.fixture(name="issue")
+def issue_fixture(session: Session):
+    issue = Issue(
+        uuid=uuid4(),
+        symbol=f"faker_000_{uuid4().hex[:8]}",
+        name="faker_000_events",
+        status="new",
+        created_at=datetime.now(timezone.utc),
+        summary="",
+        text="",
+        text_json={},
+    )
+    session.add(issue)
+    session.flush()
+
+    yield issue
+
+    session.rollback()
+
+
+def summaries(session: Session, issue: Issue) -> list[EventSummary]:
+    query = select(EventSummary).where(EventSummary.resource_uuid == issue.uuid).order_by(EventSummary.id)
+    return list(session.execute(query).scalars())
+
+
+def test_unit_of_work_writes_on_flush_in_order(session: Session, issue: Issue, queries):
+    author = session.execute(select(User).where(User.is_visible == True).limit(1)).scalar_one()  # noqa: E712
+    uow = EventUnitOfWork(session, author)
+    uow.open_summary("issue", issue.uuid, "issueResponseTime")
+    uow.flush()
+
+    queries.clear()
+    uow.add_event(issue, "issue_accept", description="accepted")
+    uow.close_summary("issue", issue.uuid, "issueResponseTime")
+    # the reopened interval is written after the close, so it stays open
+    uow.open_summary("issue", issue.uuid, "issueResponseTime")
+    assert queries == []
+
+    new_events = uow.flush()
+    tables = [EventSummary.__tablename__, EventSummary.__tablename__, Event.__tablename__]
+    assert [statement.split()[0] for statement in queries] == ["UPDATE", "INSERT", "INSERT"]
+    assert all(f".{table} " in statement for table, statement in zip(tables, queries, strict=True))
+
+    assert [(event.action, event.author_id, event.resource_id) for event in new_events] == [
+        ("issue_accept", author.id, issue.id)
+    ]
+    closed, reopened = summaries(session, issue)
+    assert closed.date_to is not None
+    assert reopened.date_to is None
+
+    # everything is written, a second flush is a no-op
+    queries.clear()
+    assert uow.flush() == []
+    assert queries == []
+    assert session.execute(select(Event).where(Event.resource_uuid == issue.uuid)).scalars().all() == new_events
+
+
+def test_close_event_summaries_single_update(session: Session, issue: Issue, queries):
+    hour_ago = datetime.now(timezone.utc) - timedelta(hours=1)
+    user_a, user_b = str(uuid4()), str(uuid4())
+    for action, internal_value in [
+        ("issueUserActivity", user_a),
+        ("issueUserActivity", user_b),
+        ("issueRepairTime", None),
+    ]:
+        session.add(
+            EventSummary(
+                uuid=uuid4(),
+                resource="issue",
+                resource_uuid=issue.uuid,
+                action=action,
+                internal_value=internal_value,
+                date_from=hour_ago,
+            )
+        )
+    session.flush()
+
+    queries.clear()
+    closed = crud_events.close_event_summaries(session, "issue", issue.uuid, ["issueUserActivity"], [user_a])
+    assert len(queries) == 1
+    assert queries[0].startswith("UPDATE") and "RETURNING" in queries[0]
+    assert [(row.action, row.internal_value) for row in closed] == [("issueUserActivity", user_a)]
+    assert 3500 < closed[0].duration < 3700  # now() of the transaction
+
+    # without values every open interval of the actions is closed, already closed ones are left alone
+    closed = crud_events.close_event_summaries(session, "issue", issue.uuid, ["issueUserActivity", "issueRepairTime"])
+    assert sorted((row.action, row.internal_value) for row in closed) == [
+        ("issueRepairTime", None),
+        ("issueUserActivity", user_b),
+    ]
+    assert crud_events.close_event_summaries(session, "issue", issue.uuid, ["issueUserActivity"]) == []
+
+    session.expire_all()
+    assert all(summary.date_to is not None for summary in summaries(session, issue))
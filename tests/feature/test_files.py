@@ -1,10 +1,24 @@
+import io
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from botocore.exceptions import ClientError
+from botocore.response import StreamingBody
 from fastapi.testclient import TestClient
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
 
+from app.api import files
 from app.config import get_settings
+from app.models.models import File
+from app.storage import aws_s3
 
 settings = get_settings()
 
+HEADERS = {"tenant": "fake_tenant_company_for_test_00000000000000000000000000000000"}
+UPLOADED = {"ContentLength": 25, "ETag": '"abc-3"'}
+
 
 def test_get_files(session: Session, client: TestClient):
     response = client.request(
@@ -31,3 +45,189 @@ def test_get_files(session: Session, client: TestClient):
 #     data = response.json()
 #     logger.info(data)
 #     assert response.status_code == 400
+
+
+@pytest.fixture(name="s3")
+def s3_fixture(monkeypatch):
+    """Stubbed `s3_client` recording its calls, the uploaded object has 25 bytes in 3 parts"""
+    calls = []
+
+    def record(name, result=None):
+        def method(**params):
+            calls.append((name, params))
+            return result
+
+        return method
+
+    monkeypatch.setattr(
+        aws_s3.s3_client, "generate_presigned_post", record("post", {"url": "https://s3", "fields": {}})
+    )
+    monkeypatch.setattr(aws_s3.s3_client, "create_multipart_upload", record("create", {"UploadId": "upload-1"}))
+    monkeypatch.setattr(aws_s3.s3_client, "generate_presigned_url", lambda **params: f"https://s3/{params['Params']}")
+    monkeypatch.setattr(aws_s3.s3_client, "complete_multipart_upload", record("complete"))
+    monkeypatch.setattr(aws_s3.s3_client, "head_object", lambda **params: UPLOADED)
+    monkeypatch.setattr(aws_s3.s3_client, "delete_object", record("delete"))
+    monkeypatch.setattr(aws_s3.s3_client, "abort_multipart_upload", record("abort"))
+    monkeypatch.setattr(files.settings, "S3_MULTIPART_PART_SIZE", 10)
+    aws_s3.presigned_url_cache.clear()
+
+    yield calls
+
+    aws_s3.presigned_url_cache.clear()
+
+
+def complete(client: TestClient, file_uuid, size: int = 25, parts: int = 3):
+    upload = {
+        "file_name": "faker_000_upload.bin",
+        "mimetype": "application/octet-stream",
+        "size": size,
+        "upload_id": "upload-1",
+        "parts": [{"part_number": number, "etag": f"etag-{number}"} for number in range(1, parts + 1)],
+    }
+    return client.post(f"/files/uploads/{file_uuid}/complete", headers=HEADERS, json=upload)
+
+
+def test_file_upload_start(session: Session, client: TestClient, s3, monkeypatch):
+    calls = s3
+    upload = {"file_name": "faker_000_upload.bin", "mimetype": "application/octet-stream"}
+
+    for size in [0, -1]:
+        response = client.post("/files/uploads", headers=HEADERS, json=upload | {"size": size})
+        assert response.status_code == 422
+
+    response = client.post("/files/uploads", headers=HEADERS, json=upload | {"size": 10})
+    assert response.status_code == 200
+    assert response.json()["url"] == "https://s3"
+
+    response = client.post("/files/uploads", headers=HEADERS, json=upload | {"size": 25})
+    assert response.status_code == 200
+    assert response.json()["upload_id"] == "upload-1"
+    assert [part["part_number"] for part in response.json()["parts"]] == [1, 2, 3]
+    assert [name for name, _ in calls] == ["post", "create"]
+
+    monkeypatch.setattr(files.settings, "FILES_QUOTA", 0)
+    response = client.post("/files/uploads", headers=HEADERS, json=upload | {"size": 25})
+    assert response.status_code == 413
+
+
+def test_file_upload_complete(session: Session, client: TestClient, s3, monkeypatch):
+    calls = s3
+
+    # size reported by the client differs from the stored object
+    response = complete(client, uuid4(), size=26)
+    assert response.status_code == 400
+    assert [name for name, _ in calls] == ["complete", "delete"]
+
+    # ETag of a 3 part upload, only 2 parts reported
+    calls.clear()
+    response = complete(client, uuid4(), parts=2)
+    assert response.status_code == 400
+    assert [name for name, _ in calls] == ["complete", "delete"]
+
+    calls.clear()
+    quota = files.settings.FILES_QUOTA
+    monkeypatch.setattr(files.settings, "FILES_QUOTA", 0)
+    response = complete(client, uuid4())
+    assert response.status_code == 413
+    assert [name for name, _ in calls] == ["complete", "delete"]
+    monkeypatch.setattr(files.settings, "FILES_QUOTA", quota)
+
+    calls.clear()
+    file_uuid = uuid4()
+    try:
+        response = complete(client, file_uuid)
+        assert response.status_code == 200
+        assert response.json()["size"] == 25
+        assert [name for name, _ in calls] == ["complete"]
+        assert [part["PartNumber"] for part in calls[0][1]["MultipartUpload"]["Parts"]] == [1, 2, 3]
+
+        response = complete(client, file_uuid)
+        assert response.status_code == 400
+        assert response.json()["detail"] == "File already exists"
+    finally:
+        session.execute(delete(File).where(File.uuid == file_uuid))
+        session.commit()
+
+
+def test_file_upload_abort(session: Session, client: TestClient, s3, monkeypatch):
+    calls = s3
+    file_uuid = uuid4()
+    params = {"file_name": "faker_000_upload.bin", "upload_id": "upload-1"}
+
+    response = client.delete(f"/files/uploads/{file_uuid}", headers=HEADERS, params=params)
+    assert response.status_code == 200
+    assert calls == [
+        (
+            "abort",
+            {
+                "Bucket": settings.s3_bucket_name,
+                "Key": f"{HEADERS['tenant']}/{file_uuid}_faker_000_upload.bin",
+                "UploadId": "upload-1",
+            },
+        )
+    ]
+
+    def missing_upload(**params):
+        raise ClientError({"Error": {"Code": "NoSuchUpload"}}, "AbortMultipartUpload")
+
+    monkeypatch.setattr(aws_s3.s3_client, "abort_multipart_upload", missing_upload)
+    response = client.delete(f"/files/uploads/{file_uuid}", headers=HEADERS, params=params)
+    assert response.status_code == 404
+
+
+def test_file_download_status(session: Session, client: TestClient, monkeypatch):
+    db_file = File(
+        uuid=uuid4(),
+        file_name="faker_000_download.txt",
+        extension=".txt",
+        mimetype="text/plain",
+        size=10,
+        created_at=datetime.now(timezone.utc),
+    )
+    session.add(db_file)
+    session.commit()
+    requests = []
+
+    def get_object(**params):
+        requests.append(params)
+        if params.get("IfNoneMatch") == '"etag"':
+            raise ClientError(
+                {"ResponseMetadata": {"HTTPStatusCode": 304, "HTTPHeaders": {"etag": '"etag"'}}}, "GetObject"
+            )
+        if params.get("Range") == "bytes=50-":
+            raise ClientError({"ResponseMetadata": {"HTTPStatusCode": 416}}, "GetObject")
+
+        content = b"0123456789"
+        response = {"ETag": '"etag"', "ContentLength": 10}
+        if params.get("Range") == "bytes=2-4":
+            content = content[2:5]
+            response |= {"ContentLength": 3, "ContentRange": "bytes 2-4/10"}
+        return response | {"Body": StreamingBody(io.BytesIO(content), len(content))}
+
+    monkeypatch.setattr(aws_s3.s3_client, "get_object", get_object)
+    url = f"/files/download/{db_file.uuid}"
+
+    try:
+        response = client.get(url, headers=HEADERS)
+        assert response.status_code == 200
+        assert response.content == b"0123456789"
+        assert response.headers["accept-ranges"] == "bytes"
+
+        response = client.get(url, headers=HEADERS | {"Range": "bytes=2-4"})
+        assert response.status_code == 206
+        assert response.content == b"234"
+        assert response.headers["content-range"] == "bytes 2-4/10"
+        assert requests[-1]["Range"] == "bytes=2-4"
+
+        response = client.get(url, headers=HEADERS | {"If-None-Match": '"etag"'})
+        assert response.status_code == 304
+        assert response.headers["etag"] == '"etag"'
+
+        response = client.get(url, headers=HEADERS | {"Range": "bytes=50-"})
+        assert response.status_code == 416
+
+        response = client.get(f"/files/download/{uuid4()}", headers=HEADERS)
+        assert response.status_code == 404
+    finally:
+        session.delete(db_file)
+        session.commit()
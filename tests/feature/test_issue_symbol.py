@@ -0,0 +1,31 @@
+from sqlalchemy.orm import Session
+
+from app.db import get_session_tenant
+from app.service import issue_symbol
+
+
+def test_issue_numbers_reserved_in_blocks(session: Session, queries, monkeypatch):
+    tenant_id = get_session_tenant(session)
+    monkeypatch.setattr(issue_symbol.settings, "ISSUE_SYMBOL_BLOCK_SIZE", 3)
+    issue_symbol.discard_reserved_numbers(tenant_id)
+
+    queries.clear()
+    block = [issue_symbol.next_issue_number(session) for _x in range(3)]
+    assert len(queries) == 1
+    assert block == list(range(block[0], block[0] + 3))
+
+    assert issue_symbol.next_issue_symbol(session) == f"PR-{block[-1] + 1}"
+    assert len(queries) == 2
+
+    # dropped reservation, the next block starts past everything handed out before
+    issue_symbol.discard_reserved_numbers(tenant_id)
+    assert issue_symbol.next_issue_number(session) == block[-1] + 4
+    assert len(queries) == 3
+
+    monkeypatch.setattr(issue_symbol.settings, "ISSUE_SYMBOL_BLOCK_SIZE", 1)
+    queries.clear()
+    issue_symbol.next_issue_number(session)
+    issue_symbol.next_issue_number(session)
+    assert len(queries) == 2
+
+    issue_symbol.discard_reserved_numbers(tenant_id)
@@ -0,0 +1,71 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import Date, extract, func, select
+from sqlalchemy.orm import Session
+
+from app.crud import crud_statistics
+from app.models.models import Issue, IssueStatsRollup
+
+HEADERS = {"tenant": "fake_tenant_company_for_test_00000000000000000000000000000000"}
+CONTENT = {"summary": "rollup", "text_html": "<p>rollup</p>", "text_json": {}}
+
+
+def rollup_counts(session: Session) -> dict:
+    rollup = IssueStatsRollup
+    query = select(rollup.day, rollup.hour, rollup.status, rollup.item_id, rollup.count).where(rollup.count != 0)
+    return {tuple(row[:4]): row[4] for row in session.execute(query)}
+
+
+def rebuilt_counts(session: Session) -> dict:
+    """Buckets as `rebuild_issues_rollup` would produce them from the issues table"""
+    issue_date = Issue.created_at.cast(Date)
+    issue_hour = extract("hour", Issue.created_at)
+    query = (
+        select(issue_date, issue_hour, Issue.status, Issue.item_id, func.count(Issue.id))
+        .where(Issue.created_at.is_not(None))
+        .group_by(issue_date, issue_hour, Issue.status, Issue.item_id)
+    )
+    return {tuple(row[:4]): row[4] for row in session.execute(query)}
+
+
+def assert_rollup_in_sync(session: Session):
+    session.expire_all()
+    assert rollup_counts(session) == rebuilt_counts(session)
+
+
+def add_issue(client: TestClient, item_uuid: str) -> str:
+    issue = {"name": "faker_000_rollup", "item_uuid": item_uuid, **CONTENT}
+    response = client.post("/issues/", headers=HEADERS, json=issue)
+    assert response.status_code == 200
+    return response.json()["uuid"]
+
+
+def test_issues_rollup_follows_issue_changes(session: Session, client: TestClient):
+    crud_statistics.rebuild_issues_rollup(session)
+    assert_rollup_in_sync(session)
+
+    item = {"name": "faker_000_rollup", "symbol": "faker_000_rollup", **CONTENT}
+    response = client.post("/items/", headers=HEADERS, json=item)
+    assert response.status_code == 200
+    item_uuid = response.json()["uuid"]
+
+    first_uuid = add_issue(client, item_uuid)
+    second_uuid = add_issue(client, item_uuid)
+    assert_rollup_in_sync(session)
+
+    response = client.post(f"/issues/status/{first_uuid}", headers=HEADERS, json={"status": "issue_accept"})
+    assert response.status_code == 200
+    assert session.execute(select(Issue.status).where(Issue.uuid == first_uuid)).scalar_one() == "accepted"
+    assert_rollup_in_sync(session)
+
+    response = client.delete(f"/issues/{second_uuid}", headers=HEADERS)
+    assert response.status_code == 200
+    assert_rollup_in_sync(session)
+
+    response = client.delete(f"/items/{item_uuid}", headers=HEADERS, params={"force": True})
+    assert response.status_code == 200
+    assert session.execute(select(Issue.item_id).where(Issue.uuid == first_uuid)).scalar_one() is None
+    assert_rollup_in_sync(session)
+
+    response = client.delete(f"/issues/{first_uuid}", headers=HEADERS)
+    assert response.status_code == 200
+    assert_rollup_in_sync(session)
@@ -0,0 +1,116 @@
+from datetime import date, datetime, time, timezone
+from uuid import uuid4
+
+from sqlalchemy import Date, distinct, extract, func, select
+from sqlalchemy.orm import Session
+
+from app.models.models import EventSummary, Issue, Item, User
+from app.service.statistics import REPAIR_TIME, TOTAL_TIME, USER_ACTIVITY, get_item_statistics
+
+
+def _per_query_statistics(db: Session, item_id: int, date_from=None, date_to=None) -> dict:
+    """Item statistics as computed before GROUPING SETS - one query per counter"""
+
+    def grouped(column):
+        query = select(column.label("key"), func.count(distinct(Issue.id))).where(Issue.item_id == item_id)
+        if date_from is not None:
+            query = query.filter(func.DATE(Issue.created_at) >= date_from)
+        if date_to is not None:
+            query = query.filter(func.DATE(Issue.created_at) <= date_to)
+        return db.execute(query.group_by("key")).all()
+
+    issues_uuids = db.execute(select(Issue.uuid).where(Issue.item_id == item_id)).scalars().all()
+
+    def durations(action: str) -> dict:
+        query = (
+            select(func.max(EventSummary.duration), func.avg(EventSummary.duration))
+            .where(EventSummary.resource_uuid.in_(issues_uuids))
+            .where(EventSummary.resource == "issue")
+            .where(EventSummary.action == action)
+        )
+        max_time, avg_time = db.execute(query).one()
+        return {"max": max_time, "avg": avg_time}
+
+    per_hour = {str(hour): count for hour, count in grouped(extract("hour", Issue.created_at))}
+    for hour in [time(i).strftime("%H") for i in range(24)]:
+        per_hour.setdefault(hour, 0)
+    status = dict(grouped(Issue.status))
+    for name in ["new", "accepted", "rejected", "assigned", "in_progress", "paused", "done"]:
+        status.setdefault(name, 0)
+
+    user_uuids = db.execute(
+        select(distinct(EventSummary.internal_value))
+        .where(EventSummary.resource_uuid.in_(issues_uuids))
+        .where(EventSummary.action == USER_ACTIVITY)
+    ).scalars()
+    users = db.execute(select(User).where(User.uuid.in_(list(user_uuids)))).scalars().all()
+
+    return {
+        "issuesCount": len(issues_uuids),
+        "issuesPerDay": {day.strftime("%Y-%m-%d"): count for day, count in grouped(Issue.created_at.cast(Date))},
+        "issuesPerHour": dict(sorted(per_hour.items())),
+        "issuesStatus": dict(sorted(status.items())),
+        "repairTime": durations(REPAIR_TIME),
+        "users": {"name": ", ".join(sorted(f"{u.first_name} {u.last_name}" for u in users))} if users else None,
+        "totalTime": durations(TOTAL_TIME),
+    }
+
+
+def test_item_statistics_match_per_query_values(session: Session):
+    user = session.execute(select(User).where(User.is_visible == True).limit(1)).scalar_one()  # noqa: E712
+    item = Item(uuid=uuid4(), symbol="faker_000_stats", name="faker_000_stats", summary="", text="", text_json={})
+    session.add(item)
+    session.flush()
+
+    empty = get_item_statistics(session, item.id)
+    assert empty == _per_query_statistics(session, item.id)
+    assert empty["repairTime"] == {"max": None, "avg": None}
+    assert empty["users"] is None
+
+    created = [
+        (datetime(2026, 1, 5, 8, tzinfo=timezone.utc), "new"),
+        (datetime(2026, 1, 5, 14, tzinfo=timezone.utc), "done"),
+        (datetime(2026, 1, 7, 8, tzinfo=timezone.utc), "done"),
+        (datetime(2026, 2, 1, 23, tzinfo=timezone.utc), "paused"),
+    ]
+    issues = [
+        Issue(
+            uuid=uuid4(),
+            symbol=f"faker_000_{uuid4().hex[:8]}",
+            name="faker_000_stats_issue",
+            status=status,
+            created_at=created_at,
+            summary="",
+            text="",
+            text_json={},
+            item_id=item.id,
+        )
+        for created_at, status in created
+    ]
+    events = [
+        EventSummary(uuid=uuid4(), resource="issue", resource_uuid=issues[0].uuid, action=REPAIR_TIME, duration=60),
+        EventSummary(uuid=uuid4(), resource="issue", resource_uuid=issues[1].uuid, action=REPAIR_TIME, duration=90),
+        EventSummary(uuid=uuid4(), resource="issue", resource_uuid=issues[1].uuid, action=TOTAL_TIME, duration=300),
+        EventSummary(
+            uuid=uuid4(),
+            resource="issue",
+            resource_uuid=issues[2].uuid,
+            action=USER_ACTIVITY,
+            internal_value=str(user.uuid),
+        ),
+    ]
+    session.add_all(issues + events)
+    session.flush()
+
+    try:
+        for date_from, date_to in [(None, None), (date(2026, 1, 6), None), (date(2026, 1, 1), date(2026, 1, 31))]:
+            statistics = get_item_statistics(session, item.id, date_from, date_to)
+            assert statistics == _per_query_statistics(session, item.id, date_from, date_to)
+
+        assert statistics["issuesCount"] == 4
+        assert statistics["issuesPerDay"] == {"2026-01-05": 2, "2026-01-07": 1}
+        assert statistics["issuesStatus"]["done"] == 2
+        assert statistics["repairTime"]["max"] == 90
+        assert statistics["users"] == {"name": f"{user.first_name} {user.last_name}"}
+    finally:
+        session.rollback()
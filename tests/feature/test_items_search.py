@@ -0,0 +1,30 @@
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.models.models import Item
+
+HEADERS = {"tenant": "fake_tenant_company_for_test_00000000000000000000000000000000"}
+
+
+def test_search_puts_best_match_first(session: Session, client: TestClient):
+    # "pompa" only in the text of the first item, in the name and text of the second one
+    items = [
+        Item(uuid=uuid4(), symbol="faker_000_a", name="faker_000_rank_a", summary="", text="pompa", text_json={}),
+        Item(uuid=uuid4(), symbol="faker_000_b", name="faker_000_rank_b pompa", summary="", text="pompa", text_json={}),
+    ]
+    session.add_all(items)
+    session.flush()
+
+    def found(params: dict) -> list[str]:
+        response = client.get("/items/", headers=HEADERS, params={"search": "pompa"} | params)
+        assert response.status_code == 200
+        return [item["name"] for item in response.json()["items"] if item["name"].startswith("faker_000_rank")]
+
+    try:
+        assert found({}) == ["faker_000_rank_b pompa", "faker_000_rank_a"]
+        # a sort picked by the client wins, the rank only breaks its ties
+        assert found({"field": "name"}) == ["faker_000_rank_a", "faker_000_rank_b pompa"]
+    finally:
+        session.rollback()
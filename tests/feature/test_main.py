@@ -1,6 +1,10 @@
 from fastapi.testclient import TestClient
+from sqlalchemy import bindparam, select
 
+from app.db import get_tenant_engine, with_db
 from app.main import app
+from app.models.models import User
+from app.service.db_metrics import query_cache_metrics
 
 client = TestClient(app)
 
@@ -9,3 +13,16 @@ def test_main():
     response = client.request("GET", "/")
     assert response.status_code == 200
     # assert response.json() == {"Hello": "World"}
+
+
+def test_tenant_engine_shares_compiled_cache():
+    tenant_id = "fake_tenant_company_for_test_00000000000000000000000000000000"
+    assert get_tenant_engine(tenant_id) is get_tenant_engine(tenant_id)
+    assert get_tenant_engine(tenant_id) is not get_tenant_engine(None)
+
+    query = select(User.id).where(User.id == bindparam("id"))
+    with with_db(tenant_id) as db:
+        db.execute(query, {"id": 1})
+        hits = query_cache_metrics.hits
+        db.execute(query, {"id": 2})
+    assert query_cache_metrics.hits == hits + 1
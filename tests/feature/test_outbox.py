@@ -0,0 +1,95 @@
+from types import SimpleNamespace
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.crud import crud_outbox
+from app.models.shared_models import NotificationOutbox
+from app.service import outbox
+
+
+def test_outbox_dispatch(session: Session, monkeypatch):
+    # messages of this test only, anything queued earlier in the run is left alone
+    session.execute(delete(NotificationOutbox).where(NotificationOutbox.kind == "test"))
+    first = crud_outbox.add_outbox_message(session, None, "test", {"n": 1}, "faker_000_outbox_1")
+    assert crud_outbox.add_outbox_message(session, None, "test", {"n": 1}, "faker_000_outbox_1") is None
+    second = crud_outbox.add_outbox_message(session, None, "test", {"n": 2}, "faker_000_outbox_2")
+    session.commit()
+
+    delivered = []
+
+    def send(payload):
+        if payload["n"] == 2:
+            raise ConnectionError("provider down")
+        delivered.append(payload["n"])
+
+    monkeypatch.setitem(outbox.SENDERS, "test", send)
+
+    assert outbox.dispatch_outbox() >= 1
+    assert delivered == [1]
+
+    rows = {
+        row.id: row
+        for row in session.execute(
+            select(NotificationOutbox).where(NotificationOutbox.id.in_([first, second]))
+        ).scalars()
+    }
+    assert rows[first].status == "sent"
+    assert rows[second].status == "pending"
+    assert rows[second].attempts == 1
+    assert "provider down" in rows[second].last_error
+    assert rows[second].next_attempt_at > rows[second].created_at
+
+    # not due yet, backoff keeps it out of the next run
+    outbox.dispatch_outbox()
+    assert delivered == [1]
+
+    session.execute(delete(NotificationOutbox).where(NotificationOutbox.kind == "test"))
+    session.commit()
+
+
+def test_outbox_retry_delay(monkeypatch):
+    monkeypatch.setattr(outbox.settings, "OUTBOX_RETRY_BASE", 30)
+    monkeypatch.setattr(outbox.settings, "OUTBOX_RETRY_MAX", 100)
+    monkeypatch.setattr(outbox.settings, "OUTBOX_MAX_ATTEMPTS", 4)
+
+    assert [outbox.retry_delay(attempts) for attempts in range(1, 5)] == [30, 60, 100, None]
+
+
+def test_outbox_dispatch_per_commit(session: Session, monkeypatch):
+    jobs = []
+    monkeypatch.setattr(outbox, "scheduler", SimpleNamespace(add_job=jobs.append))
+    monkeypatch.setattr(outbox, "_dispatch_batches", lambda: 1)
+
+    def enqueue(n: int):
+        outbox.enqueue_email(session, {"Messages": [{"n": n}]}, f"faker_000_outbox_commit_{n}")
+
+    try:
+        # every commit with queued messages starts a dispatch, not only the first one of the session
+        enqueue(1)
+        session.commit()
+        enqueue(2)
+        session.commit()
+        assert jobs == [outbox.dispatch_outbox, outbox.dispatch_outbox]
+
+        session.commit()
+        enqueue(3)
+        session.rollback()
+        session.commit()
+        assert len(jobs) == 2
+
+        with outbox._dispatch_lock:
+            # a dispatch is running, neither a new job nor a second dispatcher starts
+            enqueue(4)
+            session.commit()
+            assert outbox.dispatch_outbox() == 0
+        assert len(jobs) == 2
+
+        assert outbox.dispatch_outbox() == 1
+        assert not outbox._dispatch_lock.locked()
+    finally:
+        session.rollback()
+        session.execute(
+            delete(NotificationOutbox).where(NotificationOutbox.dedup_key.like("faker_000_outbox_commit_%"))
+        )
+        session.commit()
@@ -0,0 +1,86 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.models import Issue
+from app.service.pagination import CursorParams, paginate_cursor
+
+PRIORITIES = [None, "10", "20", "10", None, "30", "10", None]
+
+
+@pytest.fixture(name="issues")
+def issues_fixture(session: Session):
+    """Issues with NULL and duplicate priorities, the sort column of the pages below"""
+    issues = [
+        Issue(
+            uuid=uuid4(),
+            symbol=f"faker_000_{uuid4().hex[:8]}",
+            name="faker_000_cursor",
+            priority=priority,
+            created_at=datetime.now(timezone.utc),
+            summary="",
+            text="",
+            text_json={},
+        )
+        for priority in PRIORITIES
+    ]
+    session.add_all(issues)
+    session.flush()
+
+    yield issues
+
+    session.rollback()
+
+
+def expected_ids(issues: list[Issue], order: str) -> list[int]:
+    """`priority, id` order with NULLs last"""
+    descending = order == "desc"
+    with_priority = sorted(
+        (issue for issue in issues if issue.priority is not None),
+        key=lambda issue: (issue.priority, issue.id),
+        reverse=descending,
+    )
+    without_priority = sorted((issue for issue in issues if issue.priority is None), key=lambda issue: issue.id)
+    if descending:
+        without_priority.reverse()
+    return [issue.id for issue in with_priority + without_priority]
+
+
+def page(session: Session, order: str, cursor: str | None = None, count: str = "none"):
+    query = select(Issue).where(Issue.name == "faker_000_cursor")
+    params = CursorParams(pagination="cursor", cursor=cursor, count=count)
+    return paginate_cursor(session, query, Issue.priority, Issue.id, order, 3, params)
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_cursor_pages_forward_and_back(session: Session, issues: list[Issue], order: str):
+    pages = [page(session, order)]
+    assert pages[0].prev_cursor is None
+    while pages[-1].next_cursor is not None:
+        pages.append(page(session, order, pages[-1].next_cursor))
+
+    forward = [[issue.id for issue in current.items] for current in pages]
+    assert [len(ids) for ids in forward] == [3, 3, 2]
+    assert sum(forward, []) == expected_ids(issues, order)
+
+    backward = [forward[-1]]
+    current = pages[-1]
+    while current.prev_cursor is not None:
+        current = page(session, order, current.prev_cursor)
+        backward.insert(0, [issue.id for issue in current.items])
+    assert backward == forward
+
+    # a page reached going back continues forward where it left off
+    assert [issue.id for issue in page(session, order, current.next_cursor).items] == forward[1]
+
+
+def test_cursor_page_count(session: Session, issues: list[Issue]):
+    assert page(session, "asc").total is None
+    assert page(session, "asc", count="exact").total == len(PRIORITIES)
+
+    estimate = page(session, "asc", count="estimate").total
+    assert isinstance(estimate, int)
+    assert estimate >= 0
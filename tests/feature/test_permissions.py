@@ -0,0 +1,90 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.main import app
+from app.models.models import Permission, Role, User
+from app.service.bearer_auth import Principal, has_token
+from app.service.permissions import can_edit_user, has_permission, invalidate_role_permissions
+
+HEADERS = {"tenant": "fake_tenant_company_for_test_00000000000000000000000000000000"}
+EMPTY_CSV = {"file": ("users.csv", b"first_name;last_name;email\n")}
+
+
+def test_require_permission(session: Session, client: TestClient):
+    response = client.post("/users/import", headers=HEADERS, files=EMPTY_CSV)
+    assert response.status_code == 200
+
+    app.dependency_overrides[has_token] = lambda: Principal(id=1, uuid=uuid4(), user_role_id=None)
+    response = client.post("/users/import", headers=HEADERS, files=EMPTY_CSV)
+    assert response.status_code == 403
+    assert response.json()["detail"] == "Insufficient privileges"
+
+
+def test_can_edit_user(session: Session):
+    admin = Principal(id=1, uuid=uuid4(), user_role_id=1)
+    assert can_edit_user(session, admin, uuid4()) is True
+
+    nobody = Principal(id=1, uuid=uuid4(), user_role_id=None)
+    assert can_edit_user(session, nobody, nobody.uuid) is False
+
+    edit_self = session.execute(select(Permission).where(Permission.name == "USER_EDIT_SELF")).scalar_one()
+    role = Role(
+        uuid=uuid4(),
+        role_name="TEST_EDIT_SELF",
+        role_title="Test edit self",
+        is_custom=True,
+        is_visible=True,
+        is_system=False,
+        created_at=datetime.now(timezone.utc),
+        permission=[edit_self],
+    )
+    session.add(role)
+    session.commit()
+    invalidate_role_permissions(session)
+
+    try:
+        user = Principal(id=1, uuid=uuid4(), user_role_id=role.id)
+        assert can_edit_user(session, user, user.uuid) is True
+        assert can_edit_user(session, user, uuid4()) is False
+
+        # soft deleted role grants nothing
+        role.deleted_at = datetime.now(timezone.utc)
+        session.commit()
+        invalidate_role_permissions(session)
+        assert has_permission(session, user, "USER_EDIT_SELF") is False
+        assert can_edit_user(session, user, user.uuid) is False
+    finally:
+        session.delete(role)
+        session.commit()
+        invalidate_role_permissions(session)
+
+
+def test_roles_listing(session: Session, client: TestClient, queries):
+    roles = select(Role.role_title).where(Role.deleted_at.is_(None))
+    titles = session.execute(roles.order_by(Role.role_title)).scalars().all()
+    admin_uuid = session.execute(select(Role.uuid).where(Role.id == 1)).scalar_one()
+    admins = session.execute(select(func.count(User.id)).where(User.user_role_id == 1)).scalar_one()
+
+    queries.clear()
+    response = client.get("/permissions/", headers=HEADERS)
+    assert response.status_code == 200
+    assert [role["role_title"] for role in response.json()["items"]] == titles
+    assert response.json()["total"] == len(titles)
+    assert {role["uuid"]: role["count"] for role in response.json()["items"]}[str(admin_uuid)] == admins
+    # counted and paginated in SQL, a COUNT and one page of grouped rows
+    role_queries = [query for query in queries if ".roles" in query]
+    assert len(role_queries) == 2
+    assert role_queries[0].startswith("SELECT count(*)")
+    assert "GROUP BY" in role_queries[1] and "LIMIT" in role_queries[1]
+
+    response = client.get("/permissions/", headers=HEADERS, params={"sortColumn": "name", "sortOrder": "desc"})
+    assert [role["role_title"] for role in response.json()["items"]] == titles[::-1]
+
+    # unknown sort falls back to the title in ascending order
+    response = client.get("/permissions/", headers=HEADERS, params={"sortColumn": "id; drop", "sortOrder": "up"})
+    assert response.status_code == 200
+    assert [role["role_title"] for role in response.json()["items"]] == titles
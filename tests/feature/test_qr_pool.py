@@ -0,0 +1,77 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.crud import crud_qr
+from app.db import get_session_tenant
+from app.models.models import QrCodeId
+from app.service import qr_pool
+
+
+@pytest.fixture(name="pool_session")
+def pool_session_fixture(session: Session, monkeypatch):
+    """Tenant session whose commits stay in one transaction, the pool is restored by the final rollback"""
+    monkeypatch.setattr(session, "commit", session.flush)
+    session.execute(update(QrCodeId).where(QrCodeId.claimed_at.is_(None)).values(claimed_at=datetime.now(timezone.utc)))
+
+    yield session
+
+    session.rollback()
+
+
+def test_claim_qr_code_id(pool_session: Session):
+    assert crud_qr.claim_qr_code_id(pool_session) is None
+
+    assert crud_qr.add_qr_code_ids(pool_session, {"faker_000_qr_a", "faker_000_qr_b"}) == 2
+    assert crud_qr.add_qr_code_ids(pool_session, {"faker_000_qr_a"}) == 0
+
+    claimed = {crud_qr.claim_qr_code_id(pool_session), crud_qr.claim_qr_code_id(pool_session)}
+    assert claimed == {"faker_000_qr_a", "faker_000_qr_b"}
+    assert crud_qr.claim_qr_code_id(pool_session) is None
+
+    claimed_at = pool_session.execute(select(QrCodeId.claimed_at).where(QrCodeId.qr_code_id.in_(claimed))).scalars()
+    assert None not in list(claimed_at)
+
+
+def test_claim_item_qr_id_refills_pool(pool_session: Session, monkeypatch):
+    monkeypatch.setattr(qr_pool.settings, "QR_POOL_SIZE", 5)
+    monkeypatch.setattr(qr_pool.settings, "QR_POOL_LOW_WATERMARK", 3)
+    jobs = []
+    monkeypatch.setattr(qr_pool, "scheduler", SimpleNamespace(add_job=lambda job, args: jobs.append(args)))
+
+    # empty pool is refilled in place
+    assert qr_pool.claim_item_qr_id(pool_session) is not None
+    assert crud_qr.count_free_qr_code_ids(pool_session) == 4
+
+    qr_pool.claim_item_qr_id(pool_session)
+    assert jobs == []
+
+    # below the watermark a single refill job is queued per tenant
+    tenant_id = get_session_tenant(pool_session)
+    qr_pool.claim_item_qr_id(pool_session)
+    qr_pool.claim_item_qr_id(pool_session)
+    assert jobs == [[tenant_id]]
+
+    @contextmanager
+    def tenant_db(_tenant_id: str):
+        yield pool_session
+
+    monkeypatch.setattr(qr_pool, "with_db", tenant_db)
+    qr_pool.refill_qr_code_pool_job(tenant_id)
+    assert crud_qr.count_free_qr_code_ids(pool_session) == 5
+    assert tenant_id not in qr_pool._refilling
+
+
+def test_current_qr_id_length_widens(pool_session: Session, monkeypatch):
+    monkeypatch.setattr(qr_pool.settings, "QR_ID_MIN_LENGTH", 1)
+    monkeypatch.setattr(qr_pool.settings, "QR_ID_FILL_THRESHOLD", 0.1)  # 3.3 of 33 one character ids
+
+    crud_qr.add_qr_code_ids(pool_session, {"a", "b", "c"})
+    assert qr_pool.current_qr_id_length(pool_session) == 1
+
+    crud_qr.add_qr_code_ids(pool_session, {"d"})
+    assert qr_pool.current_qr_id_length(pool_session) == 2
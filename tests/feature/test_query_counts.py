@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.models import Issue, Item, User
+
+HEADERS = {"tenant": "fake_tenant_company_for_test_00000000000000000000000000000000"}
+
+
+def _add_issues(session: Session, item: Item, user: User, count: int) -> list[Issue]:
+    issues = [
+        Issue(
+            uuid=uuid4(),
+            symbol=f"faker_000_{uuid4().hex[:8]}",
+            name=f"faker_000_issue_{i}",
+            created_at=datetime.now(timezone.utc),
+            summary="",
+            text="",
+            text_json={},
+            item=item,
+            users_issue=[user],
+        )
+        for i in range(count)
+    ]
+    session.add_all(issues)
+    session.commit()
+    return issues
+
+
+def test_query_counts(session: Session, client: TestClient, queries: list):
+    user = session.execute(select(User).limit(1)).scalar_one()
+    item = Item(
+        uuid=uuid4(),
+        symbol="faker_000_item",
+        name="faker_000_item",
+        summary="",
+        text="",
+        text_json={},
+        users_item=[user],
+    )
+    session.add(item)
+    issues = _add_issues(session, item, user, 1)
+
+    def count(url: str, **params) -> int:
+        session.expire_all()
+        queries.clear()
+        response = client.get(url, params=params, headers=HEADERS)
+        assert response.status_code == 200
+        return len(queries)
+
+    try:
+        issue_single = count(f"/issues/{issues[0].uuid}")
+        item_single = count(f"/items/{item.uuid}")
+        listing_one = count("/issues/", status="all", search="faker_000_issue")
+
+        issues += _add_issues(session, item, user, 3)
+
+        # one query per relationship in the loading profile, regardless of related rows or page size
+        assert count(f"/issues/{issues[-1].uuid}") == issue_single
+        assert count(f"/items/{item.uuid}") == item_single
+        assert count("/issues/", status="all", search="faker_000_issue") == listing_one
+        assert issue_single <= 5
+        assert item_single <= 5
+    finally:
+        session.rollback()
+        for row in [*issues, item]:
+            session.delete(row)
+        session.commit()
@@ -1,3 +1,6 @@
+import gzip
+import json
+
 from fastapi.testclient import TestClient
 from loguru import logger
 from sqlalchemy.orm import Session
@@ -48,6 +51,20 @@ def test_get_users(session: Session, client: TestClient):
     assert data["items"][0]["role_FK"]["role_title"]
 
 
+def test_export_users(session: Session, client: TestClient):
+    headers = {"tenant": "fake_tenant_company_for_test_00000000000000000000000000000000"}
+
+    response = client.request("GET", "/users/export", headers=headers)
+    assert response.status_code == 200
+    assert response.text.splitlines()[0] == "First Name;Last Name;Email"
+    assert len(response.text.splitlines()) > 1
+
+    response = client.request("GET", "/users/export", params={"format": "ndjson", "compress": True}, headers=headers)
+    rows = [json.loads(line) for line in gzip.decompress(response.content).decode().splitlines()]
+    assert response.status_code == 200
+    assert rows[0]["email"]
+
+
 # TODO role_uuid
 # def test_add_users(session: Session, client: TestClient):
 
@@ -112,3 +129,29 @@ def test_get_users(session: Session, client: TestClient):
 #     logger.info(data)
 #     # {'ok': True}
 #     assert response.status_code == 200
+
+
+def test_import_users(session: Session, client: TestClient):
+    headers = {"tenant": "fake_tenant_company_for_test_00000000000000000000000000000000"}
+    csv_file = (
+        "First Name;Last Name;Email;Password;Role\n"
+        "Jan;Kowalski;import_001@email.com;secret;Main admin\n"
+        "Anna;Nowak;import_002@email.com;;Main admin\n"
+        "Anna;Nowak;IMPORT_002@email.com;;Main admin\n"
+        "Thomas;Franklin;faker_000_@email.com;;Main admin\n"
+    )
+
+    response = client.post("/users/import", headers=headers, files={"file": ("users.csv", csv_file.encode())})
+    data = response.json()
+    assert response.status_code == 200
+    assert data["inserted"] == 2
+    assert data["skipped"] == ["IMPORT_002@email.com", "faker_000_@email.com"]
+
+    response = client.post("/users/import", headers=headers, files={"file": ("users.csv", csv_file.encode())})
+    assert response.json()["inserted"] == 0
+
+    response = client.post(
+        "/users/import", headers=headers, files={"file": ("users.csv", b"first_name;last_name;email\nJan;;not-email\n")}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"][0]["line"] == 2
@@ -0,0 +1,45 @@
+from app.utils.cache import TTLCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_expires_entries():
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=10, ttl=5, timer=timer)
+    cache.set("tenant_a", "A")
+
+    assert cache.get("tenant_a") == "A"
+    timer.now = 6
+    assert cache.get("tenant_a") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=None)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_invalidate():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set(("t1", "x"), 1)
+    cache.set(("t1", "y"), 2)
+    cache.set(("t2", "x"), 3)
+
+    assert cache.invalidate(("t2", "x")) is True
+    assert cache.invalidate_if(lambda key, value: key[0] == "t1") == 2
+    assert len(cache) == 0
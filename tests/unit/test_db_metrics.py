@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import create_engine, exc
+
+from app.service.db_metrics import MeteredQueuePool, PoolMetrics, pool_metrics, register_pool_metrics
+
+
+def tenant_stats(tenant: str) -> dict:
+    return pool_metrics.snapshot()["tenants"].get(tenant, {"checkouts": 0, "waits": 0, "in_use": 0})
+
+
+def test_pool_metrics_counts_per_tenant():
+    metrics = PoolMetrics()
+    metrics.record_checkout("tenant_a", waited=True, latency=0.02)
+    metrics.record_checkout("tenant_a")
+    metrics.record_checkout("tenant_b")
+    metrics.record_checkin("tenant_a")
+    metrics.record_overflow()
+
+    snapshot = metrics.snapshot()
+    assert snapshot["overflow_created"] == 1
+    assert snapshot["tenants"]["tenant_a"] == {
+        "checkouts": 2,
+        "waits": 1,
+        "in_use": 1,
+        "checkout_time_avg_ms": 10.0,
+        "checkout_time_max_ms": 20.0,
+    }
+    assert snapshot["tenants"]["tenant_b"]["in_use"] == 1
+
+
+def test_metered_pool_records_wait_on_waiting_connection():
+    engine = create_engine("sqlite://", poolclass=MeteredQueuePool, pool_size=1, max_overflow=0, pool_timeout=5)
+    register_pool_metrics(engine)
+    holder = engine.execution_options(schema_translate_map={"tenant": "metrics_holder"})
+    waiter = engine.execution_options(schema_translate_map={"tenant": "metrics_waiter"})
+    waits_before = tenant_stats("metrics_waiter")["waits"]
+
+    connection = holder.connect()
+    assert tenant_stats("metrics_holder")["in_use"] == 1
+
+    def wait_for_connection():
+        with waiter.connect():
+            pass
+
+    thread = threading.Thread(target=wait_for_connection)
+    thread.start()
+    time.sleep(0.1)
+    connection.close()
+    thread.join()
+
+    assert tenant_stats("metrics_holder")["in_use"] == 0
+    assert tenant_stats("metrics_waiter")["waits"] == waits_before + 1
+    assert tenant_stats("metrics_holder")["checkouts"] >= 1
+    assert pool_metrics.snapshot()["tenants"]["metrics_waiter"]["checkout_time_max_ms"] >= 50
+
+
+def test_metered_pool_records_timeout():
+    engine = create_engine("sqlite://", poolclass=MeteredQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05)
+    register_pool_metrics(engine)
+    timeouts = pool_metrics.timeouts
+
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    assert pool_metrics.timeouts == timeouts + 1
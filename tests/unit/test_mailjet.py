@@ -0,0 +1,73 @@
+import json
+
+import httpx
+import pytest
+
+from app.service import notification_email
+from app.service.notification_email import EmailNotification, MailjetDeliveryError
+
+
+def test_mailjet_bulk_send_in_batches(monkeypatch):
+    batches = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        messages = json.loads(request.content)["Messages"]
+        batches.append(len(messages))
+        results = [
+            {"Status": "error", "Errors": [{"ErrorMessage": "Invalid email"}]}
+            if message["To"][0]["Email"] == "bad@example.com"
+            else {"Status": "success"}
+            for message in messages
+        ]
+        return httpx.Response(200, json={"Messages": results})
+
+    monkeypatch.delenv("TESTING", raising=False)
+    monkeypatch.setattr(notification_email.settings, "MAILJET_BATCH_SIZE", 2)
+    monkeypatch.setattr(notification_email, "mailjet_client", httpx.Client(transport=httpx.MockTransport(handler)))
+
+    emails = ["a@example.com", "b@example.com", "bad@example.com", "c@example.com", "d@example.com"]
+    payload = {"Messages": [{"To": [{"Email": email}], "TemplateID": 1} for email in emails]}
+
+    with pytest.raises(MailjetDeliveryError) as error:
+        EmailNotification().send_by_mailjet(payload)
+
+    assert sorted(batches) == [1, 2, 2]
+    assert error.value.results["a@example.com"] == "success"
+    assert error.value.results["bad@example.com"] == "Invalid email"
+    assert error.value.remaining_payload == {"Messages": [payload["Messages"][2]]}
+
+    batches.clear()
+    assert EmailNotification().send_by_mailjet({"Messages": payload["Messages"][:2]}) == {
+        "a@example.com": "success",
+        "b@example.com": "success",
+    }
+    assert batches == [2]
+
+
+def test_mailjet_unconfirmed_messages_are_failed(monkeypatch):
+    responses = iter(
+        [
+            httpx.Response(200, json={"Messages": [{"Status": "success"}]}),
+            httpx.Response(500, json={"Messages": [{"Status": "success"}, {"Status": "success"}]}),
+        ]
+    )
+    monkeypatch.delenv("TESTING", raising=False)
+    monkeypatch.setattr(
+        notification_email, "mailjet_client", httpx.Client(transport=httpx.MockTransport(lambda _: next(responses)))
+    )
+
+    payload = {
+        "Messages": [{"To": [{"Email": email}], "TemplateID": 1} for email in ["a@example.com", "b@example.com"]]
+    }
+
+    # shorter result list - the message without a result is retried
+    with pytest.raises(MailjetDeliveryError) as error:
+        EmailNotification().send_by_mailjet(payload)
+    assert error.value.results == {"a@example.com": "success", "b@example.com": "no result"}
+    assert error.value.remaining_payload == {"Messages": [payload["Messages"][1]]}
+
+    # error status - the body is not trusted
+    with pytest.raises(MailjetDeliveryError) as error:
+        EmailNotification().send_by_mailjet(payload)
+    assert error.value.results == {"a@example.com": "HTTP 500", "b@example.com": "HTTP 500"}
+    assert error.value.remaining_payload == payload
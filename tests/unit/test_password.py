@@ -1,4 +1,11 @@
-from app.service.password import Password
+import threading
+
+import pytest
+from fastapi import HTTPException
+from passlib.hash import argon2
+
+from app.service import password as password_service
+from app.service.password import Password, hash_password, verify_password
 
 
 def test_password_not_match():
@@ -11,3 +18,24 @@ def test_password_without_lowercase():
     password = Password("A")
     is_password_ok = password.compare("A")
     assert is_password_ok == "Password must contain a lowercase letter."
+
+
+def test_verify_password_rehashes_outdated_hash():
+    old_hash = argon2.using(time_cost=1, memory_cost=1024, parallelism=1).hash("secret")
+
+    is_valid, new_hash = verify_password("secret", old_hash)
+    assert is_valid is True
+    assert new_hash is not None
+    assert verify_password("secret", new_hash) == (True, None)
+    assert verify_password("wrong", new_hash) == (False, None)
+
+
+def test_password_pool_saturated(monkeypatch):
+    monkeypatch.setattr(password_service.settings, "PASSWORD_POOL_SIZE", 1)
+    monkeypatch.setattr(password_service, "_pool_slots", threading.BoundedSemaphore(1))
+    password_service._pool_slots.acquire()
+
+    with pytest.raises(HTTPException) as error:
+        hash_password("secret")
+    assert error.value.status_code == 429
+    assert error.value.headers == {"Retry-After": "1"}
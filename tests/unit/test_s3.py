@@ -29,3 +29,29 @@ def test_s3_storage_methods(tmp_path: Path) -> None:
     storage = PrivateS3Storage()
 
     assert storage.get_name("test (1).txt") == "test_1.txt"
+
+
+def test_presigned_urls_are_cached(monkeypatch) -> None:
+    from app.storage import aws_s3
+
+    signed = []
+
+    def generate_presigned_url(ClientMethod, Params, ExpiresIn):
+        signed.append(Params["Key"])
+        return f"https://bucket/{Params['Key']}?signature"
+
+    monkeypatch.setattr(aws_s3.s3_client, "generate_presigned_url", generate_presigned_url)
+    aws_s3.presigned_url_cache.clear()
+
+    urls = aws_s3.generate_presigned_urls("tenant", ["a.jpg", "b.jpg", "a.jpg"])
+    assert urls == {"a.jpg": "https://bucket/tenant/a.jpg?signature", "b.jpg": "https://bucket/tenant/b.jpg?signature"}
+    assert aws_s3.generate_presigned_url("tenant", "b.jpg") == urls["b.jpg"]
+    assert signed == ["tenant/a.jpg", "tenant/b.jpg"]
+
+    aws_s3.invalidate_presigned_url("tenant", "b.jpg")
+    aws_s3.generate_presigned_url("tenant", "b.jpg")
+    assert signed == ["tenant/a.jpg", "tenant/b.jpg", "tenant/b.jpg"]
+
+    monkeypatch.setattr(S3Storage, "AWS_S3_CUSTOM_DOMAIN", "cdn.example.com")
+    assert aws_s3.generate_presigned_url("tenant", "c d.jpg") == "https://cdn.example.com/tenant/c%20d.jpg"
+    aws_s3.presigned_url_cache.clear()
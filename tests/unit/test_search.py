@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.crud.crud_search import apply_search, build_tsquery
+from app.models.models import Item
+
+
+def tsquery_args(search: str, lang: str | None = None) -> list:
+    return list(build_tsquery(search, lang).compile(dialect=postgresql.dialect()).params.values())
+
+
+def matches(session: Session, document: str, search: str, lang: str | None = None) -> bool:
+    query = select(func.to_tsvector("simple", document).bool_op("@@")(build_tsquery(search, lang)))
+    return session.execute(query).scalar_one()
+
+
+@pytest.mark.parametrize("search", ["", "   ", "!?", "-- ;", "&|!"])
+def test_build_tsquery_nothing_to_search(search: str):
+    assert build_tsquery(search) is None
+
+
+@pytest.mark.parametrize(
+    ("lang", "config"),
+    [("pl", "simple"), ("en", "english"), (None, "simple"), ("de", "simple")],
+)
+def test_build_tsquery_config(lang: str | None, config: str):
+    assert tsquery_args("pompa", lang) == [config, "pompa:*"]
+
+
+def test_build_tsquery_prefix_words(session: Session):
+    assert tsquery_args("pompa hydr!", "pl") == ["simple", "pompa:* & hydr:*"]
+
+    assert matches(session, "Pompa hydrauliczna", "pompa hydr") is True
+    assert matches(session, "Pompa hydrauliczna", "hydr & | pom") is True
+    assert matches(session, "Pompa hydrauliczna", "pompa zawór") is False
+
+
+def test_apply_search_order():
+    query = select(Item)
+    sort = text("name desc")
+
+    assert apply_search(query, Item, None) is query
+    assert "ORDER BY name desc" in str(apply_search(query, Item, "?!", sort=sort))
+
+    searched = apply_search(query, Item, "pompa", "en", sort).compile(dialect=postgresql.dialect())
+    assert "WHERE tenant.items.search_vector @@ to_tsquery(" in str(searched)
+    assert "ORDER BY name desc, ts_rank(tenant.items.search_vector, to_tsquery(" in str(searched)
+    assert list(searched.params.values()) == ["english", "pompa:*"]
+
+    ranked = apply_search(query, Item, "pompa", "en", sort, rank_first=True)
+    assert str(ranked).endswith(") DESC, name desc")